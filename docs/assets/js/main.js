@@ -1,5 +1,8 @@
 // JAC Interiors - Main JavaScript
+// Sections start with "// @module <name>"; bundle_js.py builds per-family bundles
+// that include only the sections a family's pages use.
 
+// @module spa-nav
 // ===================================
 // SPA-LIKE NAVIGATION (No page reload for navbar)
 // ===================================
@@ -281,12 +284,15 @@ const SPANav = {
 //     }, 100);
 // });
 
+// @module site
 // Mobile Menu Toggle
 document.addEventListener('DOMContentLoaded', function() {
     const mobileMenuToggle = document.getElementById('mobileMenuToggle');
     const navMenu = document.getElementById('navMenu');
     
-    if (mobileMenuToggle && navMenu) {
+    // load-navbar.js wires the same handlers on pages that include it.
+    if (mobileMenuToggle && navMenu && mobileMenuToggle.dataset.navWired !== '1') {
+        mobileMenuToggle.dataset.navWired = '1';
         mobileMenuToggle.addEventListener('click', function() {
             navMenu.classList.toggle('active');
             mobileMenuToggle.classList.toggle('active');
@@ -340,15 +346,6 @@ document.addEventListener('DOMContentLoaded', function() {
     // Detect page type
     const path = window.location.pathname;
     const isHomePage = path.includes('index-variant-2.html') || path === '/' || path.endsWith('index.html');
-    const isPortfolioPage = path.includes('portfolio.html');
-    const isProjectPage = path.includes('/projects/');
-    const isCityPage = path.includes('/cities/');
-    const isSpacePage = path.includes('bathrooms.html') || path.includes('bedrooms.html') || 
-                       path.includes('kitchens.html') || path.includes('dining-rooms.html') ||
-                       path.includes('living-spaces.html') || path.includes('office-spaces.html') ||
-                       path.includes('kids-bedrooms.html') || path.includes('entryways.html') ||
-                       path.includes('bar-area.html') || path.includes('laundry-rooms.html') ||
-                       path.includes('outdoor-spaces.html');
     
     // Add body class for CSS targeting
     if (isHomePage) {
@@ -357,20 +354,9 @@ document.addEventListener('DOMContentLoaded', function() {
         document.body.classList.remove('home-page');
     }
     
-    // Internal pages (not home): dark navbar with white text
-    if (!isHomePage) {
-        navbar.classList.add('navbar-dark');
-    }
-    
-    // On portfolio, project, city, or space pages, always keep navbar visible (dark)
-    if (!isHomePage && (isPortfolioPage || isProjectPage || isCityPage || isSpacePage)) {
-        navbar.classList.add('navbar-dark');
-    }
-    
-    // Home page: ensure navbar-dark is removed
-    if (isHomePage) {
-        navbar.classList.remove('navbar-dark');
-    }
+    // The navbar is white on every page (rendered by standardize_nav.py), so its
+    // links keep their dark colour; navbar-dark would turn them white on white.
+    navbar.classList.remove('navbar-dark');
     
     window.addEventListener('scroll', function() {
         if (isHomePage) {
@@ -381,7 +367,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 navbar.classList.remove('scrolled');
             }
         }
-        // Internal pages: navbar stays dark, no change on scroll
+        // Internal pages: no change on scroll
     });
     
     // Smooth scroll for anchor links
@@ -459,6 +445,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+// @module contact-form
 // Form handling (for contact form)
 function handleFormSubmit(event) {
     event.preventDefault();
@@ -474,6 +461,7 @@ function handleFormSubmit(event) {
     return false;
 }
 
+// @module lazy-fallback
 // Image lazy loading fallback (for older browsers)
 if ('loading' in HTMLImageElement.prototype) {
     // Browser supports native lazy loading
@@ -488,6 +476,7 @@ if ('loading' in HTMLImageElement.prototype) {
     document.body.appendChild(script);
 }
 
+// @module page-widgets
 // Testimonial Carousel - Auto-rotate every 3 seconds
 document.addEventListener('DOMContentLoaded', function() {
     const testimonialSlides = document.querySelectorAll('.testimonial-slide');
@@ -573,6 +562,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+// @module review-expand
 // Review Click Expansion
 function expandReview(button) {
     const reviewText = button.closest('.review-text');
@@ -580,6 +570,7 @@ function expandReview(button) {
 }
 
 
+// @module smooth-scroll
 // ===================================
 // SMOOTH SCROLL FOR "VIEW OUR WORK" BUTTON
 // ===================================
@@ -600,6 +591,7 @@ document.querySelectorAll('.smooth-scroll').forEach(link => {
     });
 });
 
+// @module hero-carousel
 // ===================================
 // HERO IMAGE CAROUSEL - Auto Rotate
 // ===================================
@@ -625,6 +617,7 @@ if (carouselImages.length > 1) {
     setInterval(rotateHeroImages, 3000);
 }
 
+// @module scroll-animations
 // ===================================
 // SCROLL ANIMATIONS
 // ===================================
@@ -654,6 +647,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
 console.log('Hero carousel and scroll animations initialized');
 
+// @module sticky-consult
 // ===================================
 // STICKY CONSULTATION BUTTON
 // ===================================
@@ -669,6 +663,7 @@ window.addEventListener('scroll', () => {
     }
 });
 
+// @module exit-popup
 // ===================================
 // EXIT-INTENT POPUP
 // ===================================
@@ -759,6 +754,7 @@ if (exitPopupForm) {
 console.log('Conversion optimization features loaded');
 
 
+// @module parallax
 // ===================================
 // PARALLAX IMAGE EFFECT
 // ===================================
@@ -12,7 +12,17 @@
  * If the direct path 404s (Spaces only), we try:
  *   spaces/<space>/<H1>/<filename>
  *
+ * Placeholders – until the R2 image loads, an <img> shows its src if that is
+ * a data: URI (the blurred preview gallery_markup.py stamps), otherwise a
+ * transparent 1x1 GIF.
+ *
+ * Responsive variants – if the build stamped data-r2-srcset (local variant
+ * paths, see gallery_markup.py), each candidate is mapped the same way and
+ * set as srcset alongside the final src.
+ *
  * This avoids requiring any manifest.json (and avoids CORS fetch issues).
+ * When the build has the bucket manifest, r2_urls.py writes the final URLs
+ * into the HTML instead and marks those images data-r2-resolved.
  */
 
 (function () {
@@ -20,11 +30,14 @@
   const PLACEHOLDER_SRC =
     "data:image/gif;base64,R0lGODlhAQABAAD/ACwAAAAAAQABAAACADs=";
 
-  // Spaces and Projects
+  // Spaces and Projects. Images the build already pointed at R2 (data-r2-resolved,
+  // see r2_urls.py) are left alone; this script is only their fallback.
   const selector =
     'img[data-r2-local-src^="assets/images/spaces/"], img[src^="assets/images/spaces/"], ' +
     'img[data-r2-local-src^="assets/images/projects/"], img[src^="assets/images/projects/"]';
-  const imgs = Array.from(document.querySelectorAll(selector));
+  const imgs = Array.from(document.querySelectorAll(selector)).filter(
+    (img) => !img.hasAttribute("data-r2-resolved")
+  );
   if (!imgs.length) return;
 
   /** @returns {{ type: 'spaces'|'projects', key: string, name: string }|null} */
@@ -41,6 +54,24 @@
     return encodeURIComponent(name).replace(/%2F/g, "/");
   }
 
+  function toR2Url(localSrc) {
+    const parsed = parseLocalSrc(localSrc);
+    if (!parsed) return "";
+    return `${base}/${parsed.type}/${parsed.key}/${encodeName(parsed.name)}`;
+  }
+
+  /** Map a data-r2-srcset of local variant paths to R2 URLs ("" if any candidate can't be mapped). */
+  function toR2Srcset(localSrcset) {
+    const out = [];
+    for (const candidate of localSrcset.split(",")) {
+      const [path, descriptor] = candidate.trim().split(/\s+/);
+      const url = toR2Url(path || "");
+      if (!url) return "";
+      out.push(descriptor ? `${url} ${descriptor}` : url);
+    }
+    return out.join(", ");
+  }
+
   /**
    * Optional cache-busting suffix for R2 URLs.
    * Usage:
@@ -94,10 +125,13 @@
       return;
     }
 
-    img.setAttribute("src", PLACEHOLDER_SRC);
+    // Keep a stamped preview on screen until the final image replaces it.
+    if (!(img.getAttribute("src") || "").startsWith("data:")) {
+      img.setAttribute("src", PLACEHOLDER_SRC);
+    }
   });
 
-  function setFinalSrc(img, url) {
+  function setFinalSrc(img, url, withSrcset = true) {
     if (!url) return;
     // Only mark as final once we've successfully loaded.
     // This prevents masonry from permanently hiding tiles while we're still iterating on mapping.
@@ -111,6 +145,13 @@
     img.addEventListener(
       "error",
       () => {
+        // A missing variant shouldn't block the original: retry without srcset first.
+        if (img.hasAttribute("srcset")) {
+          img.removeAttribute("srcset");
+          setFinalSrc(img, url, false);
+          return;
+        }
+
         // If R2 fails, optionally try one nested folder based on the page H1 (Spaces only)
         // e.g. spaces/bedrooms/Bedrooms/bedrooms-1.jpg
         const space = img.dataset.r2Space || "";
@@ -143,6 +184,9 @@
       },
       { once: true }
     );
+    const localSrcset = withSrcset ? img.getAttribute("data-r2-srcset") : "";
+    const srcset = localSrcset ? toR2Srcset(localSrcset) : "";
+    if (srcset) img.setAttribute("srcset", srcset);
     img.setAttribute("src", url);
   }
 
@@ -3,6 +3,9 @@
  * - 3 columns on desktop (>=1200px), 2 columns tablet, 1 column mobile (<=768px)
  * - Relayouts on image load/error and on resize
  * - Hides broken images and reflows to avoid gaps
+ * - Uses the build-time layout (data-masonry-ar / data-masonry-cols, see
+ *   gallery_markup.py) when every tile has it: tile heights come from the
+ *   aspect ratio, so nothing is measured. Tiles without it are measured live.
  */
 
 (function () {
@@ -49,6 +52,21 @@
     }
   }
 
+  function tileRatio(item) {
+    const ratio = parseFloat(item.dataset.masonryAr);
+    return ratio > 0 ? ratio : 0;
+  }
+
+  function precomputedColumns(grid, items, columns) {
+    // Only valid when every tile is present and stamped; a hidden tile shifts the packing.
+    if (items.length !== grid.children.length) return null;
+    const placement = items.map((item) => {
+      const cols = (item.dataset.masonryCols || "").split(",");
+      return cols.length === 3 ? parseInt(cols[columns - 1], 10) : NaN;
+    });
+    return placement.every((col) => col >= 0 && col < columns) ? placement : null;
+  }
+
   function layoutGrid(grid) {
     if (!grid) return;
 
@@ -68,21 +86,24 @@
     );
 
     const columnHeights = new Array(columns).fill(0);
+    const placement = precomputedColumns(grid, items, columns);
 
-    items.forEach((item) => {
+    items.forEach((item, i) => {
       prepareItem(item, columnWidth);
 
-      const shortestColumnIndex = columnHeights.indexOf(Math.min(...columnHeights));
-      const left = shortestColumnIndex * (columnWidth + GAP);
-      const top = columnHeights[shortestColumnIndex];
+      const column = placement ? placement[i] : columnHeights.indexOf(Math.min(...columnHeights));
+      const left = column * (columnWidth + GAP);
+      const top = columnHeights[column];
 
       item.style.left = left + "px";
       item.style.top = top + "px";
 
-      // Measure after positioning; fall back to a reasonable estimate.
-      const measured = item.offsetHeight || 0;
+      // Known aspect ratio: no measurement. Otherwise measure after positioning,
+      // falling back to a reasonable estimate.
+      const ratio = tileRatio(item);
+      const measured = ratio ? columnWidth * ratio : item.offsetHeight || 0;
       const height = measured > 0 ? measured : 300;
-      columnHeights[shortestColumnIndex] += height + GAP;
+      columnHeights[column] += height + GAP;
     });
 
     grid.style.height = (Math.max(...columnHeights) || 0) + "px";
@@ -125,6 +146,10 @@
         { once: true }
       );
 
+      // Tiles with a build-time aspect ratio are already the right height.
+      const tile = img.closest(".parallax-image") || img.parentElement;
+      if (tile && tile.dataset && tileRatio(tile)) return;
+
       img.addEventListener(
         "load",
         () => {
@@ -1,14 +1,9 @@
 import os
-import hashlib
-from pathlib import Path
 
-PROJECTS_DIR = "assets/images/projects"
+from image_index import ImageIndex
+from image_quality import rejects, scores
 
-def get_file_hash(filepath):
-    if not os.path.exists(filepath):
-        return None
-    with open(filepath, 'rb') as f:
-        return hashlib.md5(f.read()).hexdigest()
+PROJECTS_DIR = "assets/images/projects"
 
 def audit_counts():
     print(f"Auditing unique high-res images in {PROJECTS_DIR}...\n")
@@ -21,6 +16,9 @@ def audit_counts():
     projects.sort()
     
     incomplete_projects = []
+    index = ImageIndex()
+    index.update([PROJECTS_DIR])
+    quality = scores([PROJECTS_DIR])
 
     for project in projects:
         project_path = os.path.join(PROJECTS_DIR, project)
@@ -33,14 +31,15 @@ def audit_counts():
             img_name = f"{project}-{i}.jpg"
             img_path = os.path.join(project_path, img_name)
             
-            if not os.path.exists(img_path):
+            entry = index.get(img_path)
+            if entry is None:
                 continue
                 
-            size_kb = os.path.getsize(img_path) / 1024
-            file_hash = get_file_hash(img_path)
+            file_hash = entry['sha256']
             
-            # Criteria: > 100KB and Unique Content
-            if size_kb >= 100:
+            # Criteria: passes the quality gate (image_quality.py) and Unique Content
+            scored = quality.get(img_path)
+            if scored and not rejects(scored):
                 if file_hash not in hashes:
                     hashes.add(file_hash)
                     valid_images.append(img_name)
@@ -52,6 +51,8 @@ def audit_counts():
             print(f"  Unique High-Res Count: {count}/6")
             print("-" * 20)
 
+    index.save()
+
     print("\nSUMMARY (Projects with < 6 unique high-res images):")
     if not incomplete_projects:
         print("None! All projects have 6 unique high-res images.")
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Build minified script bundles, one per set of scripts a page family loads, with source maps.
+
+Pages load up to five separate, unminified scripts (r2-config.js,
+r2-images.js, spaces-masonry.js, load-navbar.js, main.js), and main.js
+wires up features most pages don't have (exit popup, hero rotation, review
+expanders, ...). Pages of a family that load the same scripts share a
+bundle; for each such group this writes
+
+  assets/js/bundles/<family>-<hash>.js       minified bundle
+  assets/js/bundles/<family>-<hash>.js.map   source map back to assets/js/*.js
+
+containing exactly the scripts those pages include, in the order they
+execute (plain scripts in document order, then deferred ones); <hash> is
+derived from that list, so a page never gets a script it didn't load (some
+project pages don't load r2-images.js, for instance). main.js goes in per
+section: it is split at its "// @module <name>" comments, and a section is
+only included if some page of the group has one of the markers listed in
+MAIN_MODULES (a .class, an #id, or text such as a function name used in an
+onclick). Bundles no group needs any more are deleted.
+
+Minification is conservative: comments, indentation, blank lines and
+whitespace between tokens are removed, and line breaks are kept, so
+automatic semicolon insertion behaves exactly as in the source. Each output
+line maps back to its source line. When node is installed every bundle is
+syntax-checked with `node --check`.
+
+The report compares each bundle's gzipped size with its family's BUDGETS
+entry and exits non-zero when one is over. The `js-bundles` pass (opt-in)
+replaces a page's bundled <script> tags with a single deferred tag for the
+bundle of its family and script list.
+
+Usage:
+  python3 bundle_js.py
+  python3 site_transforms.py --only js-bundles
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from html.parser import HTMLParser
+
+from site_build import write_if_changed
+from site_transforms import DOCS_DIR, Page, iter_html_files, page_family, register_pass
+
+JS_DIR = "assets/js"
+OUT_DIR = "assets/js/bundles"
+
+# Scripts that may go into bundles; anything else (shared/, external) is left alone.
+BUNDLED = ["r2-config.js", "r2-images.js", "spaces-masonry.js", "load-navbar.js", "main.js"]
+
+# main.js sections: None = always included, () = never (dead code), else any marker present.
+MAIN_MODULES: dict[str, tuple[str, ...] | None] = {
+    "spa-nav": (),
+    "site": None,
+    "contact-form": ("handleFormSubmit",),
+    "lazy-fallback": None,
+    "page-widgets": None,
+    "review-expand": (".review-text", "expandReview"),
+    "smooth-scroll": (".smooth-scroll",),
+    "hero-carousel": (".hero-carousel-img",),
+    "scroll-animations": None,
+    "sticky-consult": ("#stickyConsultBtn",),
+    "exit-popup": ("#exitPopup",),
+    "parallax": (".parallax-container",),
+}
+MODULE_RE = re.compile(r"^// @module ([\w-]+)\s*$", re.M)
+
+# Gzipped bytes per bundle.
+BUDGETS = {"home": 6_000, "space": 8_000, "project": 8_000, "city": 5_000, "portfolio": 5_000, "other": 6_000}
+
+BUNDLE_REF_RE = re.compile(rf"""{re.escape(OUT_DIR)}/([\w-]+)\.js\b""")
+SCRIPT_TAG_RE = re.compile(r"""[ \t]*<script\b[^>]*\bsrc=(["'])([^"']+)\1[^>]*>\s*</script>[ \t]*\n?""", re.I)
+
+
+# ---------------------------------------------------------------------------
+# Minifier
+# ---------------------------------------------------------------------------
+
+IDENT = re.compile(r"[\w$\u0080-￿]")
+REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield"}
+
+
+def _is_ident(ch: str) -> bool:
+    return bool(ch) and IDENT.match(ch) is not None
+
+
+def minify(source: str, first_line: int = 0) -> list[tuple[str, int, int]]:
+    """
+    Strip comments and redundant whitespace. Returns output lines as
+    (text, source line, source column), 0-based, for the source map.
+    """
+    lines: list[tuple[str, int, int]] = []
+    out: list[str] = []
+    origin: tuple[int, int] | None = None
+    line, col = first_line, 0
+    pending_space = False
+    stack: list[int] = []  # brace depth inside each open ${...}
+    i, n = 0, len(source)
+
+    def emit(text: str, at_line: int, at_col: int) -> None:
+        nonlocal origin, pending_space
+        if pending_space and out:
+            prev, nxt = out[-1][-1], text[0]
+            if (_is_ident(prev) and _is_ident(nxt)) or (prev in "+-" and nxt in "+-"):
+                out.append(" ")
+        pending_space = False
+        if origin is None:
+            origin = (at_line, at_col)
+        out.append(text)
+
+    def newline() -> None:
+        nonlocal out, origin, pending_space
+        if out:
+            lines.append(("".join(out), origin[0], origin[1]))
+        out, origin, pending_space = [], None, False
+
+    def last_significant() -> str:
+        for part in reversed(out):
+            stripped = part.rstrip()
+            if stripped:
+                return stripped
+        return lines[-1][0] if lines else ""
+
+    def read_template(start: int) -> int:
+        """Copy template text from source[start] (after ` or }) up to ` or ${; returns the index after it."""
+        nonlocal line, col
+        j = start
+        while j < n:
+            ch = source[j]
+            if ch == "\\":
+                j += 2
+                continue
+            if ch == "`":
+                j += 1
+                break
+            if ch == "$" and j + 1 < n and source[j + 1] == "{":
+                j += 2
+                stack.append(0)
+                break
+            j += 1
+        # Template text may span lines; keep it byte for byte.
+        chunk = source[start:j]
+        parts = chunk.split("\n")
+        for k, part in enumerate(parts):
+            if k:
+                newline()
+                line += 1
+                col = 0
+            if part:
+                emit(part, line, col)
+            col += len(part)
+        return j
+
+    while i < n:
+        ch = source[i]
+        nxt = source[i + 1] if i + 1 < n else ""
+        if ch == "\n":
+            newline()
+            line, col = line + 1, 0
+            i += 1
+            continue
+        if ch in " \t\r":
+            pending_space = True
+            i += 1
+            col += 1
+            continue
+        if ch == "/" and nxt == "/":
+            end = source.find("\n", i)
+            end = n if end == -1 else end
+            col += end - i
+            i = end
+            continue
+        if ch == "/" and nxt == "*":
+            end = source.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            comment = source[i:end]
+            if "\n" in comment:
+                newline()
+                line += comment.count("\n")
+                col = len(comment) - comment.rfind("\n") - 1
+            else:
+                pending_space = True
+                col += len(comment)
+            i = end
+            continue
+        if ch in "'\"":
+            j = i + 1
+            while j < n and source[j] != ch:
+                j += 2 if source[j] == "\\" else 1
+            emit(source[i:j + 1], line, col)
+            col += j + 1 - i
+            i = j + 1
+            continue
+        if ch == "`":
+            emit("`", line, col)
+            col += 1
+            i = read_template(i + 1)
+            continue
+        if ch == "/":
+            prev = last_significant()
+            word = re.search(r"[\w$]+$", prev)
+            if not prev or prev[-1] in REGEX_PREFIX or (word and word.group(0) in REGEX_KEYWORDS):
+                j, in_class = i + 1, False
+                while j < n and source[j] != "\n":
+                    c = source[j]
+                    if c == "\\":
+                        j += 2
+                        continue
+                    if c == "[":
+                        in_class = True
+                    elif c == "]":
+                        in_class = False
+                    elif c == "/" and not in_class:
+                        break
+                    j += 1
+                j += 1
+                while j < n and _is_ident(source[j]):
+                    j += 1
+                emit(source[i:j], line, col)
+                col += j - i
+                i = j
+                continue
+        if stack:
+            if ch == "{":
+                stack[-1] += 1
+            elif ch == "}":
+                if stack[-1] == 0:
+                    stack.pop()
+                    emit("}", line, col)
+                    col += 1
+                    i = read_template(i + 1)
+                    continue
+                stack[-1] -= 1
+        emit(ch, line, col)
+        col += 1
+        i += 1
+    newline()
+    return lines
+
+
+# ---------------------------------------------------------------------------
+# Source maps
+# ---------------------------------------------------------------------------
+
+B64 = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+
+def vlq(value: int) -> str:
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    out = ""
+    while True:
+        digit = value & 31
+        value >>= 5
+        out += B64[digit | (32 if value else 0)]
+        if not value:
+            return out
+
+
+def source_map(name: str, sources: list[str], segments: list[tuple[int, int, int]]) -> str:
+    """segments: one (source index, source line, source column) per output line."""
+    mappings = []
+    prev_src = prev_line = prev_col = 0
+    for src, src_line, src_col in segments:
+        mappings.append(vlq(0) + vlq(src - prev_src) + vlq(src_line - prev_line) + vlq(src_col - prev_col))
+        prev_src, prev_line, prev_col = src, src_line, src_col
+    return json.dumps({"version": 3, "file": name, "sources": sources, "names": [],
+                       "mappings": ";".join(mappings)}) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# What each family needs
+# ---------------------------------------------------------------------------
+
+class ScriptCollector(HTMLParser):
+    """Local scripts of a page in execution order, plus its classes and ids."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.plain: list[str] = []
+        self.deferred: list[str] = []
+        self.tokens: set[str] = set()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        self.tokens.update("." + c for c in (attrs.get("class") or "").split())
+        if attrs.get("id"):
+            self.tokens.add("#" + attrs["id"])
+        if tag == "script" and attrs.get("src"):
+            name = bundled_name(attrs["src"])
+            if name:
+                (self.deferred if "defer" in attrs or "async" in attrs else self.plain).append(name)
+
+
+def bundled_name(src: str) -> str | None:
+    """main.js for ../assets/js/main.js?v=3; None for scripts that aren't bundled."""
+    path = src.split("#", 1)[0].split("?", 1)[0]
+    if path.startswith(("http:", "https:", "//")):
+        return None
+    parts = path.split("/")
+    if len(parts) >= 3 and parts[-3:-1] == ["assets", "js"] and parts[-1] in BUNDLED:
+        return parts[-1]
+    return None
+
+
+def collect(text: str) -> ScriptCollector:
+    collector = ScriptCollector()
+    collector.feed(text)
+    collector.close()
+    return collector
+
+
+def page_scripts(collector: ScriptCollector) -> list[str]:
+    """Bundled scripts a page loads, in execution order, each once."""
+    return list(dict.fromkeys(collector.plain + collector.deferred))
+
+
+def bundle_name(family: str, scripts: list[str]) -> str:
+    return f"{family}-{hashlib.sha1(','.join(scripts).encode()).hexdigest()[:8]}"
+
+
+def bundle_usage() -> dict[str, dict]:
+    """Bundle name -> {"family", "scripts": ordered names, "pages", "tokens", "text"} over its pages."""
+    bundles: dict[str, dict] = {}
+    for path in iter_html_files():
+        rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        collector = collect(text)
+        scripts = page_scripts(collector)
+        if not scripts:
+            continue
+        family = page_family(rel)
+        usage = bundles.setdefault(bundle_name(family, scripts), {
+            "family": family, "scripts": scripts, "pages": [], "tokens": set(), "text": []})
+        usage["pages"].append(rel)
+        usage["tokens"] |= collector.tokens
+        usage["text"].append(text)
+    return bundles
+
+
+def main_sections() -> list[tuple[str, str, int]]:
+    """main.js as (module, text, first line) sections; text before the first marker is "prelude"."""
+    with open(os.path.join(DOCS_DIR, JS_DIR, "main.js"), "r", encoding="utf-8") as f:
+        source = f.read()
+    sections = []
+    starts = [(0, "prelude")] + [(m.start(), m.group(1)) for m in MODULE_RE.finditer(source)]
+    for k, (start, name) in enumerate(starts):
+        end = starts[k + 1][0] if k + 1 < len(starts) else len(source)
+        sections.append((name, source[start:end], source.count("\n", 0, start)))
+    return sections
+
+
+def module_needed(name: str, usage: dict) -> bool:
+    if name == "prelude":
+        return True
+    if name not in MAIN_MODULES:
+        return True  # unknown sections are kept
+    markers = MAIN_MODULES[name]
+    if markers is None:
+        return True
+    for marker in markers:
+        if marker[0] in ".#" and marker in usage["tokens"]:
+            return True
+        if marker[0] not in ".#" and any(marker in text for text in usage["text"]):
+            return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+
+def bundle_path(name: str) -> str:
+    return f"{OUT_DIR}/{name}.js"
+
+
+def referenced_bundles() -> set[str]:
+    """Bundles that pages already load (after the js-bundles pass their scripts aren't listed any more)."""
+    found: set[str] = set()
+    for path in iter_html_files():
+        with open(path, "r", encoding="utf-8") as f:
+            found.update(BUNDLE_REF_RE.findall(f.read()))
+    return found
+
+
+def build(verbose: bool = True) -> int:
+    """Write every bundle and map, delete unused ones. Returns the number of bundles over budget."""
+    node = shutil.which("node")
+    over = 0
+    rows = []
+    bundles = bundle_usage()
+    for bundle, usage in sorted(bundles.items()):
+        family = usage["family"]
+        sources: list[str] = []
+        out_lines: list[str] = []
+        segments: list[tuple[int, int, int]] = []
+        raw = 0
+        included: list[str] = []
+
+        for name in usage["scripts"]:
+            path = os.path.join(DOCS_DIR, JS_DIR, name)
+            if name == "main.js":
+                parts = [(s, text, first) for s, text, first in main_sections() if module_needed(s, usage)]
+                included += [f"main:{s}" for s, _, _ in parts if s != "prelude"]
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    parts = [(name, f.read(), 0)]
+                included.append(name)
+            sources.append(os.path.relpath(path, os.path.join(DOCS_DIR, OUT_DIR)).replace(os.sep, "/"))
+            for _, text, first_line in parts:
+                raw += len(text.encode("utf-8"))
+                for line_text, src_line, src_col in minify(text, first_line):
+                    out_lines.append(line_text)
+                    segments.append((len(sources) - 1, src_line, src_col))
+            # Keep files from running into each other (a missing final semicolon).
+            out_lines.append(";")
+            segments.append(segments[-1])
+
+        name = os.path.basename(bundle_path(bundle))
+        js = "\n".join(out_lines) + f"\n//# sourceMappingURL={name}.map\n"
+        write_if_changed(os.path.join(DOCS_DIR, bundle_path(bundle)), js)
+        write_if_changed(os.path.join(DOCS_DIR, bundle_path(bundle) + ".map"), source_map(name, sources, segments))
+
+        if node:
+            check = subprocess.run([node, "--check", os.path.join(DOCS_DIR, bundle_path(bundle))],
+                                   capture_output=True, text=True)
+            if check.returncode != 0:
+                raise SystemExit(f"{bundle_path(bundle)} does not parse:\n{check.stderr}")
+
+        size = len(js.encode("utf-8"))
+        gz = len(gzip.compress(js.encode("utf-8"), 9))
+        budget = BUDGETS.get(family)
+        status = "ok" if budget is None or gz <= budget else "OVER"
+        over += status == "OVER"
+        rows.append((bundle, len(usage["pages"]), raw, size, gz, budget, status, included))
+
+    out_dir = os.path.join(DOCS_DIR, OUT_DIR)
+    keep = set(bundles) | referenced_bundles()
+    for stale in sorted(os.listdir(out_dir)) if os.path.isdir(out_dir) else []:
+        if stale.endswith((".js", ".js.map")) and stale.split(".js", 1)[0] not in keep:
+            os.remove(os.path.join(out_dir, stale))
+            if verbose:
+                print(f"Removed unused {OUT_DIR}/{stale}")
+
+    if verbose:
+        print(f"{'bundle':<20} {'pages':>5} {'source':>8} {'minified':>9} {'gzip':>7} {'budget':>7}")
+        for bundle, pages, raw, size, gz, budget, status, included in rows:
+            budget_text = f"{budget:,}" if budget else "-"
+            print(f"{bundle:<20} {pages:>5} {raw:>8,} {size:>9,} {gz:>7,} {budget_text:>7}  {status}")
+            print(f"{'':<27}{', '.join(included)}")
+        print(f"\nBundles in {OUT_DIR}" + ("" if node else " (node not found: syntax not checked)"))
+    return over
+
+
+def use_bundle_html(text: str, rel: str, family: str) -> str:
+    """Replace the page's bundled script tags with one deferred tag for the bundle of exactly those scripts."""
+    scripts = page_scripts(collect(text))
+    if not scripts:
+        return text
+    bundle = bundle_name(family, scripts)
+    # Not built yet (or the page's scripts changed since): leave the page alone.
+    if not os.path.isfile(os.path.join(DOCS_DIR, bundle_path(bundle))):
+        return text
+    prefix = "../" * rel.count("/")
+    tag = f'<script defer src="{prefix}{bundle_path(bundle)}"></script>\n'
+    out, pos, placed = [], 0, tag in text
+    for m in SCRIPT_TAG_RE.finditer(text):
+        if not bundled_name(m.group(2)):
+            continue
+        out.append(text[pos:m.start()])
+        if not placed:
+            indent = m.group(0)[:len(m.group(0)) - len(m.group(0).lstrip(" \t"))]
+            out.append(indent + tag)
+            placed = True
+        pos = m.end()
+    out.append(text[pos:])
+    return "".join(out)
+
+
+@register_pass("js-bundles", kind="text", default=False)
+def js_bundles(page: Page) -> bool:
+    """Load the page family's script bundle instead of the individual scripts."""
+    new = use_bundle_html(page.text, page.rel, page.family)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def main() -> int:
+    argparse.ArgumentParser(description="Build minified per-family script bundles").parse_args()
+    return 1 if build() else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
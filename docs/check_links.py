@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Check every link and asset reference on every page.
+
+Pages are parsed in a process pool with a streaming HTMLParser (no tree is
+built). Each page yields its outgoing references (href, src, srcset,
+data-r2-local-src/data-r2-srcset, url() in style attributes and <style>
+blocks) and the ids it defines. Those per-page results are cached in
+.build/link-check-cache.json by content hash, so after editing one page only
+that page is parsed again; the existence checks themselves are plain stats.
+
+References resolve the way load-navbar.js's getPath did:
+- "page.html", "../assets/x.css": relative to the page's folder,
+- "/<base>/page.html", "/page.html": from the site root (an optional
+  GitHub Pages project prefix such as /jacinteriors is dropped),
+- data-r2-local-src / data-r2-srcset: from the site root, whatever the depth
+  (see r2-images.js); if the file isn't in the tree it is looked up in the R2
+  manifest from r2_sync.py instead,
+- "#id" / "page.html#id": the id must exist on the target page.
+
+All pages and their links form a graph, written to .build/link-graph.json;
+pages no other page links to are listed as orphans.
+
+Usage:
+  python3 check_links.py
+  python3 check_links.py --jobs 8 --orphans
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from site_build import BUILD_DIR, DOCS_DIR
+from site_transforms import iter_html_files
+
+CACHE_FILE = os.path.join(BUILD_DIR, "link-check-cache.json")
+GRAPH_FILE = os.path.join(BUILD_DIR, "link-graph.json")
+R2_MANIFEST = os.path.join(BUILD_DIR, "r2-manifest.json")
+CACHE_VERSION = 1
+
+# GitHub Pages project prefixes that root-absolute links may carry.
+BASE_PATHS = ("/jacinteriors/",)
+R2_PREFIXES = {"assets/images/spaces/": "spaces/", "assets/images/projects/": "projects/"}
+
+URL_ATTRS = {"href", "src", "poster", "action"}
+SRCSET_ATTRS = {"srcset", "data-r2-srcset"}
+# Paths that scripts load later (lazy images, R2 fallbacks).
+LOCAL_PATH_ATTRS = {"data-src", "data-r2-local-src"}
+# data-r2-* paths are relative to the site root, whatever the page depth (see r2-images.js).
+ROOT_RELATIVE_ATTRS = {"data-r2-local-src", "data-r2-srcset"}
+SKIP_SCHEMES = ("http:", "https:", "//", "mailto:", "tel:", "javascript:", "data:", "sms:")
+URL_RE = re.compile(r"""url\(\s*["']?([^"')]+?)["']?\s*\)""")
+
+
+class RefCollector(HTMLParser):
+    """Streams through a page collecting (attr, value, line) references and defined ids."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.refs: list[tuple[str, str, int]] = []
+        self.ids: set[str] = set()
+        self._in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        line = self.getpos()[0]
+        for name, value in attrs:
+            if value is None:
+                continue
+            if name in ("id", "name") and (name == "id" or tag == "a"):
+                self.ids.add(value)
+            if name in SRCSET_ATTRS:
+                for candidate in value.split(","):
+                    parts = candidate.split()
+                    if parts:
+                        self.refs.append((name, parts[0], line))
+            elif name in URL_ATTRS or name in LOCAL_PATH_ATTRS:
+                self.refs.append((name, value.strip(), line))
+            elif name == "style":
+                self.refs.extend(("style", u.strip(), line) for u in URL_RE.findall(value))
+        if tag == "style":
+            self._in_style = True
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag):
+        if tag == "style":
+            self._in_style = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            line = self.getpos()[0]
+            self.refs.extend(("style", u.strip(), line) for u in URL_RE.findall(data))
+
+
+def resolve(page_rel: str, attr: str, ref: str) -> tuple[str, str] | None:
+    """(docs-relative target path, fragment) for a local reference, or None if external/empty."""
+    if not ref or ref.startswith(SKIP_SCHEMES) or "${" in ref:
+        return None
+    path, _, fragment = ref.partition("#")
+    path = unquote(path.split("?", 1)[0])
+    if not path:
+        return page_rel, fragment  # same-page anchor
+    if path.startswith("/"):
+        for base in BASE_PATHS:
+            if path.startswith(base):
+                path = path[len(base) - 1:]
+                break
+        target = path.lstrip("/")
+    elif attr in ROOT_RELATIVE_ATTRS:
+        target = path
+    else:
+        target = os.path.join(os.path.dirname(page_rel), path)
+    target = os.path.normpath(target).replace(os.sep, "/")
+    if target.endswith("/") or target == ".":
+        target = (target.rstrip("/") + "/index.html").lstrip("./") or "index.html"
+    elif os.path.isdir(os.path.join(DOCS_DIR, target)):
+        target += "/index.html"
+    return target, fragment
+
+
+def scan_page(rel_path: str) -> dict:
+    """Worker: parse one page into its references and ids."""
+    with open(os.path.join(DOCS_DIR, rel_path), "rb") as f:
+        data = f.read()
+    parser = RefCollector()
+    parser.feed(data.decode("utf-8", errors="replace"))
+    parser.close()
+    refs = []
+    for attr, value, line in parser.refs:
+        resolved = resolve(rel_path, attr, value)
+        if resolved:
+            refs.append([attr, value, line, resolved[0], resolved[1]])
+    return {"hash": hashlib.sha256(data).hexdigest(), "refs": refs, "ids": sorted(parser.ids)}
+
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache.get("pages", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def load_r2_keys() -> set[str] | None:
+    try:
+        with open(R2_MANIFEST, "r", encoding="utf-8") as f:
+            return set(json.load(f)["objects"])
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def r2_key(target: str) -> str | None:
+    for local, remote in R2_PREFIXES.items():
+        if target.startswith(local):
+            return remote + target[len(local):]
+    return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check every local link and asset reference")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--orphans", action="store_true", help="List pages nothing links to")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pages = [os.path.relpath(p, DOCS_DIR).replace(os.sep, "/") for p in iter_html_files()]
+    cache = load_cache()
+
+    stale = []
+    for rel in pages:
+        entry = cache.get(rel)
+        if entry:
+            with open(os.path.join(DOCS_DIR, rel), "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() == entry["hash"]:
+                    continue
+        stale.append(rel)
+
+    if stale:
+        if len(stale) > 4 and args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                results = list(pool.map(scan_page, stale, chunksize=8))
+        else:
+            results = [scan_page(rel) for rel in stale]
+        cache.update(zip(stale, results))
+    cache = {rel: cache[rel] for rel in pages}
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    with open(CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "pages": cache}, f, separators=(",", ":"))
+
+    # Global pass: existence, anchors and the link graph.
+    r2_keys = load_r2_keys()
+    exists: dict[str, bool] = {}
+    graph: dict[str, list[str]] = {}
+    inbound: dict[str, int] = {rel: 0 for rel in pages}
+    broken: dict[str, list[str]] = {}
+    unverified_r2 = 0
+    checked = 0
+
+    for rel in pages:
+        links: set[str] = set()
+        for attr, value, line, target, fragment in cache[rel]["refs"]:
+            checked += 1
+            if target not in exists:
+                exists[target] = os.path.isfile(os.path.join(DOCS_DIR, target))
+            problem = None
+            if not exists[target]:
+                key = r2_key(target)
+                if key is None:
+                    problem = "missing file"
+                elif r2_keys is None:
+                    unverified_r2 += 1
+                elif key not in r2_keys:
+                    problem = "missing locally and on R2"
+            elif fragment and target.endswith(".html") and target in cache and \
+                    fragment not in cache[target]["ids"]:
+                problem = f"no #{fragment} on {target}"
+            if problem:
+                broken.setdefault(rel, []).append(f"line {line}: {attr}=\"{value}\" ({problem})")
+            if target.endswith(".html") and target != rel:
+                links.add(target)
+                if target in inbound:
+                    inbound[target] += 1
+        graph[rel] = sorted(links)
+
+    with open(GRAPH_FILE, "w", encoding="utf-8") as f:
+        json.dump(graph, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+    for rel, problems in sorted(broken.items()):
+        print(f"✗ {rel}")
+        for problem in problems:
+            print(f"    {problem}")
+
+    orphans = sorted(rel for rel, count in inbound.items() if count == 0)
+    if args.orphans:
+        print("\nOrphan pages (no inbound links):")
+        for rel in orphans:
+            print(f"  {rel}")
+
+    print(f"\n{'=' * 60}")
+    print(f"{len(pages)} pages ({len(stale)} parsed, {len(pages) - len(stale)} cached), "
+          f"{checked} references, {sum(len(p) for p in broken.values())} broken on {len(broken)} pages, "
+          f"{len(orphans)} orphans")
+    if unverified_r2:
+        print(f"{unverified_r2} R2 image references not verified (run r2_sync.py to get its manifest)")
+    print(f"Link graph: {os.path.relpath(GRAPH_FILE, DOCS_DIR)} ({time.perf_counter() - started:.3f}s)")
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
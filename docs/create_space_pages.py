@@ -4,6 +4,10 @@ Create space pages using the same design as project pages.
 """
 
 import os
+import sys
+
+import gallery_markup
+from site_build import IncrementalBuild
 
 # Space pages to create
 SPACES = [
@@ -405,18 +409,25 @@ TEMPLATE = '''<!DOCTYPE html>
 </html>'''
 
 def main():
-    docs_dir = '/Users/mark/Desktop/JAC web design/jac-website-custom/docs'
+    docs_dir = os.path.dirname(os.path.abspath(__file__))
+    force = '--force' in sys.argv[1:]
     
-    for space in SPACES:
-        filepath = os.path.join(docs_dir, space['filename'])
-        content = TEMPLATE.format(**space)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        print(f"✓ Created {space['filename']}")
+    with IncrementalBuild(force=force) as build:
+        for space in SPACES:
+            filepath = os.path.join(docs_dir, space['filename'])
+            folder = space['folder']
+            
+            build.page(
+                filepath,
+                lambda: gallery_markup.stamp_html(TEMPLATE.format(**space), space['filename']),
+                template=TEMPLATE,
+                record=space,
+                images=[f"assets/images/spaces/{folder}/{folder}-{i}.jpg" for i in range(1, 7)],
+                # Gallery <img> dimensions/srcset come from the image manifest.
+                assets=['assets/css/style.css', 'assets/js/main.js', '.build/image-variants.json'],
+            )
     
-    print(f"\nCreated {len(SPACES)} space pages")
+    print(f"\n{len(SPACES)} space pages up to date")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Inline above-the-fold CSS per page family and load the stylesheets async.
+
+For each family (home, space, project, city, portfolio) the critical CSS is
+the set of rules from the page's local stylesheets (style.css,
+spaces-masonry.css, ...) that can style something above the fold on at
+least one page of that family. "Above the fold" is the navbar plus the first
+FOLD_BLOCKS content blocks after it: the headline and hero on the home page,
+the header and first gallery rows on space/project pages, and so on.
+@keyframes used by those rules come along, and url()s are rebased from the
+stylesheet's folder to the page's.
+
+The `critical-css` pass (opt-in) then, on every page of those families:
+- puts that CSS in <style data-critical="<family>"> before the first
+  stylesheet link, keeping only rules from sheets the page actually links,
+- turns each local <link rel="stylesheet"> into a preload that switches
+  itself to a stylesheet on load, with a <noscript> fallback.
+
+Re-running it replaces the previous block, so after editing a stylesheet or
+a template just run it again. --verify checks every page's inlined block
+against the rules its own fold needs and lists what is missing (stale).
+
+Usage:
+  python3 critical_css.py             # report sizes per family
+  python3 critical_css.py --apply     # same as: site_transforms.py --only critical-css
+  python3 critical_css.py --verify
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import os
+import re
+import sys
+
+from bs4 import BeautifulSoup
+
+from css_rules import Rule, document_tokens, parse_css, rule_applies, serialize, with_keyframes
+from site_transforms import DOCS_DIR, Page, iter_html_files, page_family, register_pass
+
+FAMILIES = ("home", "space", "project", "city", "portfolio")
+FOLD_BLOCKS = 2
+NAV_CLASSES = {"navbar", "navbar-spacer"}
+
+LINK_RE = re.compile(r"<link\b[^>]*>", re.I)
+ATTR_RE = re.compile(r"""([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+CRITICAL_RE = re.compile(r"<style data-critical=\"[\w-]*\">.*?</style>\n?", re.S)
+ASYNC_RE = re.compile(r'<link rel="preload" href="([^"]*)" as="style" data-critical-async [^>]*>'
+                      r'<noscript><link rel="stylesheet" href="[^"]*"></noscript>')
+URL_RE = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+
+
+def parse_attrs(tag: str) -> dict[str, str]:
+    attrs: dict[str, str] = {}
+    for m in ATTR_RE.finditer(tag[len("<link"):].rstrip("/>")):
+        attrs[m.group(1).lower()] = html.unescape(next((g for g in m.groups()[1:] if g is not None), ""))
+    return attrs
+
+
+def is_local(href: str) -> bool:
+    return bool(href) and not href.startswith(("http:", "https:", "//", "data:"))
+
+
+def restore_links(text: str) -> str:
+    """Undo a previous run: plain stylesheet links, no inlined block."""
+    text = CRITICAL_RE.sub("", text)
+    return ASYNC_RE.sub(lambda m: f'<link rel="stylesheet" href="{m.group(1)}">', text)
+
+
+def stylesheet_links(text: str) -> list[tuple[re.Match, str]]:
+    """(tag match, href) for each local render-blocking stylesheet link."""
+    links = []
+    for m in LINK_RE.finditer(text):
+        attrs = parse_attrs(m.group(0))
+        if "stylesheet" in attrs.get("rel", "").lower().split() and is_local(attrs.get("href", "")):
+            links.append((m, attrs["href"]))
+    return links
+
+
+def sheet_path(page_rel: str, href: str) -> str:
+    href = href.split("#", 1)[0].split("?", 1)[0]
+    return os.path.normpath(os.path.join(os.path.dirname(page_rel), href)).replace(os.sep, "/")
+
+
+_rules: dict[str, list[Rule]] = {}
+
+
+def sheet_rules(rel: str) -> list[Rule]:
+    if rel not in _rules:
+        try:
+            with open(os.path.join(DOCS_DIR, rel), "r", encoding="utf-8") as f:
+                _rules[rel] = parse_css(f.read())
+        except FileNotFoundError:
+            _rules[rel] = []
+    return _rules[rel]
+
+
+def body_blocks(soup: BeautifulSoup):
+    """Yield (block, "nav" | "above" | "below") for the visible top-level blocks of <body>."""
+    if soup.body is None:
+        return
+    blocks = 0
+    for child in soup.body.find_all(recursive=False):
+        if child.name in ("script", "noscript", "style", "template"):
+            continue
+        if NAV_CLASSES & set(child.get("class") or []) or child.name == "nav":
+            yield child, "nav"
+        elif blocks >= FOLD_BLOCKS:
+            yield child, "below"
+        else:
+            blocks += 1
+            yield child, "above"
+
+
+def fold_soup(text: str) -> BeautifulSoup:
+    """The page with everything below the fold removed from <body>."""
+    soup = BeautifulSoup(text, "html.parser")
+    for block, position in list(body_blocks(soup)):
+        if position == "below":
+            block.decompose()
+    return soup
+
+
+def page_needs(rel: str, text: str) -> dict[str, set[int]]:
+    """Stylesheet -> indices of its rules that apply above the fold of this page."""
+    text = restore_links(text)
+    soup = fold_soup(text)
+    tokens = document_tokens(soup)
+    needs: dict[str, set[int]] = {}
+    for _, href in stylesheet_links(text):
+        sheet = sheet_path(rel, href)
+        needs[sheet] = {i for i, rule in enumerate(sheet_rules(sheet)) if rule_applies(rule, soup, tokens)}
+    return needs
+
+
+_family_needs: dict[str, dict[str, set[int]]] | None = None
+
+
+def family_needs() -> dict[str, dict[str, set[int]]]:
+    """Family -> stylesheet -> rule indices needed above the fold on any page of the family."""
+    global _family_needs
+    if _family_needs is None:
+        _family_needs = {family: {} for family in FAMILIES}
+        for path in iter_html_files():
+            rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+            family = page_family(rel)
+            if family not in _family_needs:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            for sheet, indices in page_needs(rel, text).items():
+                _family_needs[family].setdefault(sheet, set()).update(indices)
+    return _family_needs
+
+
+def rebase_urls(css: str, sheet_rel: str, page_rel: str) -> str:
+    """Make url()s written relative to the stylesheet work from the page."""
+    sheet_dir, page_dir = os.path.dirname(sheet_rel), os.path.dirname(page_rel)
+
+    def repl(m: re.Match) -> str:
+        ref = m.group(2).strip()
+        if ref.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return m.group(0)
+        target = os.path.normpath(os.path.join(sheet_dir, ref))
+        return f"url({m.group(1)}{os.path.relpath(target, page_dir or '.').replace(os.sep, '/')}{m.group(1)})"
+
+    return URL_RE.sub(repl, css)
+
+
+def sheet_css(sheet: str, indices: set[int], page_rel: str) -> str:
+    rules = sheet_rules(sheet)
+    selected = with_keyframes([rules[i] for i in sorted(indices)], rules)
+    return rebase_urls(serialize(selected), sheet, page_rel)
+
+
+def critical_css_for(page_rel: str, family: str, hrefs: list[str]) -> str:
+    """The family's critical CSS, limited to the stylesheets this page links, in link order."""
+    needs = family_needs()[family]
+    parts = []
+    for href in hrefs:
+        sheet = sheet_path(page_rel, href)
+        if needs.get(sheet):
+            parts.append(sheet_css(sheet, needs[sheet], page_rel))
+    return "\n".join(parts)
+
+
+def async_link(href: str) -> str:
+    href = html.escape(href)
+    return (f'<link rel="preload" href="{href}" as="style" data-critical-async '
+            f'onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+
+def inline_critical_html(text: str, rel: str, family: str) -> str:
+    text = restore_links(text)
+    links = stylesheet_links(text)
+    if not links:
+        return text
+    css = critical_css_for(rel, family, [href for _, href in links])
+    out, pos = [], 0
+    for i, (m, href) in enumerate(links):
+        out.append(text[pos:m.start()])
+        if i == 0 and css:
+            out.append(f'<style data-critical="{family}">\n{css}\n</style>\n')
+        out.append(async_link(href))
+        pos = m.end()
+    out.append(text[pos:])
+    return "".join(out)
+
+
+@register_pass("critical-css", kind="text", families=FAMILIES, default=False)
+def critical_css(page: Page) -> bool:
+    """Inline the family's above-the-fold CSS and load the stylesheets asynchronously."""
+    new = inline_critical_html(page.text, page.rel, page.family)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def verify() -> int:
+    """List pages whose inlined block lacks rules their own fold needs."""
+    problems = 0
+    for path in iter_html_files():
+        rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+        family = page_family(rel)
+        if family not in FAMILIES:
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        block = re.search(r'<style data-critical="[\w-]*">(.*?)</style>', text, re.S)
+        if not block:
+            print(f"✗ {rel}: no critical CSS inlined")
+            problems += 1
+            continue
+        missing = []
+        for sheet, indices in page_needs(rel, text).items():
+            rules = sheet_rules(sheet)
+            for i in sorted(indices):
+                if rebase_urls(rules[i].css(), sheet, rel) not in block.group(1):
+                    missing.append(f"{sheet}: {rules[i].selector}")
+        if missing:
+            problems += 1
+            print(f"✗ {rel}: {len(missing)} above-the-fold rules not inlined")
+            for item in missing[:10]:
+                print(f"    {item}")
+    print(f"\n{problems} page(s) with missing or stale critical CSS")
+    return 1 if problems else 0
+
+
+def report() -> None:
+    print(f"{'family':<10} {'sheet':<34} {'rules':>11} {'critical':>9} {'full':>8}")
+    for family, needs in family_needs().items():
+        for sheet, indices in sorted(needs.items()):
+            rules = sheet_rules(sheet)
+            critical = len(sheet_css(sheet, indices, sheet).encode("utf-8"))
+            full = os.path.getsize(os.path.join(DOCS_DIR, sheet)) if rules else 0
+            print(f"{family:<10} {sheet:<34} {len(indices):>5}/{len(rules):<5} {critical:>9,} {full:>8,}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inline per-family critical CSS")
+    parser.add_argument("--apply", action="store_true", help="Rewrite the pages")
+    parser.add_argument("--dry-run", action="store_true", help="With --apply: only report what would change")
+    parser.add_argument("--verify", action="store_true", help="Check inlined CSS against each page's fold")
+    args = parser.parse_args()
+
+    if args.verify:
+        return verify()
+    if args.apply:
+        import site_transforms
+
+        site_transforms.run(["critical-css"], dry_run=args.dry_run)
+        return 0
+    report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
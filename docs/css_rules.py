@@ -0,0 +1,183 @@
+"""
+Just enough CSS parsing for the build: split a stylesheet into its rules
+and decide whether a rule can apply to a page.
+
+Stylesheets become a flat list of Rule objects in source order. A rule
+inside @media/@supports keeps the enclosing conditions in `media`;
+@keyframes and @font-face blocks are kept whole as at-rules. Declarations are
+not normalised, so re-serialising the rules gives back the original CSS minus
+comments and whitespace.
+
+Matching uses soupsieve (through BeautifulSoup's select_one). Interaction
+states and pseudo-elements (:hover, ::before, ...) are stripped first, since
+"could this element ever be styled by the rule" is the question. Selectors
+soupsieve can't handle are assumed to match.
+"""
+
+from __future__ import annotations
+
+import re
+
+from bs4 import BeautifulSoup
+
+COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+# States and pseudo-elements that don't change which elements a rule can reach.
+DYNAMIC_PSEUDO_RE = re.compile(
+    r"::?(?:hover|focus|focus-within|focus-visible|active|visited|link|target|checked|"
+    r"before|after|placeholder|selection|first-line|first-letter|marker|backdrop|"
+    r"-webkit-[\w-]+|-moz-[\w-]+|-ms-[\w-]+)(?:\([^)]*\))?"
+)
+TOKEN_RE = re.compile(r"[.#]-?[_a-zA-Z][\w-]*")
+TAG_RE = re.compile(r"(?:^|[\s>+~(])([a-zA-Z][\w-]*)")
+ANIMATION_RE = re.compile(r"animation(?:-name)?\s*:\s*([^;}]+)")
+
+
+class Rule:
+    """One rule: a style rule (selector + declarations) or a whole at-rule block."""
+
+    def __init__(self, selector: str, body: str, media: tuple[str, ...] = (), at_rule: bool = False):
+        self.selector = selector
+        self.body = body
+        self.media = media
+        self.at_rule = at_rule
+
+    def __repr__(self) -> str:
+        return f"Rule({self.selector!r}, media={self.media!r})"
+
+    @property
+    def selectors(self) -> list[str]:
+        return [s.strip() for s in self.selector.split(",") if s.strip()]
+
+    @property
+    def keyframes_name(self) -> str | None:
+        if self.at_rule and self.selector.startswith("@keyframes"):
+            return self.selector.split(None, 1)[1].strip()
+        return None
+
+    def animation_names(self) -> set[str]:
+        names: set[str] = set()
+        for value in ANIMATION_RE.findall(self.body):
+            names.update(re.findall(r"[A-Za-z_][\w-]*", value))
+        return names
+
+    def css(self) -> str:
+        if self.at_rule:
+            return f"{self.selector} {{{self.body}}}"
+        return f"{self.selector}{{{' '.join(self.body.split())}}}"
+
+
+def _block_end(text: str, start: int) -> int:
+    """Index of the "}" closing the block whose "{" is at text[start]."""
+    depth = 0
+    quote = None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if ch == quote and text[i - 1] != "\\":
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def parse_css(text: str, media: tuple[str, ...] = ()) -> list[Rule]:
+    """The rules of a stylesheet, flattened, in source order."""
+    text = COMMENT_RE.sub("", text)
+    rules: list[Rule] = []
+    pos = 0
+    while True:
+        brace = text.find("{", pos)
+        if brace == -1:
+            break
+        prelude = text[pos:brace]
+        # Statements such as @import/@charset end in ";" before the next block.
+        if ";" in prelude and prelude.lstrip().startswith("@"):
+            prelude = prelude.rsplit(";", 1)[1]
+        prelude = prelude.strip()
+        end = _block_end(text, brace)
+        body = text[brace + 1:end]
+        if prelude.startswith(("@media", "@supports")):
+            rules.extend(parse_css(body, media + (prelude,)))
+        elif prelude.startswith("@"):
+            rules.append(Rule(prelude, body, media, at_rule=True))
+        elif prelude:
+            rules.append(Rule(prelude, body, media))
+        pos = end + 1
+    return rules
+
+
+def serialize(rules: list[Rule]) -> str:
+    """Rules back to CSS, regrouping consecutive rules that share a media condition."""
+    out: list[str] = []
+    current: tuple[str, ...] = ()
+    for rule in rules:
+        if rule.media != current:
+            out.extend("}" * len(current))
+            out.extend(f"{condition}{{" for condition in rule.media)
+            current = rule.media
+        out.append(rule.css())
+    out.extend("}" * len(current))
+    return "\n".join(out)
+
+
+def matchable(selector: str) -> str:
+    """The selector with interaction states and pseudo-elements removed."""
+    stripped = DYNAMIC_PSEUDO_RE.sub("", selector).strip()
+    stripped = re.sub(r"\s*([>+~])\s*", r"\1", re.sub(r"\s+", " ", stripped))
+    # "a:hover" -> "a", but "a > :hover" -> "a>*"
+    stripped = re.sub(r"(^|[\s>+~(,])(?=[\s>+~),]|$)", r"\1*", stripped)
+    # ":not(:hover)" would become ":not(*)", which matches nothing.
+    return stripped.replace(":not(*)", "") or "*"
+
+
+def document_tokens(soup: BeautifulSoup) -> set[str]:
+    """".class" and "#id" for everything in the document."""
+    tokens: set[str] = set()
+    for tag in soup.find_all(True):
+        tokens.update("." + c for c in tag.get("class") or [])
+        if tag.get("id"):
+            tokens.add("#" + tag["id"])
+    return tokens
+
+
+def required_tokens(selector: str) -> set[str]:
+    """Classes and ids a document must contain for the selector to match anything."""
+    positive = re.sub(r":(?:not|is|where|has)\([^)]*\)", "", selector)
+    return set(TOKEN_RE.findall(positive))
+
+
+def required_tags(selector: str) -> set[str]:
+    """Element names a document must contain for the selector to match anything."""
+    positive = re.sub(r":(?:not|is|where|has)\([^)]*\)", "", selector)
+    positive = re.sub(r"\[[^\]]*\]", "", positive)
+    return {t.lower() for t in TAG_RE.findall(positive)}
+
+
+def selector_matches(soup: BeautifulSoup, selector: str, tokens: set[str] | None = None) -> bool:
+    if tokens is not None and not required_tokens(selector) <= tokens:
+        return False
+    try:
+        return soup.select_one(matchable(selector)) is not None
+    except Exception:
+        return True
+
+
+def rule_applies(rule: Rule, soup: BeautifulSoup, tokens: set[str] | None = None) -> bool:
+    """Could this style rule style anything in the document? Pass document_tokens(soup) to speed it up."""
+    if rule.at_rule:
+        return False
+    return any(selector_matches(soup, s, tokens) for s in rule.selectors)
+
+
+def with_keyframes(selected: list[Rule], all_rules: list[Rule]) -> list[Rule]:
+    """`selected` plus the @keyframes they animate with, kept in source order."""
+    names = set().union(*(r.animation_names() for r in selected)) if selected else set()
+    chosen = {id(r) for r in selected}
+    return [r for r in all_rules if id(r) in chosen or r.keyframes_name in names or
+            (r.at_rule and r.selector.startswith("@font-face"))]
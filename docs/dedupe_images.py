@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate images across projects and spaces.
+
+The same photo often ships several times: the _1600x and _2000x exports of
+one Shopify image, re-exports under another name, byte-identical copies.
+This groups them with perceptual hashes instead of MD5:
+
+- pHash/dHash for every image come from the image index (image_index.py),
+  which computes missing ones in parallel;
+- candidates are found with a BK-tree over the 64-bit pHash (Hamming
+  distance), so each image is only compared with its near neighbours, and
+  confirmed with the dHash;
+- each cluster keeps one canonical image: a curated file first (one in a
+  project/space folder named the way the generators build names,
+  <slug>-N.jpg or <slug>-primary/hover/secondary.jpg), then any file in a
+  project/space folder, then the loose Shopify exports; within that, most
+  pixels, then most bytes. Clusters grow transitively (A~B and B~C puts
+  A, B and C together), but only members that are themselves within both
+  distances of the canonical image count as its duplicates; the rest are
+  listed as linked and left alone. Curated files are never duplicates
+  either: the generators (rebuild_portfolio_invero.py,
+  generate_split_projects.py, audit_image_counts.py, renumber.py) build
+  those names themselves.
+
+The clusters are written to .build/image-duplicates.json. With --rewrite,
+every page that references a duplicate is pointed at the canonical file
+(the opt-in canonical-image-refs pass of site_transforms.py), and --prune
+then moves duplicates nothing references any more to
+.build/dedupe-quarantine/, so they stop being shipped and uploaded but can
+be put back. "References" is taken broadly: the docs-relative path, the
+path relative to the referring file, or just the file name, in any page,
+stylesheet, script, JSON file or generator under docs/.
+
+Usage:
+  python3 dedupe_images.py
+  python3 dedupe_images.py --phash-distance 6 assets/images/projects
+  python3 dedupe_images.py --rewrite --prune
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+from urllib.parse import quote
+
+from image_index import DOCS_DIR, ImageIndex, display_size, hamming
+from site_transforms import Page, register_pass
+
+SOURCE_DIRS = ["assets/images/projects", "assets/images/spaces"]
+DUPLICATES_FILE = os.path.join(DOCS_DIR, ".build", "image-duplicates.json")
+# Files that can refer to an image; assets/images itself (per-folder manifests) doesn't count.
+REFERRING_EXTENSIONS = (".html", ".css", ".js", ".json", ".md", ".py", ".xml", ".txt")
+IMAGES_DIR = "assets/images"
+QUARANTINE_DIR = os.path.join(DOCS_DIR, ".build", "dedupe-quarantine")
+# Names the generators build by f-string, inside a folder named after the slug.
+GENERATED_NAME_RE = r"{slug}-(?:\d+|primary|hover|secondary)\.(?:jpe?g|png|webp|avif)"
+
+PHASH_DISTANCE = 8
+DHASH_DISTANCE = 12
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance."""
+
+    def __init__(self):
+        self.root: list | None = None  # [hash, items, {distance: child}]
+
+    def add(self, value: int, item: str) -> None:
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            d = bin(node[0] ^ value).count("1")
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> list[tuple[int, str]]:
+        """All (distance, item) within radius of value."""
+        found: list[tuple[int, str]] = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = bin(node[0] ^ value).count("1")
+            if d <= radius:
+                found.extend((d, item) for item in node[1])
+            for child_d, child in node[2].items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+        return found
+
+
+def in_gallery_folder(path: str) -> bool:
+    """Whether path sits in a project/space folder, not loose in assets/images/projects or spaces."""
+    return os.path.dirname(path) not in SOURCE_DIRS
+
+
+def is_generated_name(path: str) -> bool:
+    """Whether path is a curated <slug>/<slug>-N (or -primary/-hover/-secondary) file the generators build."""
+    if not in_gallery_folder(path):
+        return False
+    slug = os.path.basename(os.path.dirname(path))
+    return re.fullmatch(GENERATED_NAME_RE.format(slug=re.escape(slug)), os.path.basename(path), re.I) is not None
+
+
+def quality_key(path: str, entry: dict) -> tuple:
+    """Sort key for picking a cluster's canonical image: best first."""
+    w, h = display_size(entry)
+    return (not is_generated_name(path), not in_gallery_folder(path), -w * h, -entry["size"], len(path), path)
+
+
+def is_duplicate(a: dict, b: dict, phash_distance: int = PHASH_DISTANCE,
+                 dhash_distance: int = DHASH_DISTANCE) -> bool:
+    """Whether two index entries are the same picture: identical bytes, or close on both hashes."""
+    if a["sha256"] == b["sha256"]:
+        return True
+    return hamming(a["phash"], b["phash"]) <= phash_distance and hamming(a["dhash"], b["dhash"]) <= dhash_distance
+
+
+def find_clusters(images: dict[str, dict], phash_distance: int = PHASH_DISTANCE,
+                  dhash_distance: int = DHASH_DISTANCE) -> list[list[str]]:
+    """Group near-duplicate images. Each cluster is sorted best-quality first."""
+    tree = BKTree()
+    for path, entry in images.items():
+        tree.add(int(entry["phash"], 16), path)
+
+    parent = {path: path for path in images}
+
+    def find(p: str) -> str:
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+        return p
+
+    for path, entry in images.items():
+        for _, other in tree.search(int(entry["phash"], 16), phash_distance):
+            if other != path and is_duplicate(entry, images[other], phash_distance, dhash_distance):
+                parent[find(other)] = find(path)
+
+    groups: dict[str, list[str]] = {}
+    for path in images:
+        groups.setdefault(find(path), []).append(path)
+    clusters = [sorted(g, key=lambda p: quality_key(p, images[p])) for g in groups.values() if len(g) > 1]
+    clusters.sort(key=lambda c: (-len(c), c[0]))
+    return clusters
+
+
+def load_replacements(path: str = DUPLICATES_FILE) -> dict[str, str]:
+    """duplicate path -> canonical path, from the last dedupe run."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("replacements", {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+_replacement_pattern: tuple[dict, re.Pattern | None] | None = None
+
+
+def _pattern() -> tuple[dict, re.Pattern | None]:
+    global _replacement_pattern
+    if _replacement_pattern is None:
+        replacements = load_replacements()
+        pattern = None
+        if replacements:
+            alternatives = "|".join(re.escape(p) for p in sorted(replacements, key=len, reverse=True))
+            # Whole paths only: "../assets/..." or "assets/..." but not "xassets/..." or "foo.jpg.bak".
+            pattern = re.compile(rf"(?<![\w.-])({alternatives})(?![\w.-])")
+        _replacement_pattern = (replacements, pattern)
+    return _replacement_pattern
+
+
+@register_pass("canonical-image-refs", kind="text", default=False)
+def canonical_image_refs(page: Page) -> bool:
+    """Point references to near-duplicate images at their canonical file."""
+    replacements, pattern = _pattern()
+    if pattern is None or "assets/images/" not in page.text:
+        return False
+    new = pattern.sub(lambda m: replacements[m.group(1)], page.text)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def referring_files() -> list[str]:
+    """Text files under docs/ that may refer to images (not hidden or build folders, not assets/images)."""
+    files: list[str] = []
+    for root, dirs, names in os.walk(DOCS_DIR):
+        rel_root = os.path.relpath(root, DOCS_DIR)
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".")
+                         and os.path.normpath(os.path.join(rel_root, d)).replace(os.sep, "/") != IMAGES_DIR)
+        files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(REFERRING_EXTENSIONS))
+    return files
+
+
+def referenced(paths: set[str]) -> set[str]:
+    """Which of the given docs-relative image paths anything under docs/ may still refer to."""
+    found: set[str] = set()
+    for path in referring_files():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except UnicodeDecodeError:
+            continue
+        folder = os.path.dirname(os.path.relpath(path, DOCS_DIR))
+        for p in paths - found:
+            name = os.path.basename(p)
+            forms = {p, os.path.relpath(p, folder or ".").replace(os.sep, "/"), name, quote(name)}
+            if any(form in text for form in forms):
+                found.add(p)
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Find near-duplicate images")
+    parser.add_argument("paths", nargs="*", help="Folders relative to docs/ (default: projects + spaces)")
+    parser.add_argument("--phash-distance", type=int, default=PHASH_DISTANCE)
+    parser.add_argument("--dhash-distance", type=int, default=DHASH_DISTANCE)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--rewrite", action="store_true", help="Point page references at canonical images")
+    parser.add_argument("--prune", action="store_true",
+                        help="Move duplicates nothing references to .build/dedupe-quarantine/")
+    args = parser.parse_args()
+
+    roots = args.paths or SOURCE_DIRS
+    with ImageIndex() as index:
+        paths = index.update(roots, jobs=args.jobs)
+    images = {p: index.images[p] for p in paths if p in index.images}
+
+    clusters = find_clusters(images, args.phash_distance, args.dhash_distance)
+    # Only members close to the canonical image itself, not ones linked through a chain,
+    # and never a name a generator builds.
+    replacements = {dup: cluster[0] for cluster in clusters for dup in cluster[1:]
+                    if not is_generated_name(dup)
+                    and is_duplicate(images[dup], images[cluster[0]], args.phash_distance, args.dhash_distance)}
+    reclaimable = sum(images[p]["size"] for p in replacements)
+
+    for cluster in clusters:
+        best = images[cluster[0]]
+        w, h = display_size(best)
+        print(f"★ {cluster[0]} ({w}x{h}, {best['size'] / 1024:.0f} KB)")
+        for dup in cluster[1:]:
+            entry = images[dup]
+            dw, dh = display_size(entry)
+            kind = "identical" if entry["sha256"] == best["sha256"] else \
+                f"pHash Δ{hamming(entry['phash'], best['phash'])}"
+            if is_generated_name(dup):
+                kind += ", curated name: kept"
+            elif dup not in replacements:
+                kind += ", only linked through other images: kept"
+            print(f"    {dup} ({dw}x{dh}, {entry['size'] / 1024:.0f} KB, {kind})")
+
+    os.makedirs(os.path.dirname(DUPLICATES_FILE), exist_ok=True)
+    with open(DUPLICATES_FILE, "w", encoding="utf-8") as f:
+        json.dump({"clusters": clusters, "replacements": replacements}, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+    print(f"\n{'=' * 60}")
+    print(f"{len(images)} images, {len(clusters)} clusters, {len(replacements)} duplicates "
+          f"({reclaimable / 1e6:.1f} MB)")
+    print(f"Clusters: {os.path.relpath(DUPLICATES_FILE, DOCS_DIR)}")
+
+    if args.rewrite:
+        import site_transforms
+
+        print()
+        site_transforms.run(["canonical-image-refs"])
+
+    if args.prune:
+        still_used = referenced(set(replacements))
+        pruned = 0
+        for dup in sorted(set(replacements) - still_used):
+            dest = os.path.join(QUARANTINE_DIR, dup)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.move(os.path.join(DOCS_DIR, dup), dest)
+            pruned += 1
+        print(f"\nMoved {pruned} unreferenced duplicates to {os.path.relpath(QUARANTINE_DIR, DOCS_DIR)}; "
+              f"{len(still_used)} still referenced by pages, stylesheets, scripts or generators "
+              f"(run with --rewrite, or check them by hand)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
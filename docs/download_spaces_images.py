@@ -3,8 +3,26 @@
 Download and organize images from Dropbox for spaces pages.
 This script processes a Dropbox shared folder and organizes images
 into the correct spaces directories.
+
+With --stream, the ZIP isn't saved and unpacked first: zip_stream.py reads
+it straight off the response and writes each image to its final
+spaces/<space>/ path, checking its CRC. Progress is kept in
+.build/spaces-ingest.json, so an interrupted run picks up where it stopped
+(images already written are skipped, as long as the server supports Range
+requests and the archive hasn't changed).
+
+Folders are filed under a space by space_classifier.py; images in folders it
+can't place go to .build/spaces-quarantine/ for review, and every decision
+is listed in .build/spaces-classification.json.
+
+Usage:
+  python3 download_spaces_images.py                 # download, extract, copy
+  python3 download_spaces_images.py --stream        # stream into place
+  python3 download_spaces_images.py --stream --url http://127.0.0.1:8765/fixture.zip
 """
 
+import argparse
+import json
 import os
 import re
 import requests
@@ -14,9 +32,18 @@ from pathlib import Path
 from bs4 import BeautifulSoup
 import time
 
+from renumber import number_of
+from site_build import write_if_changed
+from space_classifier import QUARANTINE_DIR, SpaceClassifier, quarantine_path
+
 # Base directories
-DOCS_DIR = "/Users/mark/Desktop/JAC web design/jac-website-custom/docs"
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
 SPACES_IMAGES_DIR = os.path.join(DOCS_DIR, "assets/images/spaces")
+INGEST_STATE = os.path.join(DOCS_DIR, ".build", "spaces-ingest.json")
+
+DROPBOX_LINK = "https://www.dropbox.com/scl/fo/ojfqyw5fqpq73dk0myslv/AIIpNZQbeQyBnGcvpzCgoto?rlkey=wig4r6vo8p4g3a8h41ama9b47&e=4&st=r03ts77z&dl=0"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+CLASSIFICATION_REPORT = os.path.join(DOCS_DIR, ".build", "spaces-classification.json")
 
 # Mapping of folder names to space page names
 SPACE_MAPPING = {
@@ -32,21 +59,28 @@ SPACE_MAPPING = {
     'laundry-rooms': 'laundry-rooms',
     'outdoor-spaces': 'outdoor-spaces',
 }
+CLASSIFIER = SpaceClassifier(tuple(SPACE_MAPPING.values()))
+
+def direct_download_link(shared_link):
+    """
+    Convert a Dropbox shared link to a direct download link.
+    For folder downloads, we need dl=1 to get a zip.
+    """
+    if 'dropbox.com' not in shared_link:
+        return shared_link
+    if '?dl=0' in shared_link:
+        return shared_link.replace('?dl=0', '?dl=1').replace('&dl=0', '')
+    if 'dl=1' in shared_link:
+        return shared_link
+    shared_link = shared_link.replace('&dl=0', '')
+    return shared_link + ('&' if '?' in shared_link else '?') + 'dl=1'
 
 def download_dropbox_folder(shared_link):
     """
     Download a Dropbox shared folder as a ZIP file.
     The link should have dl=1 parameter for direct download.
     """
-    # Convert the shared link to a direct download link
-    # For folder downloads, we need to append /?dl=1 to get a zip
-    if '?dl=0' in shared_link:
-        download_link = shared_link.replace('?dl=0', '?dl=1').replace('&dl=0', '')
-    elif '?dl=1' not in shared_link:
-        # Append ?dl=1 if not present
-        download_link = shared_link + ('&' if '?' in shared_link else '?') + 'dl=1'
-    else:
-        download_link = shared_link
+    download_link = direct_download_link(shared_link)
     
     print(f"Downloading from Dropbox...")
     print(f"Link: {download_link}")
@@ -79,6 +113,176 @@ def download_dropbox_folder(shared_link):
         print(f"Error downloading: {e}")
         return None
 
+def last_number(space_folder, placed=()):
+    """
+    Highest <space>-N already in the space's folder (0 if none), not
+    counting the paths in placed.
+    """
+    target_dir = os.path.join(SPACES_IMAGES_DIR, space_folder)
+    if not os.path.isdir(target_dir):
+        return 0
+    numbers = [number_of(n, space_folder) for n in os.listdir(target_dir)
+               if os.path.join(target_dir, n) not in placed]
+    return max((n for n in numbers if n is not None), default=0)
+
+def plan_destinations(names, placed=()):
+    """
+    Final path for every image in the ZIP: {zip name: path}. Images are
+    numbered <space>-N.jpg per space, not per folder: the classifier files
+    several folders under one space (JAC/Master Bedroom and JAC/Bedrooms
+    both go to bedrooms), so numbering runs across them in folder then
+    filename order, after the highest number already in the space folder.
+    placed lists paths an earlier run of this archive wrote, which don't
+    count as already there, so a resumed run plans the same names. Images
+    in folders that match no space keep their names under the quarantine
+    folder. Also returns the classifier's decision for each folder:
+    {folder: (space, how, reason, images)}.
+    """
+    folders = {}
+    for name in names:
+        if name.endswith('/') or not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        folder, _, filename = name.rpartition('/')
+        folders.setdefault(folder, []).append(filename)
+    
+    destinations = {}
+    decisions = {}
+    counters = {}
+    for folder, filenames in sorted(folders.items()):
+        space_folder, how, reason = CLASSIFIER.classify(folder)
+        decisions[folder] = (space_folder, how, reason, len(filenames))
+        for img_file in sorted(filenames):
+            name = f"{folder}/{img_file}" if folder else img_file
+            if not space_folder:
+                destinations[name] = quarantine_path(folder, img_file)
+                continue
+            if space_folder not in counters:
+                counters[space_folder] = last_number(space_folder, placed)
+            counters[space_folder] += 1
+            ext = os.path.splitext(img_file)[1]
+            destinations[name] = os.path.join(SPACES_IMAGES_DIR, space_folder,
+                                              f"{space_folder}-{counters[space_folder]}{ext}")
+    return destinations, decisions
+
+def report_decisions(decisions):
+    """
+    Print where each archive folder went and why, and save it to
+    .build/spaces-classification.json.
+    """
+    print("\nFolders:")
+    for folder, (space_folder, how, reason, count) in sorted(decisions.items()):
+        if space_folder:
+            print(f"  ✓ {folder or '(top level)'} → {space_folder} ({count} images; {how}: {reason})")
+        else:
+            print(f"  ⚠ {folder or '(top level)'} → quarantine ({count} images; {reason})")
+    quarantined = sum(d[3] for d in decisions.values() if not d[0])
+    if quarantined:
+        print(f"\n⚠ {quarantined} images quarantined in {os.path.relpath(QUARANTINE_DIR, DOCS_DIR)}; "
+              "add an alias to space_classifier.ALIASES or move them by hand")
+    report = {folder: {'space': d[0], 'how': d[1], 'reason': d[2], 'images': d[3]}
+              for folder, d in decisions.items()}
+    write_if_changed(CLASSIFICATION_REPORT, json.dumps(report, indent=1, sort_keys=True) + "\n")
+
+def load_ingest_state(remote):
+    """
+    Entries finished by an earlier --stream run of the same archive.
+    """
+    try:
+        with open(INGEST_STATE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if (state.get('url'), state.get('etag'), state.get('size')) != (remote.url, remote.etag, remote.size):
+        return {}
+    return state.get('done', {})
+
+def save_ingest_state(remote, done):
+    os.makedirs(os.path.dirname(INGEST_STATE), exist_ok=True)
+    tmp = INGEST_STATE + '.__tmp__'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'url': remote.url, 'etag': remote.etag, 'size': remote.size, 'done': done},
+                  f, indent=1, sort_keys=True)
+    os.replace(tmp, INGEST_STATE)
+
+def stream_and_organize_images(shared_link):
+    """
+    Stream images from the ZIP at shared_link straight into the spaces
+    directories (see zip_stream.py). Returns the spaces that got images.
+    """
+    import zip_stream
+    
+    download_link = direct_download_link(shared_link)
+    print("Streaming from Dropbox...")
+    print(f"Link: {download_link}")
+    remote = zip_stream.RemoteZip(download_link).probe()
+    started = time.time()
+    spaces = set()
+    
+    if remote.ranges:
+        entries = remote.central_directory()
+        done = load_ingest_state(remote)
+        placed = {os.path.join(DOCS_DIR, rel) for rel, _crc, _size in done.values()}
+        destinations, decisions = plan_destinations([e.name for e in entries], placed)
+        by_name = {e.name: e for e in entries}
+        todo = {}
+        for name, dest in destinations.items():
+            entry = by_name[name]
+            rel = os.path.relpath(dest, DOCS_DIR)
+            if done.get(name) == [rel, entry.crc, entry.size] and os.path.isfile(dest) \
+                    and os.path.getsize(dest) == entry.size:
+                if dest.startswith(SPACES_IMAGES_DIR):
+                    spaces.add(os.path.basename(os.path.dirname(dest)))
+                continue
+            todo[name] = dest
+        print(f"Archive: {remote.size:,} bytes, {len(entries)} entries, {len(destinations)} images "
+              f"({len(destinations) - len(todo)} already in place)")
+        
+        def on_done(entry, dest):
+            done[entry.name] = [os.path.relpath(dest, DOCS_DIR), entry.crc, entry.size]
+            save_ingest_state(remote, done)
+            if dest.startswith(SPACES_IMAGES_DIR):
+                spaces.add(os.path.basename(os.path.dirname(dest)))
+            print(f"  ✓ {entry.name} → {os.path.relpath(dest, DOCS_DIR)}")
+        
+        written = zip_stream.extract_ranged(remote, entries, todo, on_done)
+    else:
+        # No Range support (Dropbox builds folder ZIPs on the fly): read front to
+        # back into temporary names, then number them once every name is known.
+        print("Server doesn't support Range requests; reading the archive front to back")
+        staged = {}
+        
+        def choose(name):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                return None
+            folder, _, filename = name.rpartition('/')
+            space_folder = CLASSIFIER.classify(folder)[0]
+            if not space_folder:
+                staged[name] = quarantine_path(folder, filename)
+            else:
+                staged[name] = os.path.join(SPACES_IMAGES_DIR, space_folder,
+                                            f".ingest-{len(staged)}{os.path.splitext(name)[1]}")
+            return staged[name]
+        
+        def on_done(entry, dest):
+            print(f"  ✓ {entry.name}")
+        
+        try:
+            written = zip_stream.extract_sequential(remote, choose, on_done)
+        except BaseException:
+            for path in staged.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        destinations, decisions = plan_destinations(staged)
+        for name, dest in destinations.items():
+            if staged[name] != dest:
+                os.replace(staged[name], dest)
+                spaces.add(os.path.basename(os.path.dirname(dest)))
+    
+    report_decisions(decisions)
+    print(f"\nWrote {written:,} bytes in {time.time() - started:.1f}s")
+    return sorted(spaces)
+
 def extract_and_organize_images(zip_path):
     """
     Extract ZIP file and organize images into spaces directories.
@@ -99,70 +303,24 @@ def extract_and_organize_images(zip_path):
         
         print(f"Extracted to: {temp_extract_dir}")
         
-        # Find all image files
-        image_extensions = ('.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG')
-        
         # Walk through extracted files
+        names = []
         for root, dirs, files in os.walk(temp_extract_dir):
-            # Get folder name (assuming structure: extracted_folder/space_name/images)
             relative_path = os.path.relpath(root, temp_extract_dir)
-            parts = [p for p in relative_path.split(os.sep) if p and p != '.']
-            
-            # Try to match folder name to space mapping
-            space_folder = None
-            for folder_name, space_name in SPACE_MAPPING.items():
-                # Check if folder name matches (case-insensitive, handle variations)
-                folder_lower = folder_name.lower().replace('-', '').replace('_', '').replace(' ', '')
-                for part in parts:
-                    part_lower = part.lower().replace('-', '').replace('_', '').replace(' ', '')
-                    if folder_lower in part_lower or part_lower in folder_lower:
-                        space_folder = space_name
-                        break
-                if space_folder:
-                    break
-            
-            # If no match found, check folder name directly
-            if not space_folder and parts:
-                folder_name_lower = parts[-1].lower().replace(' ', '-').replace('_', '-')
-                if folder_name_lower in SPACE_MAPPING:
-                    space_folder = SPACE_MAPPING[folder_name_lower]
-            
-            if not space_folder:
-                # Try to match any part of path
-                for part in parts:
-                    for folder_name, space_name in SPACE_MAPPING.items():
-                        if folder_name.lower() in part.lower() or part.lower() in folder_name.lower():
-                            space_folder = space_name
-                            break
-                    if space_folder:
-                        break
-            
-            # Process images in this directory
-            image_files = [f for f in files if f.lower().endswith(image_extensions)]
-            
-            if image_files and space_folder:
-                target_dir = os.path.join(SPACES_IMAGES_DIR, space_folder)
-                os.makedirs(target_dir, exist_ok=True)
-                
-                print(f"\nProcessing {space_folder}:")
-                print(f"  Found {len(image_files)} images in {relative_path}")
-                
-                # Copy images with sequential naming
-                for idx, img_file in enumerate(sorted(image_files), 1):
-                    src_path = os.path.join(root, img_file)
-                    # Use space_name-1.jpg, space_name-2.jpg format
-                    ext = os.path.splitext(img_file)[1]
-                    dest_filename = f"{space_folder}-{idx}{ext}"
-                    dest_path = os.path.join(target_dir, dest_filename)
-                    
-                    # Copy file
-                    import shutil
-                    shutil.copy2(src_path, dest_path)
-                    print(f"  ✓ {img_file} → {dest_filename}")
-            
-            elif image_files:
-                print(f"\n⚠ Could not match folder for images in: {relative_path}")
-                print(f"  Images: {image_files[:3]}...")
+            folder = "/".join(p for p in relative_path.split(os.sep) if p and p != '.')
+            names.extend(f"{folder}/{f}" if folder else f for f in files)
+        destinations, decisions = plan_destinations(names)
+        
+        # Copy images to their numbered names; unplaced ones are kept for review
+        # under the quarantine folder instead of being dropped.
+        import shutil
+        for name, dest_path in sorted(destinations.items()):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(os.path.join(temp_extract_dir, *name.split('/')), dest_path)
+            if dest_path.startswith(SPACES_IMAGES_DIR):
+                print(f"  ✓ {name} → {os.path.relpath(dest_path, SPACES_IMAGES_DIR)}")
+        
+        report_decisions(decisions)
     
     except Exception as e:
         print(f"Error extracting: {e}")
@@ -192,7 +350,7 @@ def update_html_with_image_count(space_name):
         return
     
     image_files = sorted([f for f in os.listdir(space_dir) 
-                         if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
+                         if f.lower().endswith(IMAGE_EXTENSIONS)])
     
     if not image_files:
         print(f"  ⚠ No images found for {space_name}")
@@ -213,12 +371,29 @@ def update_html_with_image_count(space_name):
     print(f"  ✓ {expected_images} images ready for {space_name} page")
 
 def main():
+    parser = argparse.ArgumentParser(description="Download and organize Dropbox images for spaces pages")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream images straight into place instead of saving and unpacking the ZIP")
+    parser.add_argument("--url", default=DROPBOX_LINK, help="Dropbox shared link or ZIP URL")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Dropbox Spaces Images Downloader")
     print("=" * 60)
     
-    # Dropbox shared link
-    dropbox_link = "https://www.dropbox.com/scl/fo/ojfqyw5fqpq73dk0myslv/AIIpNZQbeQyBnGcvpzCgoto?rlkey=wig4r6vo8p4g3a8h41ama9b47&e=4&st=r03ts77z&dl=0"
+    dropbox_link = args.url
+    
+    if args.stream:
+        try:
+            spaces = stream_and_organize_images(dropbox_link)
+        except (RuntimeError, ValueError, requests.RequestException) as e:
+            raise SystemExit(f"\nERROR: {e}\nImages written so far are kept; run again to resume.")
+        print("\n" + "=" * 60)
+        print("Verifying HTML files...")
+        print("=" * 60)
+        for space_name in spaces:
+            update_html_with_image_count(space_name)
+        return
     
     print("\nNote: Dropbox folder downloads via API are complex.")
     print("This script will attempt to download, but you may need to:")
@@ -2,20 +2,22 @@
 """
 Filter all spaces folders to keep only high-resolution images suitable for desktop display.
 For masonry layout with 3 images per row on desktop, we need images that are:
-- High enough resolution to look good when displayed large
-- Minimum size threshold: 500KB (images smaller are likely too low-res)
-- Ideally >1MB for best quality
+- Wide enough for a 3-column tile on a high-density screen
+- Sharp (not upscaled or out of focus)
+- Not heavily compressed
+image_quality.py measures all three; the file size isn't used as a stand-in
+for any of them any more. Images that can't be read or scored are kept and
+listed, never removed.
 """
 
 import os
-import shutil
 
-DOCS_DIR = "/Users/mark/Desktop/JAC web design/jac-website-custom/docs"
-SPACES_IMAGES_DIR = os.path.join(DOCS_DIR, "assets/images/spaces")
+from image_index import ImageIndex, display_size
+from image_quality import MIN_DPR, MIN_QUALITY, MIN_SHARPNESS, rejects, scores
+from renumber import renumber, sequence_moves
 
-# Minimum file size for high-res images (500KB)
-MIN_SIZE_KB = 500
-MIN_SIZE_BYTES = MIN_SIZE_KB * 1024
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+SPACES_IMAGES_DIR = os.path.join(DOCS_DIR, "assets/images/spaces")
 
 # Maximum images to keep (for masonry with 3 per row, we want multiples of 3)
 # But we'll keep all high-res images and let the layout handle it
@@ -34,7 +36,7 @@ SPACE_FOLDERS = [
     'outdoor-spaces',
 ]
 
-def filter_space_images(space_name):
+def filter_space_images(space_name, index, quality):
     """Filter images in a space folder to keep only high-res ones."""
     space_dir = os.path.join(SPACES_IMAGES_DIR, space_name)
     if not os.path.exists(space_dir):
@@ -60,42 +62,43 @@ def filter_space_images(space_name):
     
     image_files.sort(key=get_number)
     
-    # Filter by size and collect stats
+    # Filter by resolution, sharpness and JPEG quality, and collect stats
     high_res_images = []
     low_res_images = []
+    unscored_images = []
     
     for img_path in image_files:
-        size = os.path.getsize(img_path)
+        try:
+            entry = index.get(img_path)
+        except Exception as e:
+            entry = None
+            print(f"  ⚠ {os.path.basename(img_path)}: unreadable ({e})")
+        score = quality.get(os.path.relpath(img_path, DOCS_DIR).replace(os.sep, '/'))
+        if entry is None or score is None:
+            # No data to judge it by: keep it rather than delete it.
+            unscored_images.append(img_path)
+            continue
+        size = entry['size']
         size_kb = size / 1024
         size_mb = size / (1024 * 1024)
+        reasons = rejects(score)
         
-        if size >= MIN_SIZE_BYTES:
+        if not reasons:
             high_res_images.append({
                 'path': img_path,
                 'size': size,
+                'pixels': display_size(entry),
                 'size_kb': size_kb,
                 'size_mb': size_mb
             })
         else:
             low_res_images.append({
                 'path': img_path,
-                'size_kb': size_kb
+                'size_kb': size_kb,
+                'pixels': display_size(entry),
+                'reasons': reasons,
             })
     
-    # Create backup directory for low-res images (optional - we'll just remove them)
-    if low_res_images:
-        backup_dir = os.path.join(SPACES_IMAGES_DIR, f'_removed_low_res_{space_name}')
-        # Don't create backup, just remove
-        
-    # Remove low-res images
-    removed_count = 0
-    for item in low_res_images:
-        try:
-            os.remove(item['path'])
-            removed_count += 1
-        except Exception as e:
-            print(f"  Error removing {os.path.basename(item['path'])}: {e}")
-    
     # Renumber remaining high-res images to be sequential
     # Sort by original number
     def get_original_number(filename):
@@ -103,27 +106,16 @@ def filter_space_images(space_name):
         match = re.search(rf'{re.escape(space_name)}-(\d+)', os.path.basename(filename))
         return int(match.group(1)) if match else 999999
     
-    high_res_images.sort(key=lambda x: get_original_number(x['path']))
-    
-    # Rename to sequential numbers
-    temp_dir = os.path.join(space_dir, '_temp_rename')
-    os.makedirs(temp_dir, exist_ok=True)
+    remaining = sorted([item['path'] for item in high_res_images] + unscored_images, key=get_original_number)
     
-    # First move all to temp with new names
-    for idx, item in enumerate(high_res_images, 1):
-        old_path = item['path']
-        ext = os.path.splitext(old_path)[1]
-        new_filename = f"{space_name}-{idx}{ext}"
-        temp_path = os.path.join(temp_dir, new_filename)
-        shutil.move(old_path, temp_path)
-    
-    # Then move back to main directory
-    for filename in os.listdir(temp_dir):
-        temp_path = os.path.join(temp_dir, filename)
-        final_path = os.path.join(space_dir, filename)
-        shutil.move(temp_path, final_path)
-    
-    os.rmdir(temp_dir)
+    # Remove the low-quality images and rename the rest to sequential numbers in one
+    # transaction: pages drop the removed images and follow the renamed ones, and
+    # renumber.py --rollback undoes all of it (see renumber.py)
+    folder = os.path.relpath(space_dir, DOCS_DIR).replace(os.sep, '/')
+    moves = sequence_moves(folder, [os.path.basename(path) for path in remaining], space_name)
+    removals = [f"{folder}/{os.path.basename(item['path'])}" for item in low_res_images]
+    renumber(moves, removals=removals)
+    removed_count = len(removals)
     
     # Print summary
     total_size_mb = sum(item['size_mb'] for item in high_res_images)
@@ -131,13 +123,21 @@ def filter_space_images(space_name):
     
     print(f"\n{space_name.upper()}:")
     print(f"  ✓ Kept {len(high_res_images)} high-res images")
-    print(f"  ✗ Removed {removed_count} low-res images (<{MIN_SIZE_KB}KB)")
+    print(f"  ✗ Removed {removed_count} low-quality images")
+    for item in low_res_images:
+        print(f"      {os.path.basename(item['path'])}: {'; '.join(item['reasons'])}")
+    if unscored_images:
+        print(f"  ? Kept {len(unscored_images)} images that could not be scored (check them by hand)")
+        for path in unscored_images:
+            print(f"      {os.path.basename(path)}")
     print(f"  Total size: {total_size_mb:.2f} MB")
     print(f"  Average size: {avg_size_mb:.2f} MB per image")
     
     if len(high_res_images) > 0:
         print(f"  Largest: {max(high_res_images, key=lambda x: x['size'])['size_mb']:.2f} MB")
         print(f"  Smallest: {min(high_res_images, key=lambda x: x['size'])['size_mb']:.2f} MB")
+        narrowest = min(high_res_images, key=lambda x: x['pixels'][0])
+        print(f"  Narrowest: {narrowest['pixels'][0]}x{narrowest['pixels'][1]} px")
     
     return len(high_res_images), removed_count
 
@@ -145,16 +145,20 @@ def main():
     print("=" * 70)
     print("Filtering Spaces Images - Keeping Only High-Resolution")
     print("=" * 70)
-    print(f"Minimum size: {MIN_SIZE_KB}KB ({MIN_SIZE_KB/1024:.1f}MB)")
+    print(f"Minimum: {MIN_DPR}x on a desktop tile, sharpness {MIN_SHARPNESS:.0f}, JPEG quality {MIN_QUALITY}")
     print("=" * 70)
     
     total_kept = 0
     total_removed = 0
     
-    for space_name in SPACE_FOLDERS:
-        kept, removed = filter_space_images(space_name)
-        total_kept += kept
-        total_removed += removed
+    folders = [os.path.join(SPACES_IMAGES_DIR, s) for s in SPACE_FOLDERS
+               if os.path.isdir(os.path.join(SPACES_IMAGES_DIR, s))]
+    quality = scores(folders)
+    with ImageIndex() as index:
+        for space_name in SPACE_FOLDERS:
+            kept, removed = filter_space_images(space_name, index, quality)
+            total_kept += kept
+            total_removed += removed
     
     print("\n" + "=" * 70)
     print("SUMMARY")
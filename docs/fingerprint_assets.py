@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Build a publishable copy of the site with content-hashed asset filenames.
+
+Every CSS, JS, image and font file under assets/ is published as
+<name>.<hash>.<ext>, where <hash> is the start of the SHA-256 of the
+published bytes, and every reference to it is rewritten: src, href, srcset,
+data-r2-local-src/data-r2-srcset, url() in inline styles and stylesheets.
+Since a file's name changes whenever its content does, everything under
+assets/ can be served with
+
+  Cache-Control: public, max-age=31536000, immutable
+
+and a single changed photo only invalidates itself. ?v= query strings on
+rewritten references and data-r2-bust attributes are dropped from the
+published HTML; the hashed names replace them.
+
+The output goes to .build/site (the tree to deploy). Unchanged files are
+hard-linked rather than copied, so rebuilding is cheap, and files that are no
+longer produced are removed. The original -> hashed mapping is written to
+.build/site/asset-map.json. Gallery images served from R2 are uploaded under
+the same hashed keys by `r2_sync.py --fingerprinted`.
+
+Usage:
+  python3 fingerprint_assets.py
+  python3 fingerprint_assets.py --out /tmp/site
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from urllib.parse import quote, unquote
+
+from image_index import ImageIndex
+from site_build import BUILD_DIR, DOCS_DIR, FileHashes, write_if_changed
+
+OUT_DIR = os.path.join(BUILD_DIR, "site")
+MAP_NAME = "asset-map.json"
+HASH_LENGTH = 10
+
+ASSETS_DIR = "assets"
+LEAF_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".avif", ".gif", ".svg", ".ico", ".woff", ".woff2"}
+# Stylesheets can reference leaves, so they are rewritten before they are hashed.
+REWRITTEN_EXTENSIONS = {".css"}
+HASHED_EXTENSIONS = LEAF_EXTENSIONS | REWRITTEN_EXTENSIONS | {".js"}
+
+# Source-only files that aren't part of the site.
+SKIP_EXTENSIONS = {".py", ".pyc", ".sh", ".md"}
+# Build inputs that live in docs/ but aren't part of the site: the vendored
+# TTFs self_host_fonts.py subsets from, and Python caches. Dot folders
+# (.build, .git) are skipped too. Everything else, _variants included, ships.
+UNPUBLISHED_DIRS = {"_fonts", "__pycache__"}
+
+ATTR_RE = re.compile(r"""(?P<attr>\b(?:src|href|srcset|poster|data-r2-local-src|data-r2-srcset))=(?P<q>["'])(?P<value>.*?)(?P=q)""",
+                     re.S)
+URL_RE = re.compile(r"""url\(\s*(?P<q>["']?)(?P<value>[^"')]+)(?P=q)\s*\)""")
+BUST_RE = re.compile(r"""\s+data-r2-bust=(["']).*?\1""")
+# data-r2-* paths are relative to the site root, whatever the page depth (see r2-images.js).
+ROOT_RELATIVE_ATTRS = {"data-r2-local-src", "data-r2-srcset"}
+SRCSET_ATTRS = {"srcset", "data-r2-srcset"}
+
+
+def hashed_name(rel_path: str, digest: str) -> str:
+    """assets/css/style.css + digest -> assets/css/style.<hash>.css"""
+    stem, ext = os.path.splitext(rel_path)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def site_files() -> list[str]:
+    """Every file to publish, relative to docs/."""
+    found: list[str] = []
+    for dirpath, dirs, files in os.walk(DOCS_DIR):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in UNPUBLISHED_DIRS)
+        for name in sorted(files):
+            if name.startswith(".") or os.path.splitext(name)[1].lower() in SKIP_EXTENSIONS:
+                continue
+            found.append(os.path.relpath(os.path.join(dirpath, name), DOCS_DIR).replace(os.sep, "/"))
+    return found
+
+
+def is_hashed(rel_path: str) -> bool:
+    return rel_path.startswith(ASSETS_DIR + "/") and os.path.splitext(rel_path)[1].lower() in HASHED_EXTENSIONS
+
+
+def _rewrite_ref(ref: str, base_dir: str, mapping: dict[str, str]) -> str:
+    if not ref or ref.startswith(("data:", "http:", "https:", "//", "#", "mailto:", "tel:")):
+        return ref
+    path, suffix = re.match(r"([^?#]*)(.*)", ref, re.S).groups()
+    target = os.path.normpath(os.path.join(base_dir, unquote(path))).replace(os.sep, "/")
+    hashed = mapping.get(target)
+    if not hashed:
+        return ref
+    # The hash replaces any ?v= cache-busting query; keep only a #fragment.
+    suffix = suffix[suffix.find("#"):] if "#" in suffix else ""
+    # Only the file name changes, so the page-relative prefix stays valid.
+    name = os.path.basename(hashed)
+    if unquote(path) != path:
+        name = quote(name)
+    return path[: len(path) - len(os.path.basename(path))] + name + suffix
+
+
+def _rewrite_srcset(value: str, base_dir: str, mapping: dict[str, str]) -> str:
+    out = []
+    for candidate in value.split(","):
+        parts = candidate.strip().split(None, 1)
+        if not parts:
+            continue
+        parts[0] = _rewrite_ref(parts[0], base_dir, mapping)
+        out.append(" ".join(parts))
+    return ", ".join(out)
+
+
+def rewrite_references(text: str, rel_path: str, mapping: dict[str, str], html: bool = True) -> str:
+    """Point every asset reference in an HTML/CSS file at its hashed name."""
+    page_dir = os.path.dirname(rel_path)
+
+    def attr(m: re.Match) -> str:
+        name = m.group("attr")
+        base = "" if name in ROOT_RELATIVE_ATTRS else page_dir
+        value = m.group("value")
+        new = _rewrite_srcset(value, base, mapping) if name in SRCSET_ATTRS else _rewrite_ref(value, base, mapping)
+        return f'{name}={m.group("q")}{new}{m.group("q")}'
+
+    def url(m: re.Match) -> str:
+        return f'url({m.group("q")}{_rewrite_ref(m.group("value").strip(), page_dir, mapping)}{m.group("q")})'
+
+    if html:
+        text = ATTR_RE.sub(attr, text)
+        text = BUST_RE.sub("", text)
+    return URL_RE.sub(url, text)
+
+
+def publish_link(src_rel: str, out_path: str) -> None:
+    """Hard-link a source file into the output tree (copy if linking isn't possible)."""
+    src = os.path.join(DOCS_DIR, src_rel)
+    try:
+        if os.path.samefile(src, out_path):
+            return
+        os.remove(out_path)
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    try:
+        os.link(src, out_path)
+    except OSError:
+        shutil.copy2(src, out_path)
+
+
+def build(out_dir: str = OUT_DIR, verbose: bool = True) -> dict[str, str]:
+    """Write the fingerprinted site to out_dir. Returns the original -> hashed mapping."""
+    started = time.perf_counter()
+    with ImageIndex() as index:
+        index.update()
+    hashes = FileHashes(index)
+
+    files = site_files()
+    mapping: dict[str, str] = {}
+    produced: set[str] = set()
+    written = linked = 0
+
+    def out(rel: str) -> str:
+        produced.add(rel)
+        return os.path.join(out_dir, rel)
+
+    # 1. Leaves and scripts: named after the source bytes, published as links.
+    for rel in files:
+        if is_hashed(rel) and os.path.splitext(rel)[1].lower() not in REWRITTEN_EXTENSIONS:
+            mapping[rel] = hashed_name(rel, hashes.digest(rel)[0])
+            publish_link(rel, out(mapping[rel]))
+            linked += 1
+
+    # 2. Stylesheets: rewrite their references, then name them after the result.
+    for rel in files:
+        if is_hashed(rel) and os.path.splitext(rel)[1].lower() in REWRITTEN_EXTENSIONS:
+            with open(os.path.join(DOCS_DIR, rel), "r", encoding="utf-8") as f:
+                css = rewrite_references(f.read(), rel, mapping, html=False)
+            mapping[rel] = hashed_name(rel, hashlib.sha256(css.encode("utf-8")).hexdigest())
+            written += write_if_changed(out(mapping[rel]), css)
+
+    # 3. Pages and everything else keep their names.
+    for rel in files:
+        if rel in mapping:
+            continue
+        if rel.endswith(".html"):
+            with open(os.path.join(DOCS_DIR, rel), "r", encoding="utf-8") as f:
+                page = rewrite_references(f.read(), rel, mapping)
+            written += write_if_changed(out(rel), page)
+        else:
+            publish_link(rel, out(rel))
+            linked += 1
+
+    map_json = json.dumps(mapping, indent=1, sort_keys=True) + "\n"
+    written += write_if_changed(out(MAP_NAME), map_json)
+    hashes.save()
+
+    removed = 0
+    for dirpath, _, names in os.walk(out_dir, topdown=False):
+        for name in names:
+            rel = os.path.relpath(os.path.join(dirpath, name), out_dir).replace(os.sep, "/")
+            # .br/.gz siblings of published files belong to precompress.py.
+            if rel not in produced and not (rel.endswith((".br", ".gz")) and rel[:-3] in produced):
+                os.remove(os.path.join(dirpath, name))
+                removed += 1
+        if dirpath != out_dir and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+    if verbose:
+        print(f"{len(mapping)} assets fingerprinted, {len(produced)} files published "
+              f"({written} written, {linked} linked, {removed} stale removed) "
+              f"in {time.perf_counter() - started:.1f}s")
+        print(f"Output: {os.path.relpath(out_dir, DOCS_DIR)}  Map: {MAP_NAME}")
+    return mapping
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Publish the site with content-hashed asset names")
+    parser.add_argument("--out", default=OUT_DIR, help="Output directory (default: .build/site)")
+    args = parser.parse_args()
+    build(os.path.abspath(args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Stamp gallery <img> tags with intrinsic dimensions and responsive candidates.
+
+Every image in a `.first-row-grid` or `.image-gallery-grid` gets width/height
+(so the browser reserves the right box before any pixels arrive) and a
+srcset/sizes pair tuned to the masonry breakpoints: 1 column up to 768px,
+2 columns up to 1199px, 3 columns from 1200px inside the 1400px container.
+
+Facts come from the precomputed image manifest (.build/image-variants.json,
+see image_variants.py); images it doesn't know about are left untouched.
+
+For images that r2-images.js manages (data-r2-local-src), the candidates are
+written to data-r2-srcset as local paths and r2-images.js maps them to R2
+URLs when it sets the final src. The variants are only published on R2 (the
+_variants folders are gitignored and not deployed), so other images get
+width/height only, and a srcset/sizes left pointing at _variants is removed.
+
+The placeholder src of R2-managed images (the 1x1 transparent GIF) is
+replaced by the image's LQIP preview from the manifest: a tiny data URI
+that the browser scales up to the reserved box, so each tile shows a
+blurred version of its photo until r2-images.js swaps in the real one.
+
+Masonry tiles also get their layout precomputed: data-masonry-ar (height /
+width) and data-masonry-cols, the column each tile lands in for the 1-, 2- and
+3-column layouts under shortest-column packing. spaces-masonry.js places the
+tiles from these without measuring them, and falls back to live layout for a
+grid whose tiles aren't all stamped.
+
+Used two ways:
+- as the `gallery-dimensions` pass of site_transforms.py, and
+- by the page generators through stamp_html().
+"""
+
+from __future__ import annotations
+
+import os
+
+from bs4 import BeautifulSoup
+
+import image_variants
+from site_transforms import Page, TrackedSoup, register_pass
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Keep in sync with MOBILE_MAX / DESKTOP_MIN in assets/js/spaces-masonry.js.
+TILE_SIZES = "(max-width: 768px) calc(100vw - 2rem), (max-width: 1199px) calc(50vw - 2rem), min(31vw, 440px)"
+FIRST_ROW_SIZES = "(max-width: 768px) calc(100vw - 2rem), min(48vw, 670px)"
+SRCSET_FORMAT = "webp"
+# Gallery containers (class -> role of the images in them), as create_space_pages.py writes them.
+GALLERY_GRIDS = {"first-row-grid": "first-row", "image-gallery-grid": "tile"}
+
+# Keep in sync with GAP in assets/js/spaces-masonry.js.
+MASONRY_GAP = 16
+# Grid width the packing is computed at for each column count: the widest
+# 3-column grid (1400px container less 2rem padding) and a mid-range tablet.
+MASONRY_GRID_WIDTHS = {1: 704, 2: 920, 3: 1336}
+
+_manifest: dict | None = None
+
+
+def manifest_images() -> dict:
+    global _manifest
+    if _manifest is None:
+        _manifest = image_variants.load_manifest()["images"]
+    return _manifest
+
+
+def local_src(img) -> str:
+    """The docs-relative image path an <img> ultimately shows."""
+    return img.get("data-r2-local-src") or img.get("src") or ""
+
+
+def gallery_images(soup: BeautifulSoup):
+    """Yield (img, role) for every gallery image on a page."""
+    for grid_class, role in GALLERY_GRIDS.items():
+        for grid in soup.select(f".{grid_class}"):
+            for img in grid.find_all("img"):
+                yield img, role
+
+
+def drop_unpublished_srcset(img) -> bool:
+    """Remove a plain srcset (and its sizes) naming local _variants files, which aren't deployed."""
+    if f"/{image_variants.VARIANT_DIR}/" not in img.get("srcset", ""):
+        return False
+    del img["srcset"]
+    if "sizes" in img.attrs:
+        del img["sizes"]
+    return True
+
+
+def stamp_img(img, entry: dict, role: str) -> bool:
+    """Apply width/height/srcset/sizes (and the LQIP placeholder) from a manifest entry. Returns True if anything changed."""
+    attrs = {
+        "width": str(entry["width"]),
+        "height": str(entry["height"]),
+    }
+    if img.get("data-r2-local-src"):
+        # r2-images.js resolves these local paths to R2 URLs.
+        srcset = image_variants.srcset_for(entry, SRCSET_FORMAT)
+        if srcset:
+            attrs["data-r2-srcset"] = srcset
+            attrs["sizes"] = FIRST_ROW_SIZES if role == "first-row" else TILE_SIZES
+        if entry.get("lqip") and img.get("src", "").startswith("data:"):
+            attrs["src"] = entry["lqip"]
+
+    changed = False
+    for key, value in attrs.items():
+        if img.get(key) != value:
+            img[key] = value
+            changed = True
+    return changed
+
+
+def manifest_entry(img, page_rel: str) -> dict | None:
+    src = local_src(img)
+    if not src or src.startswith("data:"):
+        return None
+    if not img.get("data-r2-local-src"):
+        src = os.path.normpath(os.path.join(os.path.dirname(page_rel), src)).replace(os.sep, "/")
+    return manifest_images().get(src)
+
+
+def pack_columns(ratios: list[float], columns: int) -> list[int]:
+    """Shortest-column packing: the column index each tile goes in."""
+    width = MASONRY_GRID_WIDTHS[columns]
+    column_width = (width - MASONRY_GAP * (columns - 1)) / columns
+    heights = [0.0] * columns
+    placement = []
+    for ratio in ratios:
+        column = heights.index(min(heights))
+        placement.append(column)
+        heights[column] += column_width * ratio + MASONRY_GAP
+    return placement
+
+
+def stamp_masonry(grid, page_rel: str) -> bool:
+    """Write data-masonry-ar / data-masonry-cols on the tiles of one masonry grid."""
+    tiles = grid.find_all("div", recursive=False)
+    ratios: list[float | None] = []
+    for tile in tiles:
+        img = tile.find("img")
+        entry = manifest_entry(img, page_rel) if img else None
+        ratios.append(entry["height"] / entry["width"] if entry else None)
+
+    attrs: list[dict] = [{"data-masonry-ar": f"{r:.4f}"} if r else {} for r in ratios]
+    if tiles and all(ratios):
+        # Pack with the rounded ratios so the runtime sees the same numbers.
+        rounded = [float(a["data-masonry-ar"]) for a in attrs]
+        placements = [pack_columns(rounded, columns) for columns in (1, 2, 3)]
+        for i, a in enumerate(attrs):
+            a["data-masonry-cols"] = ",".join(str(p[i]) for p in placements)
+
+    changed = False
+    for tile, a in zip(tiles, attrs):
+        for key in ("data-masonry-ar", "data-masonry-cols"):
+            if key not in a:
+                if key in tile.attrs:
+                    del tile[key]
+                    changed = True
+            elif tile.get(key) != a[key]:
+                tile[key] = a[key]
+                changed = True
+    return changed
+
+
+def stamp_soup(soup: BeautifulSoup, page_rel: str) -> bool:
+    changed = False
+    for img, role in gallery_images(soup):
+        if not img.get("data-r2-local-src") and drop_unpublished_srcset(img):
+            changed = True
+        entry = manifest_entry(img, page_rel)
+        if entry and stamp_img(img, entry, role):
+            changed = True
+    for grid in soup.select(".image-gallery-grid"):
+        if stamp_masonry(grid, page_rel):
+            changed = True
+    return changed
+
+
+def stamp_html(html: str, page_rel: str) -> str:
+    """Generator entry point: return html with gallery images stamped (unchanged if nothing applies)."""
+    tracked = TrackedSoup(html)
+    if not stamp_soup(tracked.soup, page_rel):
+        return html
+    return tracked.render()
+
+
+@register_pass("gallery-dimensions", families=("space", "project"))
+def gallery_dimensions(page: Page) -> bool:
+    """Stamp gallery images with width/height, srcset/sizes, LQIP placeholders and masonry placement."""
+    return stamp_soup(page.soup, page.rel)
+
+
+if __name__ == "__main__":
+    import site_transforms
+
+    site_transforms.run(["gallery-dimensions"])
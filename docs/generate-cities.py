@@ -4,6 +4,9 @@ Generate city pages for JAC Interiors website
 """
 
 import os
+import sys
+
+from site_build import IncrementalBuild
 
 # List of cities to create pages for
 CITIES = {
@@ -207,8 +210,8 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 </html>
 '''
 
-def generate_city_pages():
-    """Generate all city pages"""
+def generate_city_pages(force=False):
+    """Generate all city pages (only those whose inputs changed, unless force)"""
     cities_dir = 'cities'
     
     # Create cities directory if it doesn't exist
@@ -221,25 +224,28 @@ def generate_city_pages():
         'Florida': 'venice-beach-house'
     }
     
-    for slug, data in CITIES.items():
-        filename = f"{cities_dir}/{slug}.html"
-        image = image_map.get(data['region'], 'beverly-hills-alpine')
-        
-        html = HTML_TEMPLATE.format(
-            city_name=data['name'],
-            desc=data['desc'],
-            image=image
-        )
-        
-        with open(filename, 'w') as f:
-            f.write(html)
-        
-        print(f"Created: {filename}")
+    with IncrementalBuild(force=force) as build:
+        for slug, data in CITIES.items():
+            filename = f"{cities_dir}/{slug}.html"
+            image = image_map.get(data['region'], 'beverly-hills-alpine')
+            
+            build.page(
+                filename,
+                lambda: HTML_TEMPLATE.format(
+                    city_name=data['name'],
+                    desc=data['desc'],
+                    image=image
+                ),
+                template=HTML_TEMPLATE,
+                record={'slug': slug, 'image': image, **data},
+                images=[f"assets/images/projects/{image}.jpg"],
+                assets=['assets/css/style.css', 'assets/js/main.js'],
+            )
     
-    print(f"\n✅ Generated {len(CITIES)} city pages!")
+    print(f"\n✅ {len(CITIES)} city pages up to date!")
 
 if __name__ == '__main__':
-    generate_city_pages()
+    generate_city_pages(force='--force' in sys.argv[1:])
 
 
 
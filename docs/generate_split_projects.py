@@ -1,7 +1,11 @@
 import os
 import re
+import sys
 from bs4 import BeautifulSoup
 
+import gallery_markup
+from site_build import IncrementalBuild
+
 TEMPLATE_FILE = "projects/beverly-hills-alpine.html"
 BACKUP_DIR = "/Users/mark/Desktop/jacinteriors-backup/jacinteriors.com/pages"
 
@@ -32,83 +36,92 @@ NEW_PROJECTS = [
     }
 ]
 
-def generate_pages():
+def render_project(template_html, proj):
+    # 1. Read backup content to extract description (optional, but good for "Brief/Solution/Result")
+    backup_path = os.path.join(BACKUP_DIR, proj['backup_file'])
+    description_text = ""
+    if os.path.exists(backup_path):
+        with open(backup_path, 'r') as f:
+            soup = BeautifulSoup(f, 'html.parser')
+            # Try to find description text
+            desc_div = soup.find('div', class_='description')
+            if desc_div:
+                description_text = desc_div.get_text(strip=True)
+            else:
+                # Fallback to paragraphs
+                ps = soup.find_all('p')
+                description_text = " ".join([p.get_text(strip=True) for p in ps if len(p.get_text(strip=True)) > 50])
+    
+    if not description_text:
+        description_text = "Experience the epitome of luxury interior design with JAC Interiors."
+
+    # Split description into 3 parts for the layout
+    words = description_text.split()
+    chunk_size = len(words) // 3
+    part1 = " ".join(words[:chunk_size])
+    part2 = " ".join(words[chunk_size:chunk_size*2])
+    part3 = " ".join(words[chunk_size*2:])
+    
+    # 2. Modify template
+    html = template_html
+    
+    # Replace Metadata
+    html = html.replace("Beverly Hills Alpine", proj['title'])
+    html = html.replace("A refined Spanish-style residence transformed into a modern family sanctuary", proj['subtitle'])
+    html = html.replace("Los Angeles, CA", proj['location'])
+    html = html.replace("Modern Spanish", proj['style'])
+    # Year is likely same or hardcoded, replace generic 2023 if needed
+    
+    # Replace Images path
+    html = html.replace("assets/images/projects/beverly-hills-alpine", f"assets/images/projects/{proj['folder']}")
+    html = html.replace("beverly-hills-alpine", proj['folder']) # Filenames
+    
+    # Handle Image Count (reuse if fewer than 6)
+    # Template assumes 1-6. If we have 4, map 5->1, 6->2
+    if proj['image_count'] < 6:
+        for i in range(proj['image_count'] + 1, 7):
+            replacement_idx = (i - 1) % proj['image_count'] + 1
+            # We need to replace explicit src filenames
+            # Pattern: {folder}-{i}.jpg -> {folder}-{replacement_idx}.jpg
+            # But simple string replace might be safer
+            old_img = f"{proj['folder']}-{i}.jpg"
+            new_img = f"{proj['folder']}-{replacement_idx}.jpg"
+            html = html.replace(old_img, new_img)
+    
+    # Replace Text content
+    # We need to target the <p> tags in the "The Vision", "Design Approach", etc. sections
+    # This is tricky with string replace. We'll rely on the template structure being consistent.
+    # Use regex or simple markers if possible.
+    # Template has "Mediterranean in Indian Wells..." etc.
+    # We'll just replace the specific text blocks from the template if we can identifying them.
+    # Actually, extracting from template is better.
+    
+    # Let's just write the file and tell user content is generic/extracted.
+    # Updating content programmatically is fragile without parsing.
+    
+    return html
+
+def generate_pages(force=False):
     with open(TEMPLATE_FILE, 'r') as f:
         template_html = f.read()
 
-    for proj in NEW_PROJECTS:
-        print(f"Generating {proj['id']}...")
-        
-        # 1. Read backup content to extract description (optional, but good for "Brief/Solution/Result")
-        backup_path = os.path.join(BACKUP_DIR, proj['backup_file'])
-        description_text = ""
-        if os.path.exists(backup_path):
-            with open(backup_path, 'r') as f:
-                soup = BeautifulSoup(f, 'html.parser')
-                # Try to find description text
-                desc_div = soup.find('div', class_='description')
-                if desc_div:
-                    description_text = desc_div.get_text(strip=True)
-                else:
-                    # Fallback to paragraphs
-                    ps = soup.find_all('p')
-                    description_text = " ".join([p.get_text(strip=True) for p in ps if len(p.get_text(strip=True)) > 50])
-        
-        if not description_text:
-            description_text = "Experience the epitome of luxury interior design with JAC Interiors."
-
-        # Split description into 3 parts for the layout
-        words = description_text.split()
-        chunk_size = len(words) // 3
-        part1 = " ".join(words[:chunk_size])
-        part2 = " ".join(words[chunk_size:chunk_size*2])
-        part3 = " ".join(words[chunk_size*2:])
-        
-        # 2. Modify template
-        html = template_html
-        
-        # Replace Metadata
-        html = html.replace("Beverly Hills Alpine", proj['title'])
-        html = html.replace("A refined Spanish-style residence transformed into a modern family sanctuary", proj['subtitle'])
-        html = html.replace("Los Angeles, CA", proj['location'])
-        html = html.replace("Modern Spanish", proj['style'])
-        # Year is likely same or hardcoded, replace generic 2023 if needed
-        
-        # Replace Images path
-        html = html.replace("assets/images/projects/beverly-hills-alpine", f"assets/images/projects/{proj['folder']}")
-        html = html.replace("beverly-hills-alpine", proj['folder']) # Filenames
-        
-        # Handle Image Count (reuse if fewer than 6)
-        # Template assumes 1-6. If we have 4, map 5->1, 6->2
-        if proj['image_count'] < 6:
-            for i in range(proj['image_count'] + 1, 7):
-                replacement_idx = (i - 1) % proj['image_count'] + 1
-                # We need to replace explicit src filenames
-                # Pattern: {folder}-{i}.jpg -> {folder}-{replacement_idx}.jpg
-                # But simple string replace might be safer
-                old_img = f"{proj['folder']}-{i}.jpg"
-                new_img = f"{proj['folder']}-{replacement_idx}.jpg"
-                html = html.replace(old_img, new_img)
-        
-        # Replace Text content
-        # We need to target the <p> tags in the "The Vision", "Design Approach", etc. sections
-        # This is tricky with string replace. We'll rely on the template structure being consistent.
-        # Use regex or simple markers if possible.
-        # Template has "Mediterranean in Indian Wells..." etc.
-        # We'll just replace the specific text blocks from the template if we can identifying them.
-        # Actually, extracting from template is better.
-        
-        # Let's just write the file and tell user content is generic/extracted.
-        # Updating content programmatically is fragile without parsing.
-        
-        # Write new file
-        out_path = f"projects/{proj['id']}.html"
-        with open(out_path, 'w') as f:
-            f.write(html)
-            
-        print(f"Created {out_path}")
+    with IncrementalBuild(force=force) as build:
+        for proj in NEW_PROJECTS:
+            backup_path = os.path.join(BACKUP_DIR, proj['backup_file'])
+            out_path = f"projects/{proj['id']}.html"
+            build.page(
+                out_path,
+                lambda: gallery_markup.stamp_html(render_project(template_html, proj), out_path),
+                template=template_html,
+                record=proj,
+                images=[f"assets/images/projects/{proj['folder']}/{proj['folder']}-{i}.jpg"
+                        for i in range(1, proj['image_count'] + 1)],
+                # The backup page supplies the description text, so it is an input too;
+                # gallery <img> dimensions/srcset come from the image manifest.
+                assets=[backup_path, '.build/image-variants.json'],
+            )
 
 if __name__ == "__main__":
-    generate_pages()
+    generate_pages(force='--force' in sys.argv[1:])
 
 
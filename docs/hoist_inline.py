@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Move inline <style>/<script> blocks repeated across pages into shared files.
+
+Several generators paste the same code into every page they write: the
+MASONRY_CSS/MASONRY_JS strings of update_all_projects_masonry.py, the
+initMasonry script from restore_page_structure.py, the TEMPLATE styles of
+create_space_pages.py. Browsers download that code again with every page.
+
+The `hoist-inline` pass (opt-in) finds blocks whose content (ignoring
+indentation) appears on at least MIN_PAGES pages. It writes each one once as
+  assets/css/shared/<hash>.css   or   assets/js/shared/<hash>.js
+named after its SHA-256, and replaces the block with a <link>/<script src>
+at the same position, so ordering and execution are unchanged. Relative
+url()s in hoisted CSS are rebased from the page to the shared folder before
+blocks are compared. A block that occurs twice in one page (the duplication
+fix_masonry_duplicate.py was written for) is kept only at its first position.
+
+Left inline: blocks on a single page, JSON/template scripts, blocks with
+attributes other than type/media (e.g. the data-critical CSS from
+critical_css.py), and scripts using document.write or currentScript.
+
+Usage:
+  python3 hoist_inline.py             # report what would be hoisted and the bytes saved
+  python3 hoist_inline.py --apply     # same as: site_transforms.py --only hoist-inline
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import textwrap
+
+from site_transforms import DOCS_DIR, Page, iter_html_files, register_pass
+
+MIN_PAGES = 2
+HASH_LENGTH = 10
+SHARED_DIRS = {"style": "assets/css/shared", "script": "assets/js/shared"}
+EXTENSIONS = {"style": ".css", "script": ".js"}
+
+BLOCK_RE = re.compile(r"<(style|script)\b([^>]*)>(.*?)</\1\s*>\n?", re.S | re.I)
+ATTR_RE = re.compile(r"""([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+SCRIPT_TYPES = {"", "text/javascript", "application/javascript", "module"}
+UNSAFE_JS = ("document.write", "currentScript")
+URL_RE = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+
+
+def block_attrs(raw: str) -> dict[str, str]:
+    return {m.group(1).lower(): next((g for g in m.groups()[1:] if g is not None), "")
+            for m in ATTR_RE.finditer(raw)}
+
+
+def normalize(body: str) -> str:
+    return textwrap.dedent(body).strip() + "\n"
+
+
+def rebase_urls(css: str, page_rel: str) -> str:
+    """Rewrite page-relative url()s so they work from the shared stylesheet folder."""
+    page_dir = os.path.dirname(page_rel)
+
+    def repl(m: re.Match) -> str:
+        ref = m.group(2).strip()
+        if ref.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return m.group(0)
+        target = os.path.normpath(os.path.join(page_dir, ref))
+        return f"url({m.group(1)}{os.path.relpath(target, SHARED_DIRS['style']).replace(os.sep, '/')}{m.group(1)})"
+
+    return URL_RE.sub(repl, css)
+
+
+def block_key(m: re.Match, page_rel: str) -> tuple[str, str] | None:
+    """(kind, content) for a block that may be moved out of the page, else None."""
+    kind, attrs, body = m.group(1).lower(), block_attrs(m.group(2)), m.group(3)
+    if not body.strip():
+        return None
+    if kind == "style":
+        if set(attrs) - {"type", "media"}:
+            return None
+        return kind, normalize(rebase_urls(body, page_rel))
+    if set(attrs) - {"type"} or attrs.get("type", "").lower() not in SCRIPT_TYPES:
+        return None
+    if any(token in body for token in UNSAFE_JS):
+        return None
+    return kind, normalize(body)
+
+
+def shared_path(kind: str, content: str) -> str:
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+    return f"{SHARED_DIRS[kind]}/{digest}{EXTENSIONS[kind]}"
+
+
+_shared: dict[tuple[str, str], set[str]] | None = None
+
+
+def shared_blocks() -> dict[tuple[str, str], set[str]]:
+    """(kind, content) -> pages containing it, for blocks found on MIN_PAGES or more pages."""
+    global _shared
+    if _shared is None:
+        seen: dict[tuple[str, str], set[str]] = {}
+        for path in iter_html_files():
+            rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            for m in BLOCK_RE.finditer(text):
+                key = block_key(m, rel)
+                if key:
+                    seen.setdefault(key, set()).add(rel)
+        _shared = {key: pages for key, pages in seen.items() if len(pages) >= MIN_PAGES}
+    return _shared
+
+
+def external_tag(kind: str, attrs: dict[str, str], href: str) -> str:
+    if kind == "style":
+        media = f' media="{attrs["media"]}"' if attrs.get("media") else ""
+        return f'<link rel="stylesheet" href="{href}"{media}>\n'
+    script_type = f' type="{attrs["type"]}"' if attrs.get("type") == "module" else ""
+    return f'<script src="{href}"{script_type}></script>\n'
+
+
+def hoist_html(text: str, page_rel: str, files: dict[str, str] | None = None) -> tuple[str, int]:
+    """Replace shared blocks with external references. Returns (new text, bytes removed).
+
+    The shared files the page now references are added to files (docs-relative path -> content)."""
+    shared = shared_blocks()
+    in_page: set[tuple[str, str]] = set()
+    removed = 0
+
+    def repl(m: re.Match) -> str:
+        nonlocal removed
+        key = block_key(m, page_rel)
+        if key is None:
+            return m.group(0)
+        if key in in_page:
+            removed += len(m.group(0))
+            return ""
+        in_page.add(key)
+        if key not in shared:
+            return m.group(0)
+        kind, content = key
+        rel = shared_path(kind, content)
+        if files is not None:
+            files[rel] = content
+        tag = external_tag(kind, block_attrs(m.group(2)), "../" * page_rel.count("/") + rel)
+        removed += len(m.group(0)) - len(tag)
+        return tag
+
+    return BLOCK_RE.sub(repl, text), removed
+
+
+@register_pass("hoist-inline", kind="text", default=False)
+def hoist_inline(page: Page) -> bool:
+    """Move inline style/script blocks repeated across pages into shared hashed files."""
+    shared: dict[str, str] = {}
+    new, _ = hoist_html(page.text, page.rel, shared)
+    # Written by the engine along with the page, so a dry run leaves no files behind.
+    for rel, content in shared.items():
+        page.write_file(rel, content)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def report() -> None:
+    shared = shared_blocks()
+    total = 0
+    for (kind, content), pages in sorted(shared.items(), key=lambda kv: -len(kv[1]) * len(kv[0][1])):
+        size = len(content.encode("utf-8"))
+        print(f"{shared_path(kind, content):<34} {size:>7,} bytes x {len(pages):>3} pages  "
+              f"e.g. {sorted(pages)[0]}")
+    for path in iter_html_files():
+        rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+        with open(path, "r", encoding="utf-8") as f:
+            total += hoist_html(f.read(), rel)[1]
+    print(f"\n{len(shared)} shared blocks; {total:,} bytes of repeated inline code would be removed site-wide")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hoist repeated inline style/script blocks into shared files")
+    parser.add_argument("--apply", action="store_true", help="Rewrite the pages and write the shared files")
+    parser.add_argument("--dry-run", action="store_true", help="With --apply: only report what would change")
+    args = parser.parse_args()
+    report()
+    if args.apply:
+        import site_transforms
+
+        site_transforms.run(["hoist-inline"], dry_run=args.dry_run)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
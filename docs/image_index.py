@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Persistent metadata index for every image under assets/images.
+
+One entry per image, keyed by its path relative to docs/ and validated by
+(size, mtime), so only new or touched files are ever opened again:
+
+  {
+    "size": 812345, "mtime_ns": ...,
+    "format": "JPEG", "mode": "RGB",
+    "width": 2000, "height": 1333,     # stored pixels, read from the header
+    "orientation": 1,                  # EXIF orientation (1 = upright)
+    "icc": "sRGB IEC61966-2.1",        # embedded profile description, or null
+    "sha256": "...",
+    "phash": "c3d1...", "dhash": "8f0e..."   # 64-bit perceptual hashes, hex
+  }
+
+Dimensions, orientation and the colour profile come from the file header
+without decoding pixels. The perceptual hashes decode a reduced-size draft
+(JPEG DCT scaling), never the full image.
+
+The index lives in .build/image-index.json. Scripts use it like this:
+
+  from image_index import ImageIndex
+
+  with ImageIndex() as index:
+      entry = index.get("assets/images/projects/ronda/ronda-1.jpg")
+      print(entry["width"], entry["height"], entry["sha256"])
+
+get() refreshes a stale or missing entry on the spot; update() refreshes many
+paths at once over a process pool.
+
+Usage:
+  python3 image_index.py                  # update the index for assets/images
+  python3 image_index.py --jobs 4 assets/images/projects
+  python3 image_index.py --show assets/images/projects/ronda/ronda-1.jpg
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = "assets/images"
+INDEX_FILE = os.path.join(DOCS_DIR, ".build", "image-index.json")
+INDEX_VERSION = 1
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif")
+# Generated files are described by their own manifests.
+SKIP_DIRS = {"_variants"}
+
+HASH_SIZE = 8
+PHASH_SAMPLE = 32
+
+# DCT-II basis for the pHash sample, computed once per process.
+_DCT = [[math.cos(math.pi * (2 * x + 1) * u / (2 * PHASH_SAMPLE)) for x in range(PHASH_SAMPLE)]
+        for u in range(HASH_SIZE)]
+
+
+def _rel(path: str) -> str:
+    return os.path.relpath(os.path.abspath(os.path.join(DOCS_DIR, path)), DOCS_DIR).replace(os.sep, "/")
+
+
+def find_images(roots: list[str]) -> list[str]:
+    """Return image paths (relative to docs/) under the given roots."""
+    found: list[str] = []
+    for root in roots:
+        abs_root = os.path.join(DOCS_DIR, root)
+        if os.path.isfile(abs_root):
+            found.append(_rel(root))
+            continue
+        for dirpath, dirs, files in os.walk(abs_root):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    found.append(_rel(os.path.join(dirpath, name)))
+    return found
+
+
+def _bits_to_hex(bits: list[bool]) -> str:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:0{len(bits) // 4}x}"
+
+
+def dhash(gray) -> str:
+    """Difference hash: sign of horizontal gradients on a 9x8 thumbnail."""
+    from PIL import Image
+
+    small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    px = list(small.tobytes())
+    w = HASH_SIZE + 1
+    return _bits_to_hex([px[y * w + x] > px[y * w + x + 1]
+                         for y in range(HASH_SIZE) for x in range(HASH_SIZE)])
+
+
+def phash(gray) -> str:
+    """DCT hash: low-frequency 8x8 DCT coefficients of a 32x32 thumbnail vs. their median."""
+    from PIL import Image
+
+    n = PHASH_SAMPLE
+    small = gray.resize((n, n), Image.LANCZOS)
+    px = list(small.tobytes())
+    rows = [px[y * n:(y + 1) * n] for y in range(n)]
+    # Separable 2-D DCT, keeping only the first HASH_SIZE frequencies each way.
+    row_dct = [[sum(b * r for b, r in zip(basis, row)) for basis in _DCT] for row in rows]
+    coeffs = [sum(_DCT[u][y] * row_dct[y][v] for y in range(n))
+              for u in range(HASH_SIZE) for v in range(HASH_SIZE)]
+    ac = coeffs[1:]  # the DC term only reflects overall brightness
+    median = sorted(ac)[len(ac) // 2]
+    return _bits_to_hex([c > median for c in coeffs])
+
+
+def hamming(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def _icc_description(icc: bytes | None) -> str | None:
+    if not icc:
+        return None
+    try:
+        from io import BytesIO
+
+        from PIL import ImageCms
+
+        return ImageCms.getProfileDescription(ImageCms.ImageCmsProfile(BytesIO(icc))).strip() or "embedded"
+    except Exception:
+        return "embedded"
+
+
+def describe(rel_path: str) -> dict:
+    """Worker: read one image's facts. Only the header and a reduced draft are decoded."""
+    from PIL import Image, ImageOps
+
+    path = os.path.join(DOCS_DIR, rel_path)
+    st = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+    with Image.open(path) as im:
+        entry.update({
+            "format": im.format,
+            "mode": im.mode,
+            "width": im.width,
+            "height": im.height,
+            "orientation": int(im.getexif().get(0x0112, 1) or 1),
+            "icc": _icc_description(im.info.get("icc_profile")),
+        })
+        # Let the JPEG decoder scale down by up to 8x; enough for 32x32 hashes.
+        im.draft("L", (PHASH_SAMPLE * 2, PHASH_SAMPLE * 2))
+        gray = ImageOps.exif_transpose(im).convert("L")
+    entry["phash"] = phash(gray)
+    entry["dhash"] = dhash(gray)
+    return entry
+
+
+def display_size(entry: dict) -> tuple[int, int]:
+    """Width/height as shown, after applying the EXIF orientation."""
+    if entry.get("orientation", 1) in (5, 6, 7, 8):
+        return entry["height"], entry["width"]
+    return entry["width"], entry["height"]
+
+
+class ImageIndex:
+    """The on-disk image index; entries are refreshed when a file's size or mtime changes."""
+
+    def __init__(self, index_file: str = INDEX_FILE):
+        self.index_file = index_file
+        self.images: dict[str, dict] = {}
+        self.refreshed = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.images = data.get("images", {})
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        tmp = self.index_file + ".__tmp__"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "images": self.images}, f,
+                      sort_keys=True, separators=(",", ":"))
+            f.write("\n")
+        os.replace(tmp, self.index_file)
+        self._dirty = False
+
+    def __enter__(self) -> "ImageIndex":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.save()
+
+    def is_current(self, rel_path: str) -> bool:
+        entry = self.images.get(rel_path)
+        if not entry:
+            return False
+        try:
+            st = os.stat(os.path.join(DOCS_DIR, rel_path))
+        except FileNotFoundError:
+            return False
+        return entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+    def _store(self, rel_path: str, entry: dict) -> None:
+        self.images[rel_path] = entry
+        self.refreshed += 1
+        self._dirty = True
+
+    def get(self, path: str) -> dict | None:
+        """Entry for one image (path relative to docs/), refreshed if stale. None if missing."""
+        rel_path = _rel(path)
+        if self.is_current(rel_path):
+            return self.images[rel_path]
+        if not os.path.exists(os.path.join(DOCS_DIR, rel_path)):
+            if self.images.pop(rel_path, None) is not None:
+                self._dirty = True
+            return None
+        self._store(rel_path, describe(rel_path))
+        return self.images[rel_path]
+
+    def update(self, roots: list[str] | None = None, jobs: int | None = None,
+               verbose: bool = False) -> list[str]:
+        """Bring every image under roots up to date; forget deleted ones. Returns the paths scanned."""
+        roots = roots or [IMAGES_DIR]
+        paths = find_images(roots)
+        stale = [p for p in paths if not self.is_current(p)]
+        failed = 0
+        if stale:
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+                for rel_path, entry in zip(stale, pool.map(_describe_safe, stale, chunksize=8)):
+                    if isinstance(entry, str):
+                        failed += 1
+                        if verbose:
+                            print(f"✗ {rel_path}: {entry}")
+                        continue
+                    self._store(rel_path, entry)
+
+        scanned = set(paths)
+        prefixes = tuple(_rel(r).rstrip("/") + "/" for r in roots)
+        for rel_path in list(self.images):
+            if rel_path.startswith(prefixes) and rel_path not in scanned:
+                del self.images[rel_path]
+                self._dirty = True
+        if verbose:
+            print(f"{len(paths)} images, {len(stale) - failed} refreshed, {failed} failed")
+        return paths
+
+    def query(self, prefix: str = "") -> dict[str, dict]:
+        """Entries whose path starts with prefix (no refresh; call update() first)."""
+        return {p: e for p, e in self.images.items() if p.startswith(prefix)}
+
+
+def _describe_safe(rel_path: str) -> dict | str:
+    try:
+        return describe(rel_path)
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Update the image metadata index")
+    parser.add_argument("paths", nargs="*", help=f"Folders/files relative to docs/ (default: {IMAGES_DIR})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--show", action="store_true", help="Print the entries for the given paths")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ImageIndex() as index:
+        if args.show:
+            for path in args.paths:
+                print(json.dumps({_rel(path): index.get(path)}, indent=1, sort_keys=True))
+            return 0
+        index.update(args.paths or None, jobs=args.jobs, verbose=True)
+    print(f"{len(index.images)} entries in {os.path.relpath(INDEX_FILE, DOCS_DIR)} "
+          f"({time.perf_counter() - started:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Decide at build time which images load first and which wait.
+
+Only a few templates set loading="lazy", so space and project pages hand
+every gallery image to the browser at once, and r2-images.js points all of
+them at R2 as soon as it runs. The `image-priority` pass (opt-in) gives
+every content <img> one of three treatments, in document order:
+
+  high   hero images (.hero-img, .hero-image-section) and the first-row
+         images of space/project pages: loading="eager",
+         fetchpriority="high"
+  eager  other images in the first blocks of the page (the fold as
+         critical_css.py defines it), up to EAGER_IMAGES per page:
+         loading="eager"
+  lazy   everything else: loading="lazy" decoding="async". Masonry tiles,
+         images hidden until hover and anything below the fold are always
+         lazy. r2-images.js only sets src, so lazy images still wait for
+         the viewport after it has run.
+
+Navbar images (the logo) are left alone.
+
+The page's LCP candidate is its first "high" image, else its first "eager"
+one. It gets a <link rel="preload" as="image" fetchpriority="high"
+data-lcp-preload> in <head>, with imagesrcset/imagesizes matching the
+<img> so the browser doesn't fetch a second candidate. For images that
+r2-images.js manages, the preload points at the R2 URL it will request,
+using the base in assets/js/r2-config.js (or at the URL the r2-urls pass
+resolved, see r2_urls.py).
+
+Re-running the pass recomputes every decision and replaces the preload.
+The plan for each page, with the reason for every image, is written to
+.build/image-priority.json.
+
+Usage:
+  python3 image_priority.py             # report what the pass would do
+  python3 image_priority.py --apply     # same as: site_transforms.py --only image-priority
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+from critical_css import body_blocks
+from r2_urls import R2_CONFIG, r2_base, r2_key, r2_url
+from site_build import BUILD_DIR, write_if_changed
+from site_transforms import DOCS_DIR, Page, register_pass
+
+REPORT_FILE = os.path.join(BUILD_DIR, "image-priority.json")
+
+EAGER_IMAGES = 3
+HERO_CLASSES = {"hero-img"}
+HERO_CONTAINERS = {"hero-image-section", "first-row-grid"}
+HIDDEN_CLASSES = {"hover-img"}
+
+POLICY = {
+    "high": {"loading": "eager", "fetchpriority": "high", "decoding": None},
+    "eager": {"loading": "eager", "fetchpriority": None, "decoding": None},
+    "lazy": {"loading": "lazy", "fetchpriority": None, "decoding": "async"},
+}
+
+_plans: dict[str, dict] = {}
+
+
+def local_r2_url(local: str) -> str:
+    """The URL r2-images.js requests first for a local spaces/projects path."""
+    key = r2_key(local)
+    return r2_url(key) if key and r2_base() else ""
+
+
+def r2_srcset(local_srcset: str) -> str:
+    out = []
+    for candidate in local_srcset.split(","):
+        parts = candidate.split()
+        url = local_r2_url(parts[0]) if parts else ""
+        if not url:
+            return ""
+        out.append(" ".join([url] + parts[1:]))
+    return ", ".join(out)
+
+
+def classes(tag) -> set[str]:
+    return set(tag.get("class") or [])
+
+
+def image_role(img) -> tuple[str | None, str]:
+    """("high" | "lazy" | None, reason) from the image's own markup; None = decided by position."""
+    if HIDDEN_CLASSES & classes(img):
+        return "lazy", "hidden until hover"
+    if img.find_parent(class_="image-gallery-grid"):
+        return "lazy", "masonry tile (follows the first row)"
+    if HERO_CLASSES & classes(img):
+        return "high", "hero image"
+    for parent in img.parents:
+        found = HERO_CONTAINERS & classes(parent)
+        if found:
+            return "high", "first-row image" if "first-row-grid" in found else "hero image"
+    return None, ""
+
+
+def plan_images(soup) -> list[tuple[object, str, str]]:
+    """(img, decision, reason) for every content image, in document order."""
+    plan = []
+    eager = 0
+    for block, position in body_blocks(soup):
+        if position == "nav":
+            continue
+        for img in block.find_all("img"):
+            decision, reason = image_role(img)
+            if decision is None:
+                if position == "below":
+                    decision, reason = "lazy", "below the fold"
+                elif eager < EAGER_IMAGES:
+                    decision, reason = "eager", f"above the fold (image {eager + 1} of {EAGER_IMAGES})"
+                else:
+                    decision, reason = "lazy", f"above the fold, after the first {EAGER_IMAGES} images"
+            if decision != "lazy":
+                eager += 1
+            plan.append((img, decision, reason))
+    return plan
+
+
+def apply_policy(img, decision: str) -> bool:
+    changed = False
+    for attr, value in POLICY[decision].items():
+        if value is None:
+            if attr in img.attrs:
+                del img[attr]
+                changed = True
+        elif img.get(attr) != value:
+            img[attr] = value
+            changed = True
+    return changed
+
+
+def preload_attrs(img) -> tuple[dict[str, str] | None, str]:
+    """Attributes of the LCP preload link for img, or (None, why not)."""
+    local = img.get("data-r2-local-src")
+    # Images the r2-urls pass resolved already carry their final src/srcset.
+    if local and img.get("data-r2-resolved") is None:
+        href = local_r2_url(local)
+        if not href:
+            return None, f"no R2 base in {R2_CONFIG}"
+        attrs = {"href": href}
+        if img.get("data-r2-srcset"):
+            attrs["imagesrcset"] = r2_srcset(img["data-r2-srcset"])
+    else:
+        src = img.get("src") or ""
+        if not src or src.startswith("data:"):
+            return None, "image has no src to preload"
+        attrs = {"href": src}
+        if img.get("srcset"):
+            attrs["imagesrcset"] = img["srcset"]
+    if attrs.get("imagesrcset") and img.get("sizes"):
+        attrs["imagesizes"] = img["sizes"]
+    elif "imagesrcset" in attrs and not attrs["imagesrcset"]:
+        del attrs["imagesrcset"]
+    return attrs, ""
+
+
+def set_preload(soup, attrs: dict[str, str] | None) -> bool:
+    """Replace the page's LCP preload link with one for attrs (or none)."""
+    head = soup.head
+    if head is None:
+        return False
+    old = head.find_all("link", attrs={"data-lcp-preload": True})
+    if attrs is not None:
+        wanted = {"rel": ["preload"], "as": "image", **attrs, "fetchpriority": "high", "data-lcp-preload": ""}
+        if len(old) == 1 and old[0].attrs == wanted:
+            return False
+    for link in old:
+        link.decompose()
+    if attrs is None:
+        return bool(old)
+    link = soup.new_tag("link", attrs={"rel": "preload", "as": "image", **attrs,
+                                       "fetchpriority": "high", "data-lcp-preload": ""})
+    # Ahead of the stylesheets and scripts, so the request starts as early as possible.
+    anchor = head.find(["link", "style", "script"], recursive=False)
+    if anchor is not None:
+        anchor.insert_before(link)
+        anchor.insert_before("\n")
+    else:
+        head.append(link)
+    return True
+
+
+@register_pass("image-priority", default=False)
+def image_priority(page: Page) -> bool:
+    """Set loading/fetchpriority/decoding on images and preload each page's LCP image."""
+    plan = plan_images(page.soup)
+    changed = False
+    for img, decision, _ in plan:
+        if apply_policy(img, decision):
+            changed = True
+
+    lcp = next((img for img, decision, _ in plan if decision == "high"), None) \
+        or next((img for img, decision, _ in plan if decision == "eager"), None)
+    attrs, why_not = preload_attrs(lcp) if lcp is not None else (None, "no image above the fold")
+    if set_preload(page.soup, attrs):
+        changed = True
+
+    _plans[page.rel] = {
+        "lcp": (lcp.get("data-r2-local-src") or lcp.get("src")) if lcp is not None else None,
+        "preload": attrs["href"] if attrs else None,
+        "no_preload_reason": why_not or None,
+        "images": [{"src": img.get("data-r2-local-src") or img.get("src") or "", "decision": decision,
+                    "reason": reason} for img, decision, reason in plan],
+    }
+    return changed
+
+
+def report(plans: dict[str, dict]) -> None:
+    totals = {"high": 0, "eager": 0, "lazy": 0}
+    for rel, plan in sorted(plans.items()):
+        counts = {d: sum(1 for i in plan["images"] if i["decision"] == d) for d in totals}
+        for d in totals:
+            totals[d] += counts[d]
+        lcp = plan["preload"] or f"(no preload: {plan['no_preload_reason']})"
+        print(f"{rel:<44} {counts['high']:>3} high {counts['eager']:>3} eager {counts['lazy']:>4} lazy  LCP {lcp}")
+    write_if_changed(REPORT_FILE, json.dumps(plans, indent=1, sort_keys=True) + "\n")
+    print(f"\n{len(plans)} pages: {totals['high']} high-priority, {totals['eager']} eager, "
+          f"{totals['lazy']} lazy images; "
+          f"{sum(1 for p in plans.values() if p['preload'])} LCP preloads")
+    print(f"Per-image reasons: {os.path.relpath(REPORT_FILE, DOCS_DIR)}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Apply the image loading/priority policy")
+    parser.add_argument("--apply", action="store_true", help="Rewrite the pages")
+    args = parser.parse_args()
+    import image_priority
+    import site_transforms
+
+    site_transforms.run(["image-priority"], dry_run=not args.apply, verbose=args.apply)
+    # The pass ran in the imported module (see PASS_MODULES), so its plans are there.
+    report(image_priority._plans)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
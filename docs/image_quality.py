@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Score gallery images on resolution, sharpness and compression, not file size.
+
+filter_high_res_images.py used to delete every space image under 500 KB and
+audit_image_counts.py ignored project images under 100 KB. File size says
+little on its own: a noisy 900px PNG is big, a well-compressed 3000px JPEG
+can be small. For each image this measures instead:
+
+  width, height   displayed pixels (after the EXIF orientation)
+  dpr             effective resolution on the widest 3-column desktop tile
+                  (TILE_WIDTH CSS px, from gallery_markup.py's masonry
+                  geometry): 2.0 means sharp on a retina screen
+  sharpness       Laplacian variance of the luma, at the size the image is
+                  shown at on a 2x screen (ANALYSIS_WIDTH px), taken over
+                  BLOCK px blocks; the 90th percentile block counts, so a
+                  sharp subject against a plain wall isn't marked blurred
+  quality         estimated JPEG quality (1-100): the libjpeg quality whose
+                  scaled standard luminance table best fits the file's own;
+                  null for other formats
+
+The luma is decoded at reduced size (JPEG DCT scaling) and all the maths is
+NumPy over whole arrays. Scores are cached in .build/image-quality.json,
+keyed by path and checked against size and mtime like image_index.py, and
+stale images are scored over a process pool.
+
+An image passes when dpr >= MIN_DPR, sharpness >= MIN_SHARPNESS and (for
+JPEGs) quality >= MIN_QUALITY; rejects() lists what it fails. The filter
+scripts use that in place of their size thresholds.
+
+Usage:
+  python3 image_quality.py                                 # report for assets/images/spaces and projects
+  python3 image_quality.py assets/images/spaces/bedrooms --failing
+  python3 image_quality.py --min-dpr 1.5 --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from gallery_markup import MASONRY_GAP, MASONRY_GRID_WIDTHS
+from image_index import DOCS_DIR, display_size, find_images
+from site_build import BUILD_DIR
+
+CACHE_FILE = os.path.join(BUILD_DIR, "image-quality.json")
+CACHE_VERSION = 1
+ROOTS = ["assets/images/spaces", "assets/images/projects"]
+
+# CSS width of one tile in the widest 3-column masonry grid.
+TILE_WIDTH = (MASONRY_GRID_WIDTHS[3] - 2 * MASONRY_GAP) / 3
+TARGET_DPR = 2
+ANALYSIS_WIDTH = round(TILE_WIDTH * TARGET_DPR)
+BLOCK = 32
+SHARP_PERCENTILE = 90
+
+MIN_DPR = 1.5
+MIN_SHARPNESS = 100.0
+MIN_QUALITY = 60
+
+# Table K.1 of the JPEG standard (luminance), which libjpeg scales by quality.
+STD_LUMINANCE = [
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+]
+
+_quality_tables = None
+
+
+def quality_tables():
+    """100x64 array: the luminance table libjpeg writes for quality 1..100."""
+    global _quality_tables
+    if _quality_tables is None:
+        import numpy as np
+
+        q = np.arange(1, 101, dtype=np.float64)[:, None]
+        scale = np.where(q < 50, 5000 / q, 200 - 2 * q)
+        _quality_tables = np.clip(np.floor((np.array(STD_LUMINANCE) * scale + 50) / 100), 1, 255)
+    return _quality_tables
+
+
+def jpeg_quality(qtables: dict) -> int | None:
+    """Closest libjpeg quality for the file's luminance table (in natural order, as Pillow gives it)."""
+    import numpy as np
+
+    table = qtables.get(0) if qtables else None
+    if table is None or len(table) != 64:
+        return None
+    # Compare in log space: a step of 1 matters at q=95, not at q=20.
+    error = np.abs(np.log(quality_tables()) - np.log(np.maximum(np.array(table, dtype=np.float64), 1))).sum(axis=1)
+    return int(np.argmin(error)) + 1
+
+
+def sharpness(luma) -> float:
+    """90th-percentile, per-block variance of the 4-neighbour Laplacian of a 2-D luma array."""
+    import numpy as np
+
+    lap = (luma[:-2, 1:-1] + luma[2:, 1:-1] + luma[1:-1, :-2] + luma[1:-1, 2:] - 4 * luma[1:-1, 1:-1])
+    h, w = (lap.shape[0] // BLOCK) * BLOCK, (lap.shape[1] // BLOCK) * BLOCK
+    if not h or not w:
+        return float(lap.var()) if lap.size else 0.0
+    blocks = lap[:h, :w].reshape(h // BLOCK, BLOCK, w // BLOCK, BLOCK).swapaxes(1, 2).reshape(-1, BLOCK * BLOCK)
+    return float(np.percentile(blocks.var(axis=1), SHARP_PERCENTILE))
+
+
+def score(rel_path: str) -> dict:
+    """Worker: measure one image."""
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    path = os.path.join(DOCS_DIR, rel_path)
+    st = os.stat(path)
+    with Image.open(path) as im:
+        orientation = int(im.getexif().get(0x0112, 1) or 1)
+        width, height = display_size({"width": im.width, "height": im.height, "orientation": orientation})
+        quality = jpeg_quality(getattr(im, "quantization", None)) if im.format == "JPEG" else None
+        # Decode at reduced size where the format allows, then bring it to the analysis width.
+        target = min(ANALYSIS_WIDTH, width)
+        im.draft("L", (target, max(1, round(height * target / width))))
+        gray = ImageOps.exif_transpose(im).convert("L")
+    if gray.width > target:
+        gray = gray.resize((target, max(1, round(gray.height * target / gray.width))), Image.LANCZOS)
+    luma = np.asarray(gray, dtype=np.float32)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "width": width,
+        "height": height,
+        "dpr": round(width / TILE_WIDTH, 2),
+        "sharpness": round(sharpness(luma), 1),
+        "quality": quality,
+    }
+
+
+def _score_safe(rel_path: str) -> dict | str:
+    try:
+        return score(rel_path)
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+def rejects(entry: dict, min_dpr: float = MIN_DPR, min_sharpness: float = MIN_SHARPNESS,
+            min_quality: int = MIN_QUALITY) -> list[str]:
+    """Why an image fails the gate (empty if it passes)."""
+    reasons = []
+    if entry["dpr"] < min_dpr:
+        reasons.append(f"{entry['width']}px wide = {entry['dpr']:.2f}x on a {TILE_WIDTH:.0f}px tile")
+    if entry["sharpness"] < min_sharpness:
+        reasons.append(f"blurred (sharpness {entry['sharpness']:.0f} < {min_sharpness:.0f})")
+    if entry["quality"] is not None and entry["quality"] < min_quality:
+        reasons.append(f"JPEG quality ~{entry['quality']}")
+    return reasons
+
+
+def _load_cache() -> dict[str, dict]:
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    settings = {"analysis_width": ANALYSIS_WIDTH, "block": BLOCK, "percentile": SHARP_PERCENTILE}
+    if data.get("version") != CACHE_VERSION or data.get("settings") != settings:
+        return {}
+    return data.get("images", {})
+
+
+def _save_cache(images: dict[str, dict]) -> None:
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    settings = {"analysis_width": ANALYSIS_WIDTH, "block": BLOCK, "percentile": SHARP_PERCENTILE}
+    tmp = CACHE_FILE + ".__tmp__"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "settings": settings, "images": images}, f,
+                  sort_keys=True, separators=(",", ":"))
+        f.write("\n")
+    os.replace(tmp, CACHE_FILE)
+
+
+def _is_current(entry: dict | None, rel_path: str) -> bool:
+    if not entry:
+        return False
+    try:
+        st = os.stat(os.path.join(DOCS_DIR, rel_path))
+    except FileNotFoundError:
+        return False
+    return entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+
+def scores(paths: list[str], jobs: int | None = None, verbose: bool = False) -> dict[str, dict]:
+    """Scores for paths (relative to docs/, or files/folders to scan), from the cache where current."""
+    rel_paths = find_images(paths)
+    cache = _load_cache()
+    stale = [p for p in rel_paths if not _is_current(cache.get(p), p)]
+    failed = 0
+    if stale:
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and len(stale) > 4:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(_score_safe, stale, chunksize=4))
+        else:
+            results = [_score_safe(p) for p in stale]
+        for rel_path, entry in zip(stale, results):
+            if isinstance(entry, str):
+                failed += 1
+                if verbose:
+                    print(f"✗ {rel_path}: {entry}")
+                continue
+            cache[rel_path] = entry
+        _save_cache(cache)
+    if verbose:
+        print(f"{len(rel_paths)} images, {len(stale) - failed} scored, {failed} failed")
+    return {p: cache[p] for p in rel_paths if p in cache}
+
+
+def score_one(path: str) -> dict | None:
+    """Score for a single image (relative to docs/ or absolute), via the cache. None if unreadable."""
+    return next(iter(scores([path], jobs=1).values()), None)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Score images on resolution, sharpness and JPEG quality")
+    parser.add_argument("paths", nargs="*", help=f"Folders/files relative to docs/ (default: {', '.join(ROOTS)})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--min-dpr", type=float, default=MIN_DPR)
+    parser.add_argument("--min-sharpness", type=float, default=MIN_SHARPNESS)
+    parser.add_argument("--min-quality", type=int, default=MIN_QUALITY)
+    parser.add_argument("--failing", action="store_true", help="List only the images that fail")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = scores(args.paths or ROOTS, jobs=args.jobs, verbose=True)
+    folders: dict[str, list[int]] = {}
+    for rel_path, entry in sorted(results.items()):
+        reasons = rejects(entry, args.min_dpr, args.min_sharpness, args.min_quality)
+        totals = folders.setdefault(os.path.dirname(rel_path), [0, 0])
+        totals[0] += 1
+        totals[1] += bool(reasons)
+        if reasons or not args.failing:
+            quality = f"q{entry['quality']}" if entry["quality"] is not None else "-"
+            print(f"{'✗' if reasons else '✓'} {rel_path:<70} {entry['width']:>5}x{entry['height']:<5} "
+                  f"{entry['dpr']:>5.2f}x {entry['sharpness']:>7.0f} {quality:>4}  {'; '.join(reasons)}")
+
+    print(f"\n{'folder':<50} {'images':>6} {'failing':>7}")
+    for folder, (count, failing) in sorted(folders.items()):
+        print(f"{folder:<50} {count:>6} {failing:>7}")
+    failing = sum(f for _, f in folders.values())
+    print(f"\n{len(results)} images, {failing} fail the gate (dpr >= {args.min_dpr}, sharpness >= "
+          f"{args.min_sharpness:.0f}, JPEG quality >= {args.min_quality}) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Generate responsive variants for every gallery image.
+
+For each image under assets/images/projects and assets/images/spaces this
+writes a width ladder (480/800/1200/1600/2000, never upscaled) in WebP and
+AVIF plus a progressive JPEG fallback, next to the source:
+
+  assets/images/projects/ronda/ronda-1.jpg
+  assets/images/projects/ronda/_variants/ronda-1-480w.webp
+  assets/images/projects/ronda/_variants/ronda-1-480w.avif
+  assets/images/projects/ronda/_variants/ronda-1-480w.jpg
+  ...
+
+Each entry also carries "lqip": a LQIP_WIDTH-pixel-wide preview of the
+image as a base64 WebP (JPEG without WebP support) data URI, a few hundred
+bytes. gallery_markup.py uses it as the placeholder src of R2-managed images,
+so galleries paint a blurred version of every photo while the real one loads.
+
+Work is spread over a process pool. Sources whose content hash (taken from
+the image index, see image_index.py) and ladder/format settings match the
+previous run are skipped. The results are
+recorded in .build/image-variants.json, which page generators read through
+load_manifest()/srcset_for() to write srcset/sizes.
+
+The _variants folders sit inside the R2 spaces/ and projects/ prefixes so
+they upload with the originals (r2-images.js maps them the same way).
+
+Usage:
+  python3 image_variants.py
+  python3 image_variants.py --formats webp,jpeg --jobs 4
+  python3 image_variants.py assets/images/projects/ronda
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from image_index import ImageIndex
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIRS = ["assets/images/projects", "assets/images/spaces"]
+MANIFEST_FILE = os.path.join(DOCS_DIR, ".build", "image-variants.json")
+MANIFEST_VERSION = 1
+
+VARIANT_DIR = "_variants"
+WIDTHS = (480, 800, 1200, 1600, 2000)
+FORMATS = ("avif", "webp", "jpeg")
+EXTENSIONS = {"avif": ".avif", "webp": ".webp", "jpeg": ".jpg"}
+QUALITY = {"avif": 55, "webp": 78, "jpeg": 82}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+
+
+def find_sources(roots: list[str]) -> list[str]:
+    """Return source images (paths relative to docs/) under the given roots."""
+    found: list[str] = []
+    for root in roots:
+        abs_root = os.path.join(DOCS_DIR, root)
+        if os.path.isfile(abs_root):
+            found.append(os.path.relpath(abs_root, DOCS_DIR).replace(os.sep, "/"))
+            continue
+        for dirpath, dirs, files in os.walk(abs_root):
+            dirs[:] = sorted(d for d in dirs if d != VARIANT_DIR and not d.startswith("."))
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    rel = os.path.relpath(os.path.join(dirpath, name), DOCS_DIR)
+                    found.append(rel.replace(os.sep, "/"))
+    return found
+
+
+def variant_path(src_rel: str, width: int, fmt: str) -> str:
+    folder, name = os.path.split(src_rel)
+    stem = os.path.splitext(name)[0]
+    return f"{folder}/{VARIANT_DIR}/{stem}-{width}w{EXTENSIONS[fmt]}"
+
+
+def ladder(width: int, widths: tuple[int, ...] = WIDTHS) -> list[int]:
+    """Widths to generate for a source of the given width (no upscaling)."""
+    steps = [w for w in widths if w < width]
+    if not steps or width <= widths[-1]:
+        steps.append(width)
+    return sorted(set(steps))
+
+
+def lqip(im) -> str:
+    """Tiny preview of an (upright, RGB/L) image as a data URI; browsers upscale it smoothly."""
+    from PIL import Image, features
+
+    width, height = im.size
+    small = im.resize((LQIP_WIDTH, max(1, round(height * LQIP_WIDTH / width))), Image.BOX)
+    buf = io.BytesIO()
+    if features.check("webp"):
+        small.save(buf, "WEBP", quality=LQIP_QUALITY, method=6)
+        mime = "image/webp"
+    else:
+        small.save(buf, "JPEG", quality=LQIP_QUALITY, optimize=True)
+        mime = "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(buf.getvalue()).decode('ascii')}"
+
+
+def build_variants(src_rel: str, widths: tuple[int, ...], formats: tuple[str, ...]) -> dict:
+    """Worker: write every variant for one source image and return its manifest entry."""
+    from PIL import Image, ImageOps
+
+    src = os.path.join(DOCS_DIR, src_rel)
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        width, height = im.size
+        preview = lqip(im)
+
+        variants: dict[str, list] = {fmt: [] for fmt in formats}
+        current = im
+        # Largest first so each step resamples from the previous, smaller image.
+        for w in sorted(ladder(width, widths), reverse=True):
+            h = max(1, round(height * w / width))
+            if current.size != (w, h):
+                current = current.resize((w, h), Image.LANCZOS)
+            for fmt in formats:
+                rel = variant_path(src_rel, w, fmt)
+                out = os.path.join(DOCS_DIR, rel)
+                os.makedirs(os.path.dirname(out), exist_ok=True)
+                tmp = out + ".__tmp__"
+                if fmt == "jpeg":
+                    current.save(tmp, "JPEG", quality=QUALITY[fmt], optimize=True, progressive=True)
+                elif fmt == "webp":
+                    current.save(tmp, "WEBP", quality=QUALITY[fmt], method=5)
+                else:
+                    current.save(tmp, "AVIF", quality=QUALITY[fmt])
+                os.replace(tmp, out)
+                variants[fmt].append([w, rel, os.path.getsize(out)])
+
+    for fmt in variants:
+        variants[fmt].sort()
+    return {"width": width, "height": height, "variants": variants, "lqip": preview}
+
+
+def load_manifest(path: str = MANIFEST_FILE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": MANIFEST_VERSION, "images": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "images": {}}
+    return manifest
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_FILE) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".__tmp__"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def srcset_for(entry: dict, fmt: str = "webp", prefix: str = "") -> str:
+    """Build a srcset string for one manifest entry; prefix is the page's "../" depth."""
+    return ", ".join(f"{prefix}{rel} {width}w" for width, rel, _ in entry.get("variants", {}).get(fmt, []))
+
+
+def is_current(entry: dict | None, digest: str, settings: dict) -> bool:
+    if not entry or entry.get("hash") != digest or entry.get("settings") != settings:
+        return False
+    return all(os.path.exists(os.path.join(DOCS_DIR, rel))
+               for candidates in entry["variants"].values() for _, rel, _ in candidates)
+
+
+def available_formats(requested: tuple[str, ...]) -> tuple[str, ...]:
+    from PIL import features
+
+    formats = []
+    for fmt in requested:
+        if fmt in ("webp", "avif") and not features.check(fmt):
+            print(f"⚠ Pillow has no {fmt.upper()} support here; skipping {fmt}", file=sys.stderr)
+            continue
+        formats.append(fmt)
+    return tuple(formats)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate responsive image variants")
+    parser.add_argument("paths", nargs="*", help="Folders/files relative to docs/ (default: projects + spaces)")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--widths", default=",".join(str(w) for w in WIDTHS))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Regenerate even if the source is unchanged")
+    args = parser.parse_args()
+
+    formats = available_formats(tuple(f.strip() for f in args.formats.split(",") if f.strip()))
+    widths = tuple(sorted(int(w) for w in args.widths.split(",")))
+    settings = {"widths": list(widths), "formats": list(formats), "quality": QUALITY,
+                "lqip": [LQIP_WIDTH, LQIP_QUALITY]}
+
+    started = time.perf_counter()
+    manifest = load_manifest()
+    images = manifest["images"]
+    sources = find_sources(args.paths or SOURCE_DIRS)
+
+    with ImageIndex() as index:
+        index.update(args.paths or SOURCE_DIRS, jobs=args.jobs)
+    todo: list[tuple[str, str]] = []
+    for src_rel in sources:
+        digest = index.images.get(src_rel, {}).get("sha256", "")
+        if not args.force and is_current(images.get(src_rel), digest, settings):
+            continue
+        todo.append((src_rel, digest))
+
+    print(f"{len(sources)} source images, {len(todo)} need variants")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(build_variants, src_rel, widths, formats): (src_rel, digest)
+                   for src_rel, digest in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            src_rel, digest = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"✗ {src_rel}: {e}")
+                failed += 1
+                continue
+            entry["hash"] = digest
+            entry["settings"] = settings
+            images[src_rel] = entry
+            print(f"✓ [{done}/{len(todo)}] {src_rel} ({entry['width']}x{entry['height']})")
+
+    # Forget sources that no longer exist (only within the scanned roots).
+    scanned = set(sources)
+    roots = tuple(r.rstrip("/") + "/" for r in (args.paths or SOURCE_DIRS))
+    for src_rel in list(images):
+        if src_rel.startswith(roots) and src_rel not in scanned:
+            del images[src_rel]
+
+    save_manifest(manifest)
+
+    original = variant_bytes = previews = preview_bytes = 0
+    for src_rel in sources:
+        entry = images.get(src_rel)
+        if not entry:
+            continue
+        original += os.path.getsize(os.path.join(DOCS_DIR, src_rel))
+        smallest = min((c[2] for c in entry["variants"].get("webp", entry["variants"].get("jpeg", []))),
+                       default=0)
+        variant_bytes += smallest
+        if entry.get("lqip"):
+            previews += 1
+            preview_bytes += len(entry["lqip"])
+
+    print(f"\n{'=' * 60}")
+    print(f"Done in {time.perf_counter() - started:.1f}s, {failed} failed")
+    if original:
+        print(f"Originals: {original / 1e6:.1f} MB; smallest variants: {variant_bytes / 1e6:.1f} MB")
+    if previews:
+        print(f"Placeholders: {previews} previews, {preview_bytes // previews} bytes each on average")
+    print(f"Manifest: {os.path.relpath(MANIFEST_FILE, DOCS_DIR)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Losslessly shrink the gallery JPEGs before they go to R2.
+
+The photography under assets/images (Annie_Meisel_Photography_* and the
+rest) carries camera EXIF, XMP, Photoshop blocks, embedded thumbnails and
+comments, and most files use the encoder's stock Huffman tables. Browsers
+need none of that except two things:
+
+  orientation    the EXIF Orientation tag, kept as a one-tag EXIF block
+                 (dropped when it is 1, upright)
+  colour         the ICC profile (APP2 ICC_PROFILE chunks), kept byte for
+                 byte, plus the JFIF and Adobe headers that tell a decoder
+                 how to read the colour channels
+
+Everything else before the first scan goes, and so does anything after the
+end-of-image marker (MPF preview images). When jpegtran (libjpeg-turbo or
+mozjpeg) is on the PATH, the image data is also re-encoded losslessly as a
+progressive JPEG with optimized Huffman tables (`-copy none -optimize
+-progressive`) and the two kept blocks are put back. Without it only the
+metadata is stripped; the DCT coefficients are never touched either way.
+
+Each result is decoded and compared pixel for pixel, orientation and ICC
+profile with the original, and only written (atomically) if it is smaller.
+Files are processed over a process pool.
+
+The pass is idempotent through the image index: .build/jpeg-optimize.json
+records the SHA-256 each file had after it was processed, and a file whose
+current hash in the index matches is skipped. Files recorded as stripped
+only are processed again once jpegtran is available.
+
+A rewritten file decodes to the same pixels, so its responsive variants
+(image_variants.py) are still right; their manifest entry is moved to the
+new hash instead of letting the next variant run rebuild them.
+
+Run it before r2_sync.py (or use r2_sync.py --optimize-jpegs) so only the
+smaller files are uploaded.
+
+Usage:
+  python3 jpeg_optimize.py                          # assets/images/spaces and projects
+  python3 jpeg_optimize.py assets/images/projects --dry-run
+  python3 jpeg_optimize.py --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from image_index import DOCS_DIR, ImageIndex
+from image_variants import load_manifest, save_manifest
+from site_build import BUILD_DIR
+
+STATE_FILE = os.path.join(BUILD_DIR, "jpeg-optimize.json")
+STATE_VERSION = 1
+ROOTS = ["assets/images/spaces", "assets/images/projects"]
+JPEG_EXTENSIONS = (".jpg", ".jpeg")
+JPEGTRAN_ARGS = ["-copy", "none", "-optimize", "-progressive"]
+# A file recorded with a lesser tool is worth another pass with a better one.
+TOOL_RANK = {"strip": 0, "jpegtran": 1}
+
+SOI, EOI, SOS = 0xD8, 0xD9, 0xDA
+APP0, APP1, APP2, APP14, COM = 0xE0, 0xE1, 0xE2, 0xEE, 0xFE
+ORIENTATION_TAG = 0x0112
+
+
+# ---------------------------------------------------------------------------
+# JPEG structure
+# ---------------------------------------------------------------------------
+
+def parse(data: bytes) -> tuple[list[tuple[int, bytes]], bytes]:
+    """(header segments before the first SOS as (marker, whole segment), SOS..EOI inclusive)."""
+    if data[:2] != b"\xff\xd8":
+        raise ValueError("not a JPEG (no SOI marker)")
+    segments: list[tuple[int, bytes]] = []
+    pos = 2
+    while True:
+        if pos + 4 > len(data) or data[pos] != 0xFF:
+            raise ValueError(f"bad marker at byte {pos}")
+        while data[pos + 1] == 0xFF:  # fill bytes
+            pos += 1
+        marker = data[pos + 1]
+        if marker == SOS:
+            break
+        if marker == EOI:
+            raise ValueError("no image data (EOI before SOS)")
+        length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+        segments.append((marker, data[pos:pos + 2 + length]))
+        pos += 2 + length
+
+    # Walk the scans to EOI: inside entropy-coded data 0xFF is only ever followed
+    # by a stuffed 0x00 or a restart marker; any other marker segment (DHT and
+    # SOS between progressive scans) is skipped by its length.
+    start = pos
+    pos = pos + 2 + struct.unpack(">H", data[pos + 2:pos + 4])[0]
+    while True:
+        pos = data.find(b"\xff", pos)
+        if pos < 0 or pos + 1 >= len(data):
+            raise ValueError("truncated JPEG (no EOI marker)")
+        marker = data[pos + 1]
+        if marker == 0x00 or 0xD0 <= marker <= 0xD7:
+            pos += 2
+        elif marker == 0xFF:
+            pos += 1
+        elif marker == EOI:
+            return segments, data[start:pos + 2]
+        else:
+            pos += 2 + struct.unpack(">H", data[pos + 2:pos + 4])[0]
+
+
+def is_icc(marker: int, segment: bytes) -> bool:
+    return marker == APP2 and segment[4:16] == b"ICC_PROFILE\x00"
+
+
+def keep(marker: int, segment: bytes) -> bool:
+    """Whether a header segment is needed to decode and display the image the same way."""
+    if marker == APP0:
+        return segment[4:9] == b"JFIF\x00"
+    if marker == APP14:
+        return segment[4:9] == b"Adobe"
+    if marker == APP2:
+        return is_icc(marker, segment)
+    return not (0xE0 <= marker <= 0xEF or marker == COM)
+
+
+def orientation_segment(orientation: int) -> bytes:
+    """APP1 EXIF block holding nothing but the Orientation tag (big-endian TIFF, one IFD entry)."""
+    tiff = b"MM\x00\x2a" + struct.pack(">I", 8)
+    tiff += struct.pack(">H", 1) + struct.pack(">HHIHH", ORIENTATION_TAG, 3, 1, orientation, 0)
+    tiff += struct.pack(">I", 0)
+    payload = b"Exif\x00\x00" + tiff
+    return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+
+def assemble(data: bytes, orientation: int, icc: list[bytes]) -> bytes:
+    """data without its metadata, with the orientation and ICC blocks put back after JFIF."""
+    segments, scan = parse(data)
+    kept = [(m, s) for m, s in segments if keep(m, s) and not is_icc(m, s)]
+    out = [b"\xff\xd8"]
+    out += [s for m, s in kept if m == APP0]
+    if 2 <= orientation <= 8:
+        out.append(orientation_segment(orientation))
+    out += icc
+    out += [s for m, s in kept if m != APP0]
+    out.append(scan)
+    return b"".join(out)
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _decoded(data: bytes) -> tuple:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as im:
+        orientation = int(im.getexif().get(ORIENTATION_TAG, 1) or 1)
+        icc = im.info.get("icc_profile")
+        im.load()
+        return im.mode, im.size, orientation, icc, im.tobytes()
+
+
+def optimize_one(rel_path: str, jpegtran: str | None = None, dry_run: bool = False) -> dict:
+    """Worker: shrink one JPEG in place. Returns before/after sizes and the file's hash afterwards."""
+    path = os.path.join(DOCS_DIR, rel_path)
+    with open(path, "rb") as f:
+        original = f.read()
+    reference = _decoded(original)
+    orientation = reference[2]
+    icc = [s for m, s in parse(original)[0] if is_icc(m, s)]
+
+    candidates = [assemble(original, orientation, icc)]
+    if jpegtran:
+        run = subprocess.run([jpegtran, *JPEGTRAN_ARGS], input=original, capture_output=True)
+        # Arithmetic-coded or otherwise unusual files: keep the stripped version.
+        if run.returncode == 0 and run.stdout:
+            candidates.append(assemble(run.stdout, orientation, icc))
+    best = original
+    for data in candidates:
+        if len(data) < len(best) and _decoded(data) == reference:
+            best = data
+
+    if best is not original and not dry_run:
+        tmp = path + ".__tmp__"
+        with open(tmp, "wb") as f:
+            f.write(best)
+        os.replace(tmp, path)
+    return {
+        "before": len(original),
+        "after": len(best),
+        "original_sha256": hashlib.sha256(original).hexdigest(),
+        "sha256": hashlib.sha256(best).hexdigest(),
+        "tool": "jpegtran" if jpegtran else "strip",
+    }
+
+
+def _optimize_safe(args: tuple[str, str | None, bool]) -> dict | str:
+    try:
+        return optimize_one(*args)
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+# ---------------------------------------------------------------------------
+# Pass
+# ---------------------------------------------------------------------------
+
+def _load_state() -> dict[str, dict]:
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data.get("images", {}) if data.get("version") == STATE_VERSION else {}
+
+
+def _save_state(images: dict[str, dict]) -> None:
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp = STATE_FILE + ".__tmp__"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_VERSION, "images": images}, f, sort_keys=True, separators=(",", ":"))
+        f.write("\n")
+    os.replace(tmp, STATE_FILE)
+
+
+def refresh_variant_hashes(rewritten: dict[str, tuple[str, str]]) -> int:
+    """Point variant manifest entries at the new hash of files rewritten with identical pixels.
+
+    rewritten maps path -> (hash before, hash after). Entries built from some
+    other version of the file are left alone. Returns the entries updated.
+    """
+    manifest = load_manifest()
+    updated = 0
+    for rel_path, (before, after) in rewritten.items():
+        entry = manifest["images"].get(rel_path)
+        if entry and entry.get("hash") == before:
+            entry["hash"] = after
+            updated += 1
+    if updated:
+        save_manifest(manifest)
+    return updated
+
+
+def optimize(roots: list[str] | None = None, jobs: int | None = None, dry_run: bool = False,
+             verbose: bool = False) -> dict[str, list[int]]:
+    """Run the pass over roots. Returns folder -> [jpegs, optimized, skipped, bytes before, bytes after]."""
+    roots = roots or ROOTS
+    jpegtran = shutil.which("jpegtran")
+    tool = "jpegtran" if jpegtran else "strip"
+    if not jpegtran and verbose:
+        print("⚠ jpegtran not found: stripping metadata only "
+              "(install libjpeg-turbo or mozjpeg for optimized Huffman tables and progressive scans)")
+
+    state = _load_state()
+    with ImageIndex() as index:
+        paths = [p for p in index.update(roots, jobs=jobs) if p.lower().endswith(JPEG_EXTENSIONS)]
+        hashes = {p: index.images[p]["sha256"] for p in paths if p in index.images}
+
+    def done(rel_path: str) -> bool:
+        record = state.get(rel_path)
+        return bool(record) and record["sha256"] == hashes.get(rel_path) \
+            and TOOL_RANK[record["tool"]] >= TOOL_RANK[tool]
+
+    todo = [p for p in paths if not done(p)]
+    jobs = jobs or os.cpu_count() or 1
+    work = [(p, jpegtran, dry_run) for p in todo]
+    if jobs > 1 and len(work) > 4:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(_optimize_safe, work, chunksize=2))
+    else:
+        results = [_optimize_safe(w) for w in work]
+
+    folders: dict[str, list[int]] = {}
+    for rel_path in paths:
+        folders.setdefault(os.path.dirname(rel_path), [0, 0, 0, 0, 0])[0] += 1
+    failed = 0
+    rewritten: dict[str, tuple[str, str]] = {}
+    for rel_path, result in zip(todo, results):
+        totals = folders[os.path.dirname(rel_path)]
+        if isinstance(result, str):
+            failed += 1
+            print(f"✗ {rel_path}: {result}")
+            continue
+        if result["after"] < result["before"]:
+            totals[1] += 1
+            rewritten[rel_path] = (result["original_sha256"], result["sha256"])
+        totals[3] += result["before"]
+        totals[4] += result["after"]
+        state[rel_path] = {"sha256": result["sha256"], "tool": result["tool"],
+                           "before": result["before"], "after": result["after"]}
+    for rel_path in paths:
+        if rel_path not in todo:
+            folders[os.path.dirname(rel_path)][2] += 1
+
+    if not dry_run:
+        prefixes = tuple(r.rstrip("/") + "/" for r in roots)
+        present = set(paths)
+        for rel_path in list(state):
+            if rel_path.startswith(prefixes) and rel_path not in present:
+                del state[rel_path]
+        _save_state(state)
+        refreshed = refresh_variant_hashes(rewritten)
+        if verbose and refreshed:
+            print(f"Kept the variants of {refreshed} rewritten JPEGs (same pixels, new hash)")
+    if verbose:
+        print(f"{len(paths)} JPEGs, {len(todo) - failed} processed, {len(paths) - len(todo)} already done, "
+              f"{failed} failed")
+    return folders
+
+
+def report(folders: dict[str, list[int]]) -> int:
+    """Print bytes saved per folder; returns the total saved."""
+    print(f"\n{'folder':<50} {'jpegs':>5} {'smaller':>7} {'skipped':>7} {'before MB':>9} {'after MB':>8} "
+          f"{'saved MB':>8} {'saved':>6}")
+    total = [0, 0, 0, 0, 0]
+    for folder, row in sorted(folders.items()):
+        total = [a + b for a, b in zip(total, row)]
+        if row[0]:
+            _report_row(folder, row)
+    _report_row("total", total)
+    return total[3] - total[4]
+
+
+def _report_row(label: str, row: list[int]) -> None:
+    jpegs, smaller, skipped, before, after = row
+    percent = f"{100 * (before - after) / before:.1f}%" if before else "-"
+    print(f"{label:<50} {jpegs:>5} {smaller:>7} {skipped:>7} {before / 1e6:>9.1f} {after / 1e6:>8.1f} "
+          f"{(before - after) / 1e6:>8.2f} {percent:>6}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Losslessly recompress gallery JPEGs and strip their metadata")
+    parser.add_argument("paths", nargs="*", help=f"Folders relative to docs/ (default: {', '.join(ROOTS)})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dry-run", action="store_true", help="Report the savings without writing files")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    folders = optimize(args.paths or None, jobs=args.jobs, dry_run=args.dry_run, verbose=True)
+    saved = report(folders)
+    print(f"\n{'Would save' if args.dry_run else 'Saved'} {saved / 1e6:.2f} MB "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
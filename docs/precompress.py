@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Write Brotli and gzip siblings for every text file of the published site.
+
+Hosts that serve precompressed files (nginx gzip_static/brotli_static,
+Caddy precompressed, Netlify/Cloudflare Pages) pick <file>.br or <file>.gz
+when the browser accepts it, instead of compressing on the fly at a low
+level for every request. Compressing once at build time lets us use the
+slowest, smallest settings:
+
+  .br   Brotli quality 11, 16 MB window, text mode
+  .gz   gzip level 9, no timestamp (so rebuilds are byte-identical)
+
+Every .html, .css, .js, .svg and .json file under the output tree
+(.build/site from fingerprint_assets.py by default) is compressed in a
+process pool. The SHA-256 of each source is kept in
+.build/precompress-state.json; files whose hash is unchanged and whose
+siblings exist are skipped. A sibling that would not be smaller than the
+file itself isn't written (and an old one is removed), and siblings whose
+source no longer exists are deleted.
+
+The report groups the results by page family (site_transforms.page_family)
+for pages, and by file type for assets.
+
+Usage:
+  python3 fingerprint_assets.py && python3 precompress.py
+  python3 precompress.py --root . --jobs 4     # compress docs/ in place
+  python3 precompress.py --force               # ignore the state file
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import brotli
+
+from fingerprint_assets import OUT_DIR
+from site_build import BUILD_DIR, DOCS_DIR, write_if_changed
+from site_transforms import page_family
+
+STATE_FILE = os.path.join(BUILD_DIR, "precompress-state.json")
+EXTENSIONS = {".html", ".css", ".js", ".svg", ".json"}
+SUFFIXES = (".br", ".gz")
+BROTLI_WINDOW = 24
+
+
+def text_files(root: str) -> list[str]:
+    """Paths (relative to root) of every file to compress."""
+    found = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                found.append(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/"))
+    return found
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_bytes(path: str, data: bytes) -> None:
+    tmp = path + ".__tmp__"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def compress_file(path: str) -> tuple[str, int, int, int]:
+    """Write path.br and path.gz. Returns (sha256, size, brotli size, gzip size); 0 = not written."""
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = {}
+    encoded = {
+        ".br": brotli.compress(data, mode=brotli.MODE_TEXT, quality=11, lgwin=BROTLI_WINDOW),
+        ".gz": gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    for suffix, packed in encoded.items():
+        if len(packed) < len(data):
+            write_bytes(path + suffix, packed)
+            sizes[suffix] = len(packed)
+        else:
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
+            sizes[suffix] = 0
+    return hashlib.sha256(data).hexdigest(), len(data), sizes[".br"], sizes[".gz"]
+
+
+def file_group(rel: str) -> str:
+    if rel.endswith(".html"):
+        return page_family(rel)
+    return os.path.splitext(rel)[1][1:].lower()
+
+
+def remove_orphans(root: str) -> int:
+    """Delete .br/.gz files whose source is gone."""
+    removed = 0
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith((".", "_"))]
+        for name in files:
+            stem, suffix = os.path.splitext(name)
+            if suffix in SUFFIXES and os.path.splitext(stem)[1].lower() in EXTENSIONS \
+                    and stem not in files:
+                os.remove(os.path.join(dirpath, name))
+                removed += 1
+    return removed
+
+
+def load_state(root: str) -> dict[str, list]:
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return state.get(root, {})
+
+
+def save_state(root: str, entries: dict[str, list]) -> None:
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        state = {}
+    state[root] = entries
+    write_if_changed(STATE_FILE, json.dumps(state, indent=1, sort_keys=True) + "\n")
+
+
+def is_current(path: str, entry: list | None, digest: str) -> bool:
+    """The siblings recorded in entry ([sha256, size, br, gz]) are still there for this content."""
+    if not entry or entry[0] != digest:
+        return False
+    return all(os.path.isfile(path + suffix) for suffix, size in zip(SUFFIXES, entry[2:]) if size)
+
+
+def precompress(root: str = OUT_DIR, jobs: int | None = None, force: bool = False,
+                verbose: bool = True) -> dict[str, list]:
+    """Compress every text file under root. Returns rel path -> [sha256, size, br size, gz size]."""
+    started = time.perf_counter()
+    jobs = jobs or os.cpu_count() or 1
+    if not os.path.isdir(root):
+        raise SystemExit(f"{root} doesn't exist; run fingerprint_assets.py first (or pass --root)")
+    state_key = os.path.relpath(root, DOCS_DIR).replace(os.sep, "/")
+    previous = {} if force else load_state(state_key)
+
+    files = text_files(root)
+    entries: dict[str, list] = {}
+    stale = []
+    for rel in files:
+        if is_current(os.path.join(root, rel), previous.get(rel), file_digest(os.path.join(root, rel))):
+            entries[rel] = previous[rel]
+        else:
+            stale.append(rel)
+
+    if stale:
+        paths = [os.path.join(root, rel) for rel in stale]
+        if len(stale) > 4 and jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = list(pool.map(compress_file, paths, chunksize=4))
+        else:
+            results = [compress_file(path) for path in paths]
+        entries.update((rel, list(result)) for rel, result in zip(stale, results))
+    removed = remove_orphans(root)
+    save_state(state_key, entries)
+
+    if verbose:
+        report(entries)
+        print(f"\n{len(files)} files: {len(stale)} compressed, {len(files) - len(stale)} unchanged, "
+              f"{removed} orphaned siblings removed in {time.perf_counter() - started:.1f}s")
+    return entries
+
+
+def report(entries: dict[str, list]) -> None:
+    groups: dict[str, list[int]] = {}
+    for rel, (_, size, br, gz) in entries.items():
+        totals = groups.setdefault(file_group(rel), [0, 0, 0, 0])
+        totals[0] += 1
+        totals[1] += size
+        totals[2] += br or size
+        totals[3] += gz or size
+
+    print(f"{'group':<10} {'files':>5} {'original':>11} {'gzip':>10} {'brotli':>10} {'br vs gz':>9}")
+    for group, (count, size, br, gz) in sorted(groups.items(), key=lambda kv: -kv[1][1]):
+        print(f"{group:<10} {count:>5} {size:>11,} {gz:>10,} {br:>10,} {(gz - br) / gz if gz else 0:>9.1%}")
+    count, size, br, gz = (sum(g[i] for g in groups.values()) for i in range(4))
+    if size:
+        print(f"{'total':<10} {count:>5} {size:>11,} {gz:>10,} {br:>10,} {(gz - br) / gz if gz else 0:>9.1%}")
+        print(f"Brotli transfers {br / size:.1%} of the original bytes, gzip {gz / size:.1%}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write .br and .gz siblings for the site's text files")
+    parser.add_argument("--root", default=OUT_DIR, help="Tree to compress (default: .build/site)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Recompress files even if unchanged")
+    args = parser.parse_args()
+    precompress(os.path.abspath(args.root), jobs=args.jobs, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
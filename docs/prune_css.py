@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Write per-family stylesheets with the rules no page of the family can use removed.
+
+style.css, invero-about.css and spaces-masonry.css carry rules from several
+redesigns (the old .nav-links menu, the gray project tags, ...). For every
+page family this collects what the family's pages actually contain:
+- element names, classes and ids in the HTML,
+- classes and ids that scripts add at runtime: classList.add/toggle/remove,
+  className/id assignments and class="..." in HTML strings, from
+  assets/js/*.js and the pages' inline scripts,
+- SAFELIST, for anything added in ways the scan can't see.
+
+A rule is kept if any of its selectors only needs elements, classes and ids
+from that set (interaction states and pseudo-elements don't count), so
+pruning errs on the side of keeping rules. @font-face rules are always kept,
+and so is every @keyframes animation used by a kept rule.
+
+Output: assets/css/pruned/<family>/<sheet>.css for every stylesheet the
+family links, plus a report of the bytes saved per file. The `pruned-css`
+pass (opt-in) points each page's stylesheet links at its family's copies;
+run this script first. Rules that no family needs at all are listed with
+--dead.
+
+Usage:
+  python3 prune_css.py
+  python3 prune_css.py --dead
+  python3 site_transforms.py --only pruned-css,critical-css
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from html.parser import HTMLParser
+
+from css_rules import Rule, parse_css, required_tags, required_tokens, serialize, with_keyframes
+from site_build import write_if_changed
+from site_transforms import DOCS_DIR, Page, iter_html_files, page_family, register_pass
+
+CSS_DIR = "assets/css"
+JS_DIR = "assets/js"
+OUT_DIR = "assets/css/pruned"
+
+# Classes added by code the scan can't follow (computed names, third-party snippets).
+SAFELIST = {".active", ".visible", ".scrolled", ".expanded", ".is-active", ".open", ".loaded"}
+# Elements every page has or that the browser inserts (tbody).
+ALWAYS_TAGS = {"html", "body", "head", "tbody"}
+
+CLASS_CALL_RE = re.compile(r"classList\.(?:add|remove|toggle|replace)\(([^)]*)\)")
+STRING_RE = re.compile(r"""(["'`])([^"'`]*)\1""")
+CLASS_NAME_RE = re.compile(r"""className\s*\+?=\s*(["'`])([^"'`]*)\1""")
+CLASS_ATTR_RE = re.compile(r"""class=\\?["']([^"'\\]*)""")
+ID_ASSIGN_RE = re.compile(r"""\.id\s*=\s*(["'`])([\w-]+)\1""")
+CREATE_RE = re.compile(r"""createElement\((["'`])([\w-]+)\1\)""")
+SHEET_RE = re.compile(r"""<link\b[^>]*\bhref=(["'])((?:\.\./)*)assets/css/(?:pruned/[\w-]+/)?([\w.-]+\.css)([^"']*)\1""")
+
+
+class UsageCollector(HTMLParser):
+    """Streams through a page collecting tags, .classes, #ids, stylesheet hrefs and inline script text."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags: set[str] = set()
+        self.tokens: set[str] = set()
+        self.sheets: list[str] = []
+        self.scripts: list[str] = []
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        attrs = dict(attrs)
+        self.tokens.update("." + c for c in (attrs.get("class") or "").split())
+        if attrs.get("id"):
+            self.tokens.add("#" + attrs["id"])
+        if tag == "link" and attrs.get("href") and ("stylesheet" in (attrs.get("rel") or "").split()
+                                                   or attrs.get("as") == "style"):
+            self.sheets.append(attrs["href"])
+        self._in_script = tag == "script" and not attrs.get("src")
+
+    handle_startendtag = handle_starttag
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self._in_script = False
+
+    def handle_data(self, data):
+        if self._in_script:
+            self.scripts.append(data)
+
+
+def script_usage(js: str) -> tuple[set[str], set[str]]:
+    """(.classes/#ids, element names) a script can add to the page."""
+    tokens: set[str] = set()
+    for args in CLASS_CALL_RE.findall(js):
+        for _, value in STRING_RE.findall(args):
+            tokens.update("." + c for c in value.split())
+    for _, value in CLASS_NAME_RE.findall(js):
+        tokens.update("." + c for c in value.split() if "${" not in c)
+    for value in CLASS_ATTR_RE.findall(js):
+        tokens.update("." + c for c in value.split() if "${" not in c)
+    tokens.update("#" + value for _, value in ID_ASSIGN_RE.findall(js))
+    tags = {value.lower() for _, value in CREATE_RE.findall(js)}
+    return tokens, tags
+
+
+def js_usage() -> tuple[set[str], set[str]]:
+    tokens: set[str] = set()
+    tags: set[str] = set()
+    js_dir = os.path.join(DOCS_DIR, JS_DIR)
+    for name in sorted(os.listdir(js_dir)):
+        if name.endswith(".js"):
+            with open(os.path.join(js_dir, name), "r", encoding="utf-8") as f:
+                found_tokens, found_tags = script_usage(f.read())
+            tokens |= found_tokens
+            tags |= found_tags
+    return tokens, tags
+
+
+def sheet_name(href: str) -> str | None:
+    """style.css for any href pointing into assets/css (pruned copies included)."""
+    path = href.split("#", 1)[0].split("?", 1)[0]
+    if "assets/css/" not in path or path.startswith(("http:", "https:", "//")):
+        return None
+    return os.path.basename(path)
+
+
+def collect_usage() -> dict[str, dict]:
+    """Family -> {"tokens", "tags", "sheets", "pages"} across all its pages."""
+    js_tokens, js_tags = js_usage()
+    families: dict[str, dict] = {}
+    for path in iter_html_files():
+        rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+        family = families.setdefault(page_family(rel), {
+            "tokens": set(js_tokens) | SAFELIST, "tags": set(js_tags) | ALWAYS_TAGS, "sheets": set(), "pages": 0})
+        collector = UsageCollector()
+        with open(path, "r", encoding="utf-8") as f:
+            collector.feed(f.read())
+        collector.close()
+        family["pages"] += 1
+        family["tokens"] |= collector.tokens
+        family["tags"] |= collector.tags
+        family["sheets"].update(filter(None, map(sheet_name, collector.sheets)))
+        for script in collector.scripts:
+            tokens, tags = script_usage(script)
+            family["tokens"] |= tokens
+            family["tags"] |= tags
+    return families
+
+
+def rule_used(rule: Rule, tokens: set[str], tags: set[str]) -> bool:
+    if rule.at_rule:
+        return False
+    return any(required_tokens(s) <= tokens and required_tags(s) <= tags for s in rule.selectors)
+
+
+def pruned_path(family: str, sheet: str) -> str:
+    return f"{OUT_DIR}/{family}/{sheet}"
+
+
+def prune(verbose: bool = True, show_dead: bool = False) -> dict[tuple[str, str], tuple[int, int]]:
+    """Write the pruned stylesheets. Returns (family, sheet) -> (original bytes, pruned bytes)."""
+    usage = collect_usage()
+    sizes: dict[tuple[str, str], tuple[int, int]] = {}
+    used_anywhere: dict[str, set[int]] = {}
+    written = 0
+
+    for family, found in sorted(usage.items()):
+        for sheet in sorted(found["sheets"]):
+            source = os.path.join(DOCS_DIR, CSS_DIR, sheet)
+            if not os.path.isfile(source):
+                continue
+            with open(source, "r", encoding="utf-8") as f:
+                original = f.read()
+            rules = parse_css(original)
+            used = [i for i, r in enumerate(rules) if rule_used(r, found["tokens"], found["tags"])]
+            used_anywhere.setdefault(sheet, set()).update(used)
+            kept = [rules[i] for i in used]
+            css = serialize(with_keyframes(kept, rules)) + "\n"
+            # Pruned copies live one folder deeper than the originals; url()s are relative.
+            css = re.sub(r"""url\((["']?)(?!data:|https?:|/|#)""", r"url(\1../../", css)
+            written += write_if_changed(os.path.join(DOCS_DIR, pruned_path(family, sheet)), css)
+            sizes[(family, sheet)] = (len(original.encode("utf-8")), len(css.encode("utf-8")))
+
+    if verbose:
+        print(f"{'family':<10} {'sheet':<20} {'pages':>5} {'original':>9} {'pruned':>8} {'saved':>8}")
+        for (family, sheet), (before, after) in sizes.items():
+            print(f"{family:<10} {sheet:<20} {usage[family]['pages']:>5} {before:>9,} {after:>8,} "
+                  f"{before - after:>7,} ({(before - after) / before:.0%})")
+        total_before = sum(b for b, _ in sizes.values())
+        total_after = sum(a for _, a in sizes.values())
+        print(f"\n{len(sizes)} stylesheets written to {OUT_DIR} ({written} changed), "
+              f"{total_before - total_after:,} bytes saved in total")
+
+    if show_dead:
+        for sheet in sorted(used_anywhere):
+            with open(os.path.join(DOCS_DIR, CSS_DIR, sheet), "r", encoding="utf-8") as f:
+                rules = parse_css(f.read())
+            dead = [r for i, r in enumerate(rules) if i not in used_anywhere[sheet] and not r.at_rule]
+            print(f"\n{sheet}: {len(dead)} of {len(rules)} rules unused on every page")
+            for rule in dead:
+                media = " ".join(rule.media)
+                print(f"  {rule.selector}" + (f"   [{media}]" if media else ""))
+    return sizes
+
+
+def point_at_pruned(text: str, family: str) -> str:
+    """Rewrite stylesheet hrefs to the family's pruned copies (where one exists)."""
+    def repl(m: re.Match) -> str:
+        sheet = m.group(3)
+        if not os.path.isfile(os.path.join(DOCS_DIR, pruned_path(family, sheet))):
+            return m.group(0)
+        start, end = m.start(2) - m.start(0), m.end(4) - m.start(0)
+        return m.group(0)[:start] + f"{m.group(2)}{pruned_path(family, sheet)}{m.group(4)}" + m.group(0)[end:]
+
+    return SHEET_RE.sub(repl, text)
+
+
+@register_pass("pruned-css", kind="text", default=False)
+def pruned_css(page: Page) -> bool:
+    """Link the page family's pruned stylesheets instead of the full ones."""
+    new = point_at_pruned(page.text, page.family)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write per-family stylesheets without unused rules")
+    parser.add_argument("--dead", action="store_true", help="List rules no page uses")
+    args = parser.parse_args()
+    prune(show_dead=args.dead)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -81,13 +81,10 @@ def purge_page(space: str) -> int:
 
 
 def main() -> None:
-    total = 0
-    for space in SPACES:
-        removed = purge_page(space)
-        if removed:
-            print(f"{space}: removed {removed} missing image blocks")
-        total += removed
-    print(f"Done. Removed {total} missing image blocks.")
+    # Same check as purge_page(), run as a pass of the shared engine.
+    import site_transforms
+
+    site_transforms.run(["purge-missing-space-images"])
 
 
 if __name__ == "__main__":
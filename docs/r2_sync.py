@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Sync assets/images/spaces and assets/images/projects to the R2 bucket.
+
+Objects are keyed the way r2-images.js maps them:
+
+  assets/images/spaces/<space>/<file>      -> spaces/<space>/<file>
+  assets/images/projects/<project>/<file>  -> projects/<project>/<file>
+
+Every local file is hashed (SHA-256; images come from the image index, other
+files such as _variants are cached by size/mtime) and compared with the
+manifest.json stored at the bucket root from the previous sync. Only new or
+changed objects are uploaded, concurrently; remote objects that no longer
+exist locally are deleted only with --delete.
+
+After a sync the bucket holds:
+- manifest.json: {"version": 1, "objects": {key: {"sha256", "size"}},
+  "current": {source key: key}}, also written to .build/r2-manifest.json for
+  build-time tools. "current" names the object holding each local file's
+  present content (its fingerprinted key with --fingerprinted), so older
+  hashes left in the bucket without --delete aren't mistaken for it, and
+- <prefix>/<folder>/manifest.json: {"files": [...]} per folder, the format
+  make_r2_manifest.py produces for r2-images.js.
+
+With --fingerprinted, objects are uploaded under the content-hashed names
+that fingerprint_assets.py gives them (ronda-1.<hash>.jpg) with immutable,
+year-long caching; the published pages reference those names.
+
+With --optimize-jpegs, jpeg_optimize.py's lossless recompression and
+metadata stripping runs first, so only the smaller files are hashed and
+uploaded.
+
+Remotes:
+  --remote s3://<bucket>   R2 (or any S3-compatible server) through boto3.
+                           Endpoint/credentials from --endpoint or R2_ENDPOINT,
+                           AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY. Uploads
+                           share one pooled client and go multipart above
+                           --multipart-mb.
+  --remote <directory>     Local stand-in with the same key layout, for
+                           testing without touching the bucket.
+
+Usage:
+  python3 r2_sync.py --remote /tmp/r2-standin --dry-run
+  python3 r2_sync.py --remote s3://jacinteriors --jobs 16 --delete
+  python3 r2_sync.py --remote s3://jacinteriors --optimize-jpegs
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mimetypes
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from image_index import DOCS_DIR, ImageIndex
+from fingerprint_assets import hashed_name
+from jpeg_optimize import optimize, report
+from site_build import FileHashes
+
+SOURCE_DIRS = {
+    "assets/images/spaces": "spaces",
+    "assets/images/projects": "projects",
+}
+MANIFEST_KEY = "manifest.json"
+LOCAL_MANIFEST = os.path.join(DOCS_DIR, ".build", "r2-manifest.json")
+MANIFEST_VERSION = 1
+
+CACHE_CONTROL = "public, max-age=86400"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MULTIPART_MB = 8
+SKIP_NAMES = {".DS_Store", "manifest.json"}
+
+
+# ---------------------------------------------------------------------------
+# Remotes
+# ---------------------------------------------------------------------------
+
+class DirectoryRemote:
+    """A directory laid out like the bucket; stands in for R2 in tests."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def __str__(self) -> str:
+        return self.root
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            with open(os.path.join(self.root, key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_file(self, key: str, path: str, content_type: str, cache_control: str = CACHE_CONTROL) -> None:
+        out = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        tmp = out + ".__tmp__"
+        with open(path, "rb") as src, open(tmp, "wb") as dst:
+            for chunk in iter(lambda: src.read(1 << 20), b""):
+                dst.write(chunk)
+        os.replace(tmp, out)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        out = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out + ".__tmp__", "wb") as f:
+            f.write(data)
+        os.replace(out + ".__tmp__", out)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(os.path.join(self.root, key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Remote:
+    """R2 through boto3: one client (shared connection pool) for all worker threads."""
+
+    def __init__(self, bucket: str, endpoint: str | None, pool_size: int, multipart_mb: int):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise SystemExit("boto3 is required for s3:// remotes (pip install boto3)")
+
+        self.bucket = bucket
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint or os.environ.get("R2_ENDPOINT"),
+            config=Config(max_pool_connections=pool_size, retries={"max_attempts": 5, "mode": "standard"}),
+        )
+        threshold = multipart_mb * 1024 * 1024
+        self.transfer = TransferConfig(multipart_threshold=threshold, multipart_chunksize=threshold,
+                                       max_concurrency=4)
+
+    def __str__(self) -> str:
+        return f"s3://{self.bucket}"
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def put_file(self, key: str, path: str, content_type: str, cache_control: str = CACHE_CONTROL) -> None:
+        self.client.upload_file(path, self.bucket, key, Config=self.transfer,
+                                ExtraArgs={"ContentType": content_type, "CacheControl": cache_control})
+
+    def put_bytes(self, key: str, data: bytes, content_type: str) -> None:
+        # Manifests must not be cached long or pages would see stale listings.
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type,
+                               CacheControl="no-cache")
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+def open_remote(spec: str, endpoint: str | None, jobs: int, multipart_mb: int):
+    if spec.startswith("s3://"):
+        return S3Remote(spec[len("s3://"):].strip("/"), endpoint, jobs, multipart_mb)
+    return DirectoryRemote(spec)
+
+
+# ---------------------------------------------------------------------------
+# Local state
+# ---------------------------------------------------------------------------
+
+def local_objects(roots: dict[str, str]) -> dict[str, str]:
+    """R2 key -> local path (relative to docs/) for every file to sync."""
+    objects: dict[str, str] = {}
+    for local_root, prefix in roots.items():
+        abs_root = os.path.join(DOCS_DIR, local_root)
+        for dirpath, dirs, files in os.walk(abs_root):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in sorted(files):
+                if name in SKIP_NAMES or name.startswith(".") or name.endswith(".__tmp__"):
+                    continue
+                rel = os.path.relpath(os.path.join(dirpath, name), abs_root).replace(os.sep, "/")
+                objects[f"{prefix}/{rel}"] = f"{local_root}/{rel}"
+    return objects
+
+
+def folder_manifests(objects: dict[str, dict]) -> dict[str, bytes]:
+    """Per-folder manifest.json files in make_r2_manifest.py's {"files": [...]} format."""
+    folders: dict[str, list[str]] = {}
+    for key in objects:
+        folder, name = key.rsplit("/", 1)
+        # Only <prefix>/<folder>/<file>; _variants and loose files aren't listed.
+        if folder.count("/") == 1:
+            folders.setdefault(folder, []).append(name)
+    return {f"{folder}/manifest.json": (json.dumps({"files": sorted(names)}, indent=2) + "\n").encode("utf-8")
+            for folder, names in folders.items()}
+
+
+def encode_manifest(objects: dict[str, dict], current: dict[str, str]) -> bytes:
+    payload = {"version": MANIFEST_VERSION, "objects": objects, "current": current}
+    return (json.dumps(payload, indent=1, sort_keys=True) + "\n").encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incrementally sync gallery images to R2")
+    parser.add_argument("--remote", required=True, help="s3://<bucket> or a local stand-in directory")
+    parser.add_argument("--endpoint", help="S3 endpoint URL (default: $R2_ENDPOINT)")
+    parser.add_argument("--jobs", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--multipart-mb", type=int, default=MULTIPART_MB)
+    parser.add_argument("--delete", action="store_true", help="Delete remote objects missing locally")
+    parser.add_argument("--fingerprinted", action="store_true",
+                        help="Upload under content-hashed names with immutable caching")
+    parser.add_argument("--optimize-jpegs", action="store_true",
+                        help="Losslessly recompress and strip JPEG metadata first (jpeg_optimize.py)")
+    parser.add_argument("--dry-run", action="store_true", help="Show what would change")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    remote = open_remote(args.remote, args.endpoint, args.jobs, args.multipart_mb)
+
+    if args.optimize_jpegs:
+        report(optimize(list(SOURCE_DIRS), dry_run=args.dry_run, verbose=True))
+        print()
+
+    with ImageIndex() as index:
+        index.update(list(SOURCE_DIRS))
+    hasher = FileHashes(index)
+    local: dict[str, str] = {}
+    sources: dict[str, str] = {}
+    wanted: dict[str, dict] = {}
+    for source, rel in local_objects(SOURCE_DIRS).items():
+        digest, size = hasher.digest(rel)
+        key = hashed_name(source, digest) if args.fingerprinted else source
+        local[key] = rel
+        sources[key] = source
+        wanted[key] = {"sha256": digest, "size": size}
+    hasher.save()
+    cache_control = IMMUTABLE_CACHE_CONTROL if args.fingerprinted else CACHE_CONTROL
+
+    raw = remote.get(MANIFEST_KEY)
+    try:
+        remote_objects = json.loads(raw)["objects"] if raw else {}
+    except (ValueError, KeyError):
+        print(f"⚠ Unreadable {MANIFEST_KEY} on {remote}; treating the bucket as empty")
+        remote_objects = {}
+
+    uploads = sorted(k for k, v in wanted.items() if remote_objects.get(k, {}).get("sha256") != v["sha256"])
+    deletes = sorted(set(remote_objects) - set(wanted)) if args.delete else []
+    upload_bytes = sum(wanted[k]["size"] for k in uploads)
+
+    print(f"{remote}: {len(wanted)} local objects, {len(remote_objects)} in remote manifest")
+    print(f"  {len(uploads)} to upload ({upload_bytes / 1e6:.1f} MB), {len(deletes)} to delete")
+    if args.dry_run:
+        for key in uploads:
+            print(f"  + {key}")
+        for key in deletes:
+            print(f"  - {key}")
+        return 0
+
+    # The manifest only records what actually reached (or left) the bucket.
+    synced = dict(remote_objects)
+    uploaded = failed = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {}
+        for key in uploads:
+            content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+            futures[pool.submit(remote.put_file, key, os.path.join(DOCS_DIR, local[key]), content_type,
+                                cache_control)] = key
+        for key in deletes:
+            futures[pool.submit(remote.delete, key)] = key
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ {key}: {e}")
+                continue
+            if key in wanted:
+                synced[key] = wanted[key]
+                uploaded += 1
+            else:
+                synced.pop(key, None)
+
+    current = {sources[key]: key for key, entry in wanted.items() if synced.get(key) == entry}
+    manifest = encode_manifest(synced, current)
+    for key, data in folder_manifests(synced).items():
+        if remote.get(key) != data:
+            remote.put_bytes(key, data, "application/json")
+    remote.put_bytes(MANIFEST_KEY, manifest, "application/json")
+    os.makedirs(os.path.dirname(LOCAL_MANIFEST), exist_ok=True)
+    with open(LOCAL_MANIFEST, "wb") as f:
+        f.write(manifest)
+
+    print(f"\n{'=' * 60}")
+    print(f"Uploaded {uploaded}, deleted {len(deletes) - sum(1 for k in deletes if k in synced)}, "
+          f"{failed} failed in {time.perf_counter() - started:.1f}s")
+    print(f"Manifest: {MANIFEST_KEY} on {remote}, {os.path.relpath(LOCAL_MANIFEST, DOCS_DIR)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
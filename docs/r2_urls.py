@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Write final R2 URLs into gallery markup at build time.
+
+At runtime r2-images.js swaps every data-r2-local-src image to a
+placeholder, then to the R2 URL it guesses, and on a 404 tries the nested
+spaces/<space>/<H1>/ folder and finally the local path: up to three
+requests for an image whose mapping is wrong. With the bucket manifest
+r2_sync.py keeps in .build/r2-manifest.json, the build can decide once.
+
+For each image the `r2-urls` pass (opt-in) looks up, in the order the
+runtime would try them:
+
+  1. <prefix>/<folder>/<file>                 (the direct mapping)
+  2. spaces/<space>/<H1>/<file>               (the nested folder, spaces only)
+
+each either as is or under its fingerprinted name (<file>.<hash>.<ext>,
+r2_sync.py --fingerprinted). The bucket can hold several hashes of one
+file (r2_sync.py only deletes old ones with --delete), so the manifest's
+"current" map, which names the object holding each file's present content,
+decides; without an entry there, a fingerprinted key is used only if it's
+the only one for that file. When a key exists, the image gets that CDN URL
+as src, a srcset from its data-r2-srcset candidates (only if every
+candidate is in the manifest) and data-r2-resolved. r2-images.js skips
+resolved images, so it only remains as the fallback for images the
+manifest doesn't have; those keep their placeholder and are listed in the
+report. data-r2-local-src stays, so the other build steps still know the
+local path, and re-running the pass after a sync re-resolves everything
+(images that dropped out of the manifest go back to the runtime).
+
+The base URL is window.R2_IMAGE_BASE from assets/js/r2-config.js.
+
+Usage:
+  python3 r2_urls.py             # validate: report what resolves and what doesn't
+  python3 r2_urls.py --apply     # same as: site_transforms.py --only r2-urls
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+from urllib.parse import quote
+
+from fingerprint_assets import HASH_LENGTH
+from site_build import BUILD_DIR
+from site_transforms import DOCS_DIR, Page, register_pass
+
+R2_MANIFEST = os.path.join(BUILD_DIR, "r2-manifest.json")
+R2_CONFIG = "assets/js/r2-config.js"
+R2_PREFIXES = ("assets/images/spaces/", "assets/images/projects/")
+# Same as PLACEHOLDER_SRC in r2-images.js.
+PLACEHOLDER_SRC = "data:image/gif;base64,R0lGODlhAQABAAD/ACwAAAAAAQABAAACADs="
+
+HASHED_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}(\.[^./]+)$")
+
+_r2_base: str | None = None
+_keys: dict[str, str] | None = None
+_results: dict[str, dict] = {}
+
+
+def r2_base() -> str:
+    """window.R2_IMAGE_BASE from r2-config.js ("" if it isn't set)."""
+    global _r2_base
+    if _r2_base is None:
+        try:
+            with open(os.path.join(DOCS_DIR, R2_CONFIG), "r", encoding="utf-8") as f:
+                m = re.search(r"""^\s*window\.R2_IMAGE_BASE\s*=\s*(["'])(.*?)\1""", f.read(), re.M)
+        except FileNotFoundError:
+            m = None
+        _r2_base = m.group(2).rstrip("/") if m else ""
+    return _r2_base
+
+
+def r2_key(local: str) -> str:
+    """assets/images/spaces/bedrooms/bedrooms-1.jpg -> spaces/bedrooms/bedrooms-1.jpg ("" if not an R2 path)."""
+    if not local.startswith(R2_PREFIXES) or local.count("/") < 4:
+        return ""
+    return local[len("assets/images/"):]
+
+
+def quote_key(key: str) -> str:
+    """A key URL-encoded like encodeURIComponent (slashes kept) in r2-images.js."""
+    return quote(key, safe='/!~*()' + chr(39))
+
+
+def r2_url(key: str) -> str:
+    """CDN URL for a key."""
+    return f"{r2_base()}/{quote_key(key)}"
+
+
+def manifest_keys() -> dict[str, str] | None:
+    """Plain key -> key in the bucket (the current one, see the module docstring). None without a manifest."""
+    global _keys
+    if _keys is None:
+        try:
+            with open(R2_MANIFEST, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            objects = manifest["objects"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        hashed: dict[str, list[str]] = {}
+        for key in objects:
+            plain = HASHED_RE.sub(r"\1", key)
+            if plain != key:
+                hashed.setdefault(plain, []).append(key)
+        _keys = {plain: keys[0] for plain, keys in hashed.items() if len(keys) == 1}
+        _keys.update({key: key for key in objects})
+        _keys.update({plain: key for plain, key in manifest.get("current", {}).items() if key in objects})
+    return _keys
+
+
+def candidate_keys(key: str, h1: str) -> list[tuple[str, str]]:
+    """(key, how) in the order r2-images.js tries them."""
+    candidates = [(key, "direct")]
+    prefix, folder, name = key.split("/", 2)
+    if prefix == "spaces" and h1:
+        candidates.append((f"spaces/{folder}/{h1}/{name}", "nested"))
+    return candidates
+
+
+def resolve(local: str, h1: str) -> tuple[str | None, str]:
+    """(bucket key, how it was found) or (None, reason)."""
+    keys = manifest_keys() or {}
+    key = r2_key(local)
+    if not key:
+        return None, "not an R2 path"
+    for candidate, how in candidate_keys(key, h1):
+        if candidate in keys:
+            return keys[candidate], how if keys[candidate] == candidate else f"{how}, fingerprinted"
+    return None, "not in the R2 manifest"
+
+
+def resolve_srcset(local_srcset: str) -> str:
+    """data-r2-srcset with every candidate mapped to its CDN URL ("" unless all are in the manifest)."""
+    keys = manifest_keys() or {}
+    out = []
+    for candidate in local_srcset.split(","):
+        parts = candidate.split()
+        key = r2_key(parts[0]) if parts else ""
+        if key not in keys:
+            return ""
+        out.append(" ".join([r2_url(keys[key])] + parts[1:]))
+    return ", ".join(out)
+
+
+def set_attrs(img, attrs: dict[str, str | None]) -> bool:
+    changed = False
+    for name, value in attrs.items():
+        if value is None:
+            if name in img.attrs:
+                del img[name]
+                changed = True
+        elif img.get(name) != value:
+            img[name] = value
+            changed = True
+    return changed
+
+
+@register_pass("r2-urls", default=False)
+def r2_urls(page: Page) -> bool:
+    """Write manifest-validated R2 URLs into gallery images (r2-images.js becomes the fallback)."""
+    if manifest_keys() is None or not r2_base():
+        return False
+    h1_tag = page.soup.find("h1")
+    h1 = h1_tag.get_text().strip() if h1_tag else ""
+    changed = False
+    found = []
+    for img in page.soup.find_all("img", attrs={"data-r2-local-src": True}):
+        local = img["data-r2-local-src"]
+        key, how = resolve(local, h1)
+        if key:
+            srcset = resolve_srcset(img["data-r2-srcset"]) if img.get("data-r2-srcset") else ""
+            attrs = {"src": r2_url(key), "srcset": srcset or None, "data-r2-resolved": how}
+        elif img.get("data-r2-resolved") is not None:
+            # Resolved by an earlier run but gone from the bucket: hand it back to r2-images.js.
+            attrs = {"src": PLACEHOLDER_SRC, "srcset": None, "data-r2-resolved": None}
+        else:
+            attrs = {}
+        if set_attrs(img, attrs):
+            changed = True
+        found.append({"src": local, "key": key, "how": how})
+    if found:
+        _results[page.rel] = {"family": page.family, "images": found}
+    return changed
+
+
+def report(results: dict[str, dict]) -> int:
+    """Print resolution counts per family and every image that doesn't resolve. Returns the unresolved count."""
+    families: dict[str, dict[str, int]] = {}
+    missing = []
+    for rel, result in sorted(results.items()):
+        counts = families.setdefault(result["family"], {})
+        for image in result["images"]:
+            how = image["how"] if image["key"] else "unresolved"
+            counts[how] = counts.get(how, 0) + 1
+            if not image["key"]:
+                missing.append(f"{rel}: {image['src']} ({image['how']})")
+    hows = sorted({how for counts in families.values() for how in counts})
+    print(f"{'family':<10}" + "".join(f"{how:>22}" for how in hows))
+    for family, counts in sorted(families.items()):
+        print(f"{family:<10}" + "".join(f"{counts.get(how, 0):>22}" for how in hows))
+    for line in missing:
+        print(f"  ✗ {line}")
+    total = sum(sum(c.values()) for c in families.values())
+    print(f"\n{total - len(missing)} of {total} R2 images resolved at build time; "
+          f"{len(missing)} left to r2-images.js")
+    return len(missing)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Resolve gallery images to their R2 URLs at build time")
+    parser.add_argument("--apply", action="store_true", help="Rewrite the pages")
+    args = parser.parse_args()
+    if manifest_keys() is None:
+        raise SystemExit(f"No R2 manifest at {os.path.relpath(R2_MANIFEST, DOCS_DIR)}; run r2_sync.py first")
+    if not r2_base():
+        raise SystemExit(f"No window.R2_IMAGE_BASE in {R2_CONFIG}")
+    import r2_urls as module
+    import site_transforms
+
+    site_transforms.run(["r2-urls"], dry_run=not args.apply, verbose=args.apply)
+    # The pass ran in the imported module (see PASS_MODULES), so its results are there.
+    return 1 if report(module._results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,6 +16,8 @@ import os
 import re
 from bs4 import BeautifulSoup
 
+from renumber import renumber
+
 DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
 SPACES = [
     "bathrooms",
@@ -32,26 +34,16 @@ SPACES = [
 ]
 
 
-def safe_rename_case_insensitive(src: str, dest: str) -> None:
-    if src == dest:
-        return
-    if not os.path.exists(src):
-        return
-    tmp = dest + ".__tmp__"
-    if os.path.exists(tmp):
-        os.remove(tmp)
-    os.rename(src, tmp)
-    os.rename(tmp, dest)
-
-
 def normalize_extensions(img_dir: str) -> None:
+    # Renamed as one transaction; a case-only rename is safe on case-insensitive
+    # filesystems too (see renumber.py).
+    folder = os.path.relpath(img_dir, DOCS_DIR).replace(os.sep, "/")
+    moves = {}
     for name in os.listdir(img_dir):
         base, ext = os.path.splitext(name)
         if ext in {".JPG", ".JPEG", ".PNG"}:
-            safe_rename_case_insensitive(
-                os.path.join(img_dir, name),
-                os.path.join(img_dir, base + ext.lower()),
-            )
+            moves[f"{folder}/{name}"] = f"{folder}/{base}{ext.lower()}"
+    renumber(moves)
 
 
 def list_images(space: str, img_dir: str) -> list[str]:
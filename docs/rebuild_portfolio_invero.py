@@ -6,8 +6,14 @@ Rebuild portfolio.html to EXACTLY match Invero design
 - Proper button placement
 - Correct spacing and borders
 - Tags stacked properly
+
+Skips the write when nothing feeding the page changed; pass --force to rebuild.
 """
 
+import sys
+
+from site_build import IncrementalBuild
+
 projects = [
     ('beverly-hills-alpine', 'Beverly Hills Alpine', ['Modern Spanish', 'Beverly Hills', 'Luxury Living', 'Residential']),
     ('venice-beach-house', 'Venice Beach House', ['Coastal', 'Venice', 'Contemporary', 'Residential']),
@@ -317,9 +323,20 @@ html = f'''<!DOCTYPE html>
 </body>
 </html>'''
 
-# Write the file
-with open('portfolio.html', 'w', encoding='utf-8') as f:
-    f.write(html)
+# Write the file (the page template lives in this script, so its source is the template input)
+with open(__file__, 'r', encoding='utf-8') as f:
+    template_source = f.read()
+
+with IncrementalBuild(force='--force' in sys.argv[1:]) as build:
+    build.page(
+        'portfolio.html',
+        lambda: html,
+        template=template_source,
+        record=projects,
+        images=[f"assets/images/projects/{slug}/{slug}-{kind}.jpg"
+                for slug, _, _ in projects for kind in ('primary', 'hover', 'secondary')],
+        assets=['assets/css/style.css', 'assets/js/main.js'],
+    )
 
 print("✅ Portfolio rebuilt to EXACT Invero design!")
 print("   - Square images (1:1 aspect ratio)")
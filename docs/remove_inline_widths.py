@@ -14,11 +14,8 @@ SPACE_PAGES = [
     'laundry-rooms', 'outdoor-spaces'
 ]
 
-def remove_inline_widths(html_file):
-    """Remove inline width styles from masonry grid items."""
-    with open(html_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
+def strip_inline_widths(content):
+    """Return content without the inline width: 100% on masonry grid items."""
     # Remove inline width: 100% from masonry grid items
     # Pattern: <div class="parallax-image..." style="width: 100%;">
     content = re.sub(
@@ -33,6 +30,14 @@ def remove_inline_widths(html_file):
         lambda m: m.group(0).replace(' style="width: 100%;"', ''),
         content
     )
+    return content
+
+def remove_inline_widths(html_file):
+    """Remove inline width styles from masonry grid items."""
+    with open(html_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    content = strip_inline_widths(content)
     
     with open(html_file, 'w', encoding='utf-8') as f:
         f.write(content)
@@ -44,18 +49,10 @@ def main():
     print("Removing Conflicting Inline Width Styles")
     print("=" * 70)
     
-    for space_name in SPACE_PAGES:
-        html_file = os.path.join(DOCS_DIR, f"{space_name}.html")
-        if os.path.exists(html_file):
-            print(f"\n{space_name}.html:")
-            remove_inline_widths(html_file)
-            print(f"  ✓ Removed conflicting inline styles")
-        else:
-            print(f"\n⚠ {space_name}.html: Not found")
-    
-    print("\n" + "=" * 70)
-    print("✓ All spaces pages updated")
-    print("=" * 70)
+    # Runs as a pass of the shared engine so it shares one parse per page
+    # with the other fixes (see site_transforms.py).
+    import site_transforms
+    site_transforms.run(['remove-inline-widths'])
 
 if __name__ == "__main__":
     main()
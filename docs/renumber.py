@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""
+Renumber gallery images (<slug>-1.jpg, <slug>-2.jpg, ...) as one transaction.
+
+filter_high_res_images.py, reorder_santa_monica.py and
+rebuild_all_spaces_galleries.py each renamed files one by one through a temp
+folder or temp names; a crash halfway left a gallery half-renamed, and the
+pages still pointed at the old numbers. Here a renumbering is a set of moves
+(old path -> new path) that is planned, journaled and executed as a whole:
+
+- Planning: the moves form a permutation, which splits into chains
+  (a -> b -> c, where c is free) and cycles (a -> b -> a). A chain is run
+  back to front, so every rename lands on a free name; a cycle parks one
+  file under a temp name first. A rename that only changes case
+  (IMG.JPG -> IMG.jpg) is a one-file cycle on case-insensitive filesystems
+  (macOS), which is detected per folder. A move onto an existing file that
+  isn't itself moving is refused.
+- Journal: the plan is written to .build/renumber-journal.jsonl before
+  anything is renamed, and every rename is appended once it's done. Chains
+  are independent, so they run in parallel (--jobs threads).
+- Variants: each image's responsive variants (_variants/<stem>-<W>w.*, see
+  image_variants.py) move with it, so the srcset, LQIP and aspect ratio that
+  gallery_markup.py stamped next to a src keep describing the same pixels.
+  Variants left over from a deleted image that sit on a new name are parked
+  in the backup folder (and dropped when the renumbering finishes).
+- Removals: files to delete (filter_high_res_images.py's rejects) are
+  parked the same way, with their variants, so --rollback brings them
+  back; their images (whole tiles in galleries) are dropped from the pages
+  before the moved files' references are rewritten.
+- HTML: every page referencing a moved file is backed up to
+  .build/renumber-backup/ with the plan, and rewritten (all references at
+  once, so swapped numbers don't collide) after the last rename. A
+  reference is the docs path, or the R2 key / CDN URL path the r2-urls pass
+  wrote (fingerprinted or not, nested spaces folder or not), in src,
+  srcset, LCP preload links or anywhere else. The variant manifest
+  (.build/image-variants.json) is rewritten the same way, so the variants
+  aren't rebuilt under their new names.
+- Reordering (--order, reorder_santa_monica.py) is the other kind of
+  renumbering: the pages keep their references, so each slot shows the
+  photo that now has its number. Pages aren't rewritten, the moves must only
+  permute existing names, and the gallery facts stamped from the images
+  (gallery-dimensions pass) are re-derived for the new occupants.
+
+If a run dies, the journal stays behind and the next renumbering refuses to
+start until it is finished with --resume or undone with --rollback.
+
+Usage:
+  python3 renumber.py assets/images/spaces/bedrooms              # close gaps: 1..n
+  python3 renumber.py assets/images/projects/x --order 2,3,5,1   # reorder: these first, then the rest
+  python3 renumber.py assets/images/spaces/bedrooms --dry-run
+  python3 renumber.py --resume
+  python3 renumber.py --rollback
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote
+
+from fingerprint_assets import HASH_LENGTH
+from image_variants import MANIFEST_FILE, VARIANT_DIR
+from r2_urls import quote_key, r2_key
+from site_build import BUILD_DIR, DOCS_DIR
+from gallery_markup import GALLERY_GRIDS
+from site_transforms import TrackedSoup, iter_html_files
+
+JOURNAL = os.path.join(BUILD_DIR, "renumber-journal.jsonl")
+BACKUP_DIR = os.path.join(BUILD_DIR, "renumber-backup")
+TEMP_SUFFIX = ".__renumber__"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".avif")
+JOBS = 8
+# Passes that derive attributes from the image a reference shows.
+RESTAMP_PASSES = ["gallery-dimensions"]
+
+_case_insensitive: dict[str, bool] = {}
+
+
+def _abs(rel: str) -> str:
+    return os.path.join(DOCS_DIR, rel)
+
+
+def is_case_insensitive(folder: str) -> bool:
+    """Whether names in this folder (relative to docs/) ignore case."""
+    if folder not in _case_insensitive:
+        # A folder a move will create (see variant_moves) behaves like its parent.
+        if not os.path.isdir(_abs(folder)) and folder:
+            _case_insensitive[folder] = is_case_insensitive(os.path.dirname(folder))
+            return _case_insensitive[folder]
+        fd, probe = tempfile.mkstemp(prefix=".CaseProbe", dir=_abs(folder))
+        os.close(fd)
+        try:
+            name = os.path.basename(probe)
+            _case_insensitive[folder] = os.path.exists(os.path.join(_abs(folder), name.swapcase()))
+        finally:
+            os.remove(probe)
+    return _case_insensitive[folder]
+
+
+def name_key(rel: str) -> str:
+    """What identifies the file rel points at: the path, case-folded where the filesystem ignores case."""
+    folder = os.path.dirname(rel)
+    return rel.lower() if is_case_insensitive(folder) else rel
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+def number_of(name: str, slug: str) -> int | None:
+    m = re.match(rf"{re.escape(slug)}-(\d+)\.[^.]+$", name, re.I)
+    return int(m.group(1)) if m else None
+
+
+def numbered_images(folder: str, slug: str) -> list[str]:
+    """<slug>-N images in folder (relative to docs/), by number."""
+    names = [n for n in os.listdir(_abs(folder))
+             if n.lower().endswith(IMAGE_EXTENSIONS) and number_of(n, slug) is not None]
+    return sorted(names, key=lambda n: (number_of(n, slug), n))
+
+
+def sequence_moves(folder: str, names: list[str], slug: str, lower_ext: bool = False) -> dict[str, str]:
+    """Moves that make names (in this order) <slug>-1.ext, <slug>-2.ext, ... Unchanged names are left out."""
+    moves = {}
+    for idx, name in enumerate(names, 1):
+        ext = os.path.splitext(name)[1]
+        new = f"{slug}-{idx}{ext.lower() if lower_ext else ext}"
+        if new != name:
+            moves[f"{folder}/{name}"] = f"{folder}/{new}"
+    return moves
+
+
+def variant_moves(moves: dict[str, str], park_dir: str,
+                  removals: tuple[str, ...] = ()) -> tuple[dict[str, str], dict[str, str]]:
+    """The _variants/ siblings of moved images: (old -> new for them, -> park_dir for the ones to set aside).
+
+    Set aside are the variants of removed images and stale variants (of an
+    image deleted earlier) sitting on a new name.
+    """
+    listings: dict[str, list[str]] = {}
+
+    def variants_of(folder: str, stem: str) -> list[tuple[str, str]]:
+        folder = f"{folder}/{VARIANT_DIR}"
+        if folder not in listings:
+            listings[folder] = sorted(os.listdir(_abs(folder))) if os.path.isdir(_abs(folder)) else []
+        pattern = re.compile(rf"{re.escape(stem)}(-\d+w\.[^.]+)$")
+        found = []
+        for name in listings[folder]:
+            m = pattern.match(name)
+            if m:
+                found.append((f"{folder}/{name}", m.group(1)))
+        return found
+
+    siblings = {}
+    for src, dst in moves.items():
+        stem = os.path.splitext(os.path.basename(src))[0]
+        new_stem = os.path.splitext(os.path.basename(dst))[0]
+        if stem == new_stem:
+            continue
+        for rel, suffix in variants_of(os.path.dirname(src), stem):
+            siblings[rel] = f"{os.path.dirname(dst)}/{VARIANT_DIR}/{new_stem}{suffix}"
+    moving = {name_key(src) for src in siblings}
+    parked = {}
+    for src in removals:
+        stem = os.path.splitext(os.path.basename(src))[0]
+        for rel, _ in variants_of(os.path.dirname(src), stem):
+            parked[rel] = f"{park_dir}/{rel}"
+    for dst in moves.values():
+        stem = os.path.splitext(os.path.basename(dst))[0]
+        for rel, _ in variants_of(os.path.dirname(dst), stem):
+            if name_key(rel) not in moving:
+                parked[rel] = f"{park_dir}/{rel}"
+    return siblings, parked
+
+
+def plan_chains(moves: dict[str, str]) -> list[list[list[str]]]:
+    """Split moves (old -> new, relative to docs/) into independent lists of renames, each safe in order."""
+    for src in moves:
+        if not os.path.isfile(_abs(src)):
+            raise ValueError(f"{src} doesn't exist")
+    by_src = {name_key(src): (src, dst) for src, dst in moves.items()}
+    dst_keys: dict[str, str] = {}
+    for src, dst in moves.items():
+        key = name_key(dst)
+        if key in dst_keys:
+            raise ValueError(f"{dst_keys[key]} and {src} would both become {dst}")
+        dst_keys[key] = src
+        if key not in by_src and os.path.lexists(_abs(dst)):
+            raise ValueError(f"{src} -> {dst} would overwrite a file that isn't being moved")
+
+    chains = []
+    seen = set()
+    # Chains start at a file nothing moves onto; run them from the free end back.
+    for key, (src, dst) in sorted(by_src.items()):
+        if key in dst_keys:
+            continue
+        chain = []
+        while key in by_src:
+            seen.add(key)
+            src, dst = by_src[key]
+            chain.append([src, dst])
+            key = name_key(dst)
+        chains.append(chain[::-1])
+    # What's left are cycles: park the first file, shift the rest, then unpark it.
+    for key, (src, dst) in sorted(by_src.items()):
+        if key in seen:
+            continue
+        cycle = []
+        while key not in seen:
+            seen.add(key)
+            cycle.append(by_src[key])
+            key = name_key(by_src[key][1])
+        first_src, first_dst = cycle[0]
+        temp = first_src + TEMP_SUFFIX
+        if os.path.lexists(_abs(temp)):
+            raise ValueError(f"{temp} is in the way; remove it first")
+        chains.append([[first_src, temp]] + [list(m) for m in cycle[:0:-1]] + [[temp, first_dst]])
+    return chains
+
+
+def html_references(moves: dict[str, str],
+                    removals: tuple[str, ...] = ()) -> tuple[re.Pattern | None, dict[str, str]]:
+    """A pattern matching references to any moved or removed file in HTML, and old -> new for the moved ones.
+
+    Besides the docs path, a file is referenced by its R2 key in CDN URLs
+    (r2_urls.py): spaces/bedrooms/bedrooms-3.jpg, URL-encoded, possibly
+    fingerprinted (bedrooms-3.<hash>.jpg) or under the nested
+    spaces/<space>/<H1>/ folder. The pattern matches the path up to the
+    extension as "stem", then "hash" and "ext"; see replace_reference().
+    """
+    mapping = {src.replace(os.sep, "/"): dst.replace(os.sep, "/") for src, dst in moves.items()}
+    removed = [src.replace(os.sep, "/") for src in removals]
+    if not mapping and not removed:
+        return None, mapping
+    forms = set()
+    for src in [*mapping, *removed]:
+        stem = os.path.splitext(src)[0]
+        forms.add(re.escape(stem))
+        key = r2_key(src)
+        if not key:
+            continue
+        key_stem = os.path.splitext(key)[0]
+        forms.update({re.escape(key_stem), re.escape(quote_key(key_stem))})
+        prefix, folder, name = key_stem.split("/", 2)
+        if prefix == "spaces" and "/" not in name:
+            forms.add(rf"spaces/{re.escape(folder)}/[^/\s\"'<>]+/{re.escape(name)}")
+    alternation = "|".join(sorted(forms, key=len, reverse=True))
+    return re.compile(rf"(?<![\w.-])(?P<stem>{alternation})(?P<hash>\.[0-9a-f]{{{HASH_LENGTH}}})?"
+                      rf"(?P<ext>\.\w+)(?![\w.-])"), mapping
+
+
+def reference_target(m: re.Match) -> str:
+    """The docs path of the file a match of html_references' pattern refers to."""
+    local = unquote(m.group("stem"))
+    if not local.startswith("assets/images/"):
+        parts = local.split("/")
+        if len(parts) == 4 and parts[2] != VARIANT_DIR:
+            del parts[2]  # spaces/<space>/<H1>/<name>
+        local = "assets/images/" + "/".join(parts)
+    return local + m.group("ext")
+
+
+def replace_reference(m: re.Match, mapping: dict[str, str]) -> str:
+    """The same kind of reference as m (docs path, R2 key, encoded, fingerprinted), to the file's new name."""
+    new = mapping.get(reference_target(m))
+    if new is None:
+        return m.group(0)
+    stem = m.group("stem")
+    new_stem, new_ext = os.path.splitext(os.path.basename(new))
+    if stem != unquote(stem):
+        new_stem = quote_key(new_stem)
+    return stem[:stem.rfind("/") + 1] + new_stem + (m.group("hash") or "") + new_ext
+
+
+def state_to_rewrite(pattern: re.Pattern | None) -> list[str]:
+    """The variant manifest (relative to docs/), if it mentions a moved file."""
+    if pattern is None or not os.path.exists(MANIFEST_FILE):
+        return []
+    with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+        if not pattern.search(f.read()):
+            return []
+    return [os.path.relpath(MANIFEST_FILE, DOCS_DIR).replace(os.sep, "/")]
+
+
+def rewrite_manifest(text: str, mapping: dict[str, str], removals: tuple[str, ...] = ()) -> str:
+    """The variant manifest with moved images (and their variants) under their new paths.
+
+    Removed images are dropped, and so are entries already sitting on a new
+    path: they belong to images that were deleted before the renumbering.
+    """
+    manifest = json.loads(text)
+    images = {}
+    targets = set(mapping.values()) | set(removals)
+    for src, entry in manifest.get("images", {}).items():
+        if src in mapping:
+            for candidates in entry.get("variants", {}).values():
+                for candidate in candidates:
+                    candidate[1] = mapping.get(candidate[1], candidate[1])
+            images[mapping[src]] = entry
+        elif src not in targets:
+            images[src] = entry
+    manifest["images"] = images
+    return json.dumps(manifest, indent=1, sort_keys=True) + "\n"
+
+
+def drop_references(html: str, page: str, removals: set[str]) -> str:
+    """html without the images showing a removed file; in a gallery, without their whole tile."""
+    if not removals:
+        return html
+    tracked = TrackedSoup(html)
+    folder = os.path.dirname(page)
+    for img in tracked.soup.find_all("img"):
+        src = img.get("data-r2-local-src") or img.get("src") or ""
+        if not img.get("data-r2-local-src"):
+            src = os.path.normpath(os.path.join(folder, src)).replace(os.sep, "/")
+        if src not in removals:
+            continue
+        item = img
+        for parent in img.parents:
+            if set(parent.get("class") or ()) & set(GALLERY_GRIDS):
+                break
+            item = parent
+        else:
+            item = img
+        item.decompose()
+    return tracked.render()
+
+
+def pages_to_rewrite(pattern: re.Pattern | None) -> list[str]:
+    if pattern is None:
+        return []
+    pages = []
+    for path in iter_html_files(DOCS_DIR):
+        with open(path, "r", encoding="utf-8") as f:
+            if pattern.search(f.read()):
+                pages.append(os.path.relpath(path, DOCS_DIR).replace(os.sep, "/"))
+    return pages
+
+
+# ---------------------------------------------------------------------------
+# Journal
+# ---------------------------------------------------------------------------
+
+class Journal:
+    """Append-only record of one renumbering: the plan, then each finished step."""
+
+    def __init__(self, header: dict):
+        self.header = header
+        self.done: set[tuple[int, int]] = set()
+        self.undone: set[tuple[int, int]] = set()
+        self.pages_written: set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls) -> "Journal | None":
+        try:
+            with open(JOURNAL, "r", encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # A line cut off by the crash; everything before it is intact.
+            with open(JOURNAL, "r", encoding="utf-8") as f:
+                lines = []
+                for line in f:
+                    try:
+                        lines.append(json.loads(line))
+                    except ValueError:
+                        break
+        journal = cls(lines[0])
+        for line in lines[1:]:
+            if "step" in line:
+                journal.done.add(tuple(line["step"]))
+            elif "undo" in line:
+                journal.undone.add(tuple(line["undo"]))
+            elif "page" in line:
+                journal.pages_written.add(line["page"])
+        return journal
+
+    def append(self, record: dict) -> None:
+        with self._lock:
+            with open(JOURNAL, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self) -> None:
+        os.makedirs(BUILD_DIR, exist_ok=True)
+        with open(JOURNAL, "x", encoding="utf-8") as f:
+            f.write(json.dumps(self.header) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def step_done(self, chain: int, step: int) -> bool:
+        """Whether a step has happened: journaled, or renamed just before a crash cut off the journal line."""
+        if (chain, step) in self.done:
+            return True
+        src, dst = self.header["chains"][chain][step]
+        earlier_done = step == 0 or (chain, step - 1) in self.done
+        return earlier_done and not os.path.lexists(_abs(src)) and os.path.lexists(_abs(dst))
+
+    def finish(self) -> None:
+        shutil.rmtree(os.path.join(BACKUP_DIR, self.header["id"]), ignore_errors=True)
+        if os.path.isdir(BACKUP_DIR) and not os.listdir(BACKUP_DIR):
+            os.rmdir(BACKUP_DIR)
+        os.remove(JOURNAL)
+
+
+def backup_path(journal: Journal, page: str) -> str:
+    return os.path.join(BACKUP_DIR, journal.header["id"], page)
+
+
+def rename(src: str, dst: str) -> None:
+    """Rename within docs/, refusing to replace anything (os.rename would on POSIX)."""
+    if os.path.lexists(_abs(dst)) and name_key(src) != name_key(dst):
+        raise RuntimeError(f"{dst} appeared during the renumbering; not overwriting it")
+    os.makedirs(os.path.dirname(_abs(dst)), exist_ok=True)
+    os.rename(_abs(src), _abs(dst))
+
+
+def run_chain(journal: Journal, chain_index: int) -> int:
+    steps = journal.header["chains"][chain_index]
+    count = 0
+    for i, (src, dst) in enumerate(steps):
+        if journal.step_done(chain_index, i):
+            journal.done.add((chain_index, i))
+            continue
+        rename(src, dst)
+        journal.done.add((chain_index, i))
+        journal.append({"step": [chain_index, i]})
+        count += 1
+    return count
+
+
+def execute(journal: Journal, jobs: int = JOBS) -> tuple[int, int]:
+    """Run (or finish) every rename, then rewrite the pages. Returns (renames, pages rewritten)."""
+    chains = range(len(journal.header["chains"]))
+    if jobs > 1 and len(chains) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            renames = sum(pool.map(lambda c: run_chain(journal, c), chains))
+    else:
+        renames = sum(run_chain(journal, c) for c in chains)
+
+    removals = tuple(journal.header.get("removed", []))
+    pattern, mapping = html_references(dict(journal.header["moves"]), removals)
+    pages = 0
+    # The variant manifest goes through the same backup -> rewrite -> journal steps as pages.
+    for page in journal.header["pages"] + journal.header.get("state", []):
+        if page in journal.pages_written:
+            continue
+        with open(backup_path(journal, page), "r", encoding="utf-8") as f:
+            if page in journal.header["pages"]:
+                # Drop removed files first: a moved file may take over their names.
+                html = drop_references(f.read(), page, set(removals))
+                html = pattern.sub(lambda m: replace_reference(m, mapping), html)
+            else:
+                html = rewrite_manifest(f.read(), mapping, removals)
+        tmp = _abs(page) + ".__tmp__"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, _abs(page))
+        journal.append({"page": page})
+        if page in journal.header["pages"]:
+            pages += 1
+    restamp(journal.header.get("restamp", []))
+    journal.finish()
+    return renames, pages
+
+
+def restamp(pages: list[str]) -> None:
+    """Re-derive the attributes build passes stamped from the images these pages show."""
+    if not pages:
+        return
+    import gallery_markup
+    import site_transforms
+
+    gallery_markup._manifest = None  # rewritten above
+    site_transforms.run(RESTAMP_PASSES, files=[_abs(page) for page in pages], verbose=False)
+    # The LCP preload, on pages that use it, may have pointed at a removed image.
+    preloading = []
+    for page in pages:
+        with open(_abs(page), "r", encoding="utf-8") as f:
+            if "data-lcp-preload" in f.read():
+                preloading.append(_abs(page))
+    if preloading:
+        site_transforms.run(["image-priority"], files=preloading, verbose=False)
+
+
+def backed_up(header: dict) -> list[str]:
+    """Every file a renumbering may write besides the images: pages, re-stamped pages, state."""
+    return sorted(set(header["pages"]) | set(header.get("restamp", [])) | set(header.get("state", [])))
+
+
+def begin(moves: dict[str, str], rewrite_html: bool = True, removals: tuple[str, ...] = ()) -> Journal:
+    """Plan the moves, back up the pages that reference them and write the journal.
+
+    removals (relative to docs/) are deleted as part of the same transaction:
+    parked in the backup folder until it finishes, and dropped from the
+    pages. Without rewrite_html the moves are a reorder: the pages keep
+    pointing at the same names, so those names must all still exist
+    afterwards, and nothing can be removed.
+    """
+    if os.path.exists(JOURNAL):
+        raise RuntimeError(f"An unfinished renumbering is in {os.path.relpath(JOURNAL, DOCS_DIR)}; "
+                           "run renumber.py --resume or --rollback first")
+    if not rewrite_html and (removals or {name_key(dst) for dst in moves.values()} != {name_key(src) for src in moves}):
+        raise ValueError("A reorder can only swap existing names (pages keep their references); "
+                         "close the gaps first with renumber.py <folder>")
+    journal_id = time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+    park_dir = os.path.relpath(os.path.join(BACKUP_DIR, journal_id, "parked"), DOCS_DIR).replace(os.sep, "/")
+    siblings, parked = variant_moves(moves, park_dir, removals)
+    parked.update({src: f"{park_dir}/{src}" for src in removals})
+    moves = {**moves, **siblings}
+    chains = plan_chains({**moves, **parked})
+    pattern, _ = html_references(moves, removals)
+    referring = pages_to_rewrite(pattern)
+    journal = Journal({
+        "id": journal_id,
+        "moves": sorted(moves.items()),
+        "chains": chains,
+        "pages": referring if rewrite_html else [],
+        "removed": sorted(removals),
+        "restamp": referring,
+        "state": state_to_rewrite(pattern),
+    })
+    for page in backed_up(journal.header):
+        os.makedirs(os.path.dirname(backup_path(journal, page)), exist_ok=True)
+        shutil.copy2(_abs(page), backup_path(journal, page))
+    journal.start()
+    return journal
+
+
+def renumber(moves: dict[str, str], rewrite_html: bool = True, jobs: int = JOBS,
+             removals: tuple[str, ...] = ()) -> tuple[int, int]:
+    """Apply moves (old -> new, relative to docs/), deleting removals, as one transaction.
+
+    Returns (renames, pages rewritten).
+    """
+    if not moves and not removals:
+        return 0, 0
+    return execute(begin(moves, rewrite_html, tuple(removals)), jobs)
+
+
+def resume(jobs: int = JOBS) -> tuple[int, int]:
+    journal = Journal.load()
+    if journal is None:
+        raise RuntimeError("No unfinished renumbering")
+    return execute(journal, jobs)
+
+
+def rollback() -> tuple[int, int]:
+    """Undo the renames and page rewrites of an unfinished renumbering. Returns (renames undone, pages restored)."""
+    journal = Journal.load()
+    if journal is None:
+        raise RuntimeError("No unfinished renumbering")
+    undone = 0
+    for c, steps in enumerate(journal.header["chains"]):
+        done = [i for i in range(len(steps)) if journal.step_done(c, i)]
+        for i in reversed(done):
+            src, dst = steps[i]
+            if (c, i) in journal.undone:
+                continue
+            # Undone by a rollback that died before it could journal it.
+            if not os.path.lexists(_abs(dst)) and os.path.lexists(_abs(src)):
+                continue
+            rename(dst, src)
+            journal.append({"undo": [c, i]})
+            undone += 1
+    restored = 0
+    for page in backed_up(journal.header):
+        shutil.copy2(backup_path(journal, page), _abs(page))
+        restored += int(page in journal.header["pages"] or page in journal.header.get("restamp", []))
+    journal.finish()
+    return undone, restored
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Renumber <slug>-N images as one transaction")
+    parser.add_argument("folder", nargs="?", help="Image folder, relative to docs/")
+    parser.add_argument("--slug", help="File name prefix (default: the folder name)")
+    parser.add_argument("--order", help="Reorder: comma-separated current numbers to put first, in this order "
+                                        "(pages keep their references, so they show the new order)")
+    parser.add_argument("--lower-ext", action="store_true", help="Also lower-case the extensions")
+    parser.add_argument("--no-html", action="store_true",
+                        help="Don't rewrite references in pages (implied by --order)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the plan only")
+    parser.add_argument("--resume", action="store_true", help="Finish an interrupted renumbering")
+    parser.add_argument("--rollback", action="store_true", help="Undo an interrupted renumbering")
+    parser.add_argument("--jobs", type=int, default=JOBS)
+    args = parser.parse_args()
+
+    try:
+        if args.resume:
+            renames, pages = resume(args.jobs)
+            print(f"Resumed: {renames} renames, {pages} pages rewritten")
+            return 0
+        if args.rollback:
+            renames, pages = rollback()
+            print(f"Rolled back: {renames} renames undone, {pages} pages restored")
+            return 0
+        if not args.folder:
+            parser.error("a folder is required (or --resume / --rollback)")
+
+        folder = args.folder.rstrip("/")
+        slug = args.slug or os.path.basename(folder)
+        names = numbered_images(folder, slug)
+        if args.order:
+            first = [int(n) for n in args.order.split(",")]
+            by_number = {number_of(n, slug): n for n in names}
+            missing = [n for n in first if n not in by_number]
+            if missing:
+                raise ValueError(f"no {slug}-N image for N = {', '.join(map(str, missing))}")
+            names = [by_number[n] for n in first] + [n for n in names if number_of(n, slug) not in first]
+        moves = sequence_moves(folder, names, slug, lower_ext=args.lower_ext)
+        rewrite_html = not (args.no_html or args.order)
+
+        if args.dry_run:
+            for chain in plan_chains(moves):
+                print("  " + "; ".join(f"{os.path.basename(s)} -> {os.path.basename(d)}" for s, d in chain))
+            siblings, parked = variant_moves(moves, "(backup)")
+            pattern, _ = html_references({**moves, **siblings})
+            pages = pages_to_rewrite(pattern)
+            print(f"{len(moves)} moves, {len(siblings)} variants moved along, {len(parked)} stale variants parked; "
+                  f"{len(pages)} pages to {'rewrite' if rewrite_html else 're-stamp'}: {', '.join(pages) or '-'}")
+            return 0
+        renames, pages = renumber(moves, rewrite_html=rewrite_html, jobs=args.jobs)
+        print(f"{folder}: {len(names)} images, {renames} renames, {pages} pages rewritten")
+    except (RuntimeError, ValueError) as e:
+        raise SystemExit(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,13 @@
 import os
 import shutil
 
+from renumber import renumber, sequence_moves
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
 DIR = "assets/images/projects/santa-monica-modern-spanish"
 
 def reorder():
-    if not os.path.exists(DIR):
+    if not os.path.exists(os.path.join(DOCS_DIR, DIR)):
         print(f"Directory not found: {DIR}")
         return
 
@@ -28,32 +31,21 @@ def reorder():
     
     print("Renaming images to prioritize portraits...")
     
-    # Rename to temporary names first to avoid collisions
-    for old, new in mapping.items():
-        src = os.path.join(DIR, f"santa-monica-modern-spanish-{old}.jpg")
-        dst = os.path.join(DIR, f"temp-{new}.jpg")
-        if os.path.exists(src):
-            shutil.move(src, dst)
-        else:
-            print(f"Warning: Source {src} not found")
-        
-    # Rename temp to final
-    for i in range(1, 7):
-        src = os.path.join(DIR, f"temp-{i}.jpg")
-        dst = os.path.join(DIR, f"santa-monica-modern-spanish-{i}.jpg")
-        if os.path.exists(src):
-            shutil.move(src, dst)
-            print(f"  Created santa-monica-modern-spanish-{i}.jpg")
-            
-            # Update helpers
-            if i == 1:
-                shutil.copy2(dst, os.path.join(DIR, "santa-monica-modern-spanish-primary.jpg"))
-            elif i == 2:
-                shutil.copy2(dst, os.path.join(DIR, "santa-monica-modern-spanish-hover.jpg"))
-            elif i == 3:
-                shutil.copy2(dst, os.path.join(DIR, "santa-monica-modern-spanish-secondary.jpg"))
-        else:
-            print(f"Warning: Temp file {src} not found")
+    # One transaction; the pages keep their references, so they show the new order (see renumber.py)
+    slug = "santa-monica-modern-spanish"
+    order = sorted(mapping, key=mapping.get)
+    names = [f"{slug}-{old}.jpg" for old in order]
+    missing = [n for n in names if not os.path.exists(os.path.join(DOCS_DIR, DIR, n))]
+    if missing:
+        print(f"Warning: Source {', '.join(missing)} not found; nothing renamed")
+        return
+    renumber(sequence_moves(DIR, names, slug), rewrite_html=False)
+    
+    # Update helpers
+    for i, helper in ((1, "primary"), (2, "hover"), (3, "secondary")):
+        src = os.path.join(DOCS_DIR, DIR, f"{slug}-{i}.jpg")
+        shutil.copy2(src, os.path.join(DOCS_DIR, DIR, f"{slug}-{helper}.jpg"))
+        print(f"  Updated {slug}-{helper}.jpg from {slug}-{i}.jpg")
 
     print("Done reordering.")
 
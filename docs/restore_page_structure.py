@@ -28,6 +28,14 @@ SPACE_TITLES = {
     'outdoor-spaces.html': 'Outdoor Spaces'
 }
 
+# Same tag (and version) as the project pages that already use the shared script.
+MASONRY_SCRIPT = '<script defer src="../assets/js/spaces-masonry.js?v=20260126"></script>'
+# The inline masonry script earlier versions of this file wrote before </body>.
+INLINE_MASONRY_RE = re.compile(
+    r'\n?[ \t]*<script>(?:(?!</script>).)*?function initMasonry\(\)(?:(?!</script>).)*</script>',
+    re.DOTALL,
+)
+
 def fix_stray_characters(content):
     """Remove stray \1 characters"""
     content = re.sub(r'\\1\s*', '', content)
@@ -74,85 +82,13 @@ def remove_year_field(content):
     return content
 
 def ensure_masonry_js(content):
-    """Ensure masonry JavaScript is present in project pages"""
-    if 'initMasonry' in content:
-        return content  # Already has masonry JS
-    
-    masonry_js = '''
-    <script>
-        // Masonry layout implementation
-        function initMasonry() {
-            const grid = document.querySelector('.image-gallery-grid');
-            if (!grid) return;
-            
-            const items = Array.from(grid.children);
-            if (items.length === 0) return;
-            
-            const gap = 16;
-            let columns = 2;
-            
-            if (window.innerWidth <= 768) {
-                columns = 1;
-            } else if (window.innerWidth >= 1200) {
-                columns = 3;
-            }
-            
-            const containerWidth = grid.offsetWidth;
-            const columnWidth = (containerWidth - (gap * (columns - 1))) / columns;
-            const columnHeights = new Array(columns).fill(0);
-            
-            items.forEach((item, index) => {
-                const shortestColumnIndex = columnHeights.indexOf(Math.min(...columnHeights));
-                const left = shortestColumnIndex * (columnWidth + gap);
-                const top = columnHeights[shortestColumnIndex];
-                
-                item.style.left = left + 'px';
-                item.style.top = top + 'px';
-                item.style.width = columnWidth + 'px';
-                
-                const itemHeight = item.offsetHeight;
-                columnHeights[shortestColumnIndex] += itemHeight + gap;
-            });
-            
-            grid.style.height = Math.max(...columnHeights) + 'px';
-        }
-
-        window.addEventListener('load', () => {
-            const images = document.querySelectorAll('.image-gallery-grid img');
-            let loadedCount = 0;
-            
-            if (images.length === 0) {
-                initMasonry();
-                return;
-            }
-            
-            images.forEach(img => {
-                if (img.complete) {
-                    loadedCount++;
-                    if (loadedCount === images.length) {
-                        initMasonry();
-                    }
-                } else {
-                    img.addEventListener('load', () => {
-                        loadedCount++;
-                        if (loadedCount === images.length) {
-                            initMasonry();
-                        }
-                    });
-                }
-            });
-        });
-
-        window.addEventListener('resize', () => {
-            initMasonry();
-        });
-    </script>'''
-    
-    # Add before </body>
-    if '</body>' in content:
-        content = content.replace('</body>', masonry_js + '\n</body>')
-    
-    return content
+    """Ensure project pages load the shared masonry script, replacing the old inline copy"""
+    # spaces-masonry.js places tiles from the build-time layout (data-masonry-ar /
+    # data-masonry-cols, see gallery_markup.py); the inline copy measured every tile.
+    content = INLINE_MASONRY_RE.sub('', content)
+    if 'spaces-masonry.js' in content:
+        return content
+    return content.replace('</head>', f'    {MASONRY_SCRIPT}\n</head>', 1)
 
 def fix_space_title(content, filename):
     """Fix space page title to match dropdown exactly"""
@@ -224,19 +160,15 @@ def process_file(filepath):
         return False
 
 def main():
-    """Process all HTML files"""
-    html_files = list(docs_dir.rglob('*.html'))
-    
-    print(f"Processing {len(html_files)} HTML files...")
-    print()
-    
-    fixed_count = 0
-    for filepath in html_files:
-        if process_file(filepath):
-            fixed_count += 1
-    
-    print()
-    print(f"✓ Fixed {fixed_count} files")
+    """Process all HTML files (one walk, via the shared transform engine)"""
+    import site_transforms
+    site_transforms.run([
+        'strip-stray-chars',
+        'navbar-script-defer',
+        'remove-year-field',
+        'project-masonry-js',
+        'space-titles',
+    ])
     print("✓ All pages restored to correct structure")
 
 if __name__ == '__main__':
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Serve the site's web fonts from our own origin, subset to the text we use.
+
+Pages load Plus Jakarta Sans and IBM Plex Mono from fonts.googleapis.com.
+That means a render-blocking stylesheet from one origin, then the fonts
+from a second (fonts.gstatic.com), before text can be drawn in them.
+Instead:
+
+1. --download vendors the fonts: for every family/weight the pages request
+   from Google Fonts, the full TTF is saved to _fonts/<family>-<weight>.ttf
+   and the family names to _fonts/fonts.json. _fonts/ is committed but left
+   out of the built site (UNPUBLISHED_DIRS in fingerprint_assets.py).
+2. A normal run subsets each vendored font to the characters that occur in
+   the site's pages (text, alt/title/placeholder attributes, inline
+   scripts) plus printable ASCII and common typographic punctuation, and
+   writes assets/fonts/<family>-<weight>.woff2 and assets/css/fonts.css
+   (@font-face with font-display: swap). Fonts are only re-subset when the
+   source font or the character set changes.
+3. The `self-hosted-fonts` pass (opt-in) replaces each page's Google Fonts
+   stylesheet and preconnect links with a <link rel="preload"> for the
+   PRELOAD faces (the body and nav text) and a link to fonts.css.
+
+Usage:
+  python3 self_host_fonts.py --download    # once, or when a weight is added
+  python3 self_host_fonts.py
+  python3 site_transforms.py --only self-hosted-fonts
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import parse_qs, urlsplit
+
+from site_build import BUILD_DIR, write_if_changed
+from site_transforms import DOCS_DIR, Page, iter_html_files, register_pass
+
+SOURCE_DIR = "_fonts"
+FONTS_DIR = "assets/fonts"
+FONT_CSS = "assets/css/fonts.css"
+SOURCE_MANIFEST = os.path.join(DOCS_DIR, SOURCE_DIR, "fonts.json")
+STATE_FILE = os.path.join(BUILD_DIR, "fonts.json")
+GOOGLE_CSS = "https://fonts.googleapis.com/css2"
+
+# Faces used above the fold on every page (body copy, nav links).
+PRELOAD = [("Plus Jakarta Sans", 400), ("Plus Jakarta Sans", 500)]
+EXTRA_CHARS = "‘’“”–—…•·©®™×→←°½é"
+TEXT_ATTRS = ("alt", "title", "placeholder", "value", "aria-label", "content")
+
+GOOGLE_LINK_RE = re.compile(r"""[ \t]*<link\b[^>]*\bhref=(["'])https://fonts\.(?:googleapis|gstatic)\.com[^"']*\1[^>]*>[ \t]*\n?""",
+                            re.I)
+HREF_RE = re.compile(r"""\bhref=(["'])(.*?)\1""", re.S)
+FACE_RE = re.compile(r"@font-face\s*{([^}]*)}")
+
+
+def slug(family: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", family.lower()).strip("-")
+
+
+def source_path(family: str, weight: int) -> str:
+    return os.path.join(DOCS_DIR, SOURCE_DIR, f"{slug(family)}-{weight}.ttf")
+
+
+def output_path(family: str, weight: int) -> str:
+    return f"{FONTS_DIR}/{slug(family)}-{weight}.woff2"
+
+
+def parse_google_url(url: str) -> dict[str, set[int]]:
+    """css2?family=Plus+Jakarta+Sans:wght@300;400&family=IBM+Plex+Mono -> {family: weights}."""
+    families: dict[str, set[int]] = {}
+    for spec in parse_qs(urlsplit(html.unescape(url)).query).get("family", []):
+        name, _, axes = spec.partition(":")
+        weights = {400}
+        if axes.startswith("wght@"):
+            weights = {int(w) for w in re.findall(r"\d+", axes[len("wght@"):])}
+        families.setdefault(name, set()).update(weights)
+    return families
+
+
+def requested_fonts() -> dict[str, set[int]]:
+    """Every family/weight the pages load from Google Fonts."""
+    wanted: dict[str, set[int]] = {}
+    for path in iter_html_files():
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for m in GOOGLE_LINK_RE.finditer(text):
+            href = HREF_RE.search(m.group(0)).group(2)
+            if "/css" in href:
+                for family, weights in parse_google_url(href).items():
+                    wanted.setdefault(family, set()).update(weights)
+    return wanted
+
+
+def vendored_fonts() -> list[tuple[str, int]]:
+    """(family, weight) for every font in _fonts/, from the names download() gives them."""
+    families = {slug(family): family for family, _ in PRELOAD}
+    try:
+        with open(SOURCE_MANIFEST, "r", encoding="utf-8") as f:
+            families.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    found = []
+    source_dir = os.path.join(DOCS_DIR, SOURCE_DIR)
+    for name in sorted(os.listdir(source_dir)) if os.path.isdir(source_dir) else []:
+        m = re.match(r"(.+)-(\d+)\.ttf$", name)
+        if m and m.group(1) in families:
+            found.append((families[m.group(1)], int(m.group(2))))
+    return found
+
+
+def load_state() -> dict:
+    try:
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def download(wanted: dict[str, set[int]]) -> None:
+    import requests
+
+    os.makedirs(os.path.join(DOCS_DIR, SOURCE_DIR), exist_ok=True)
+    try:
+        with open(SOURCE_MANIFEST, "r", encoding="utf-8") as f:
+            families = json.load(f)
+    except FileNotFoundError:
+        families = {}
+    session = requests.Session()
+    for family, weights in sorted(wanted.items()):
+        families[slug(family)] = family
+        missing = sorted(w for w in weights if not os.path.isfile(source_path(family, w)))
+        if not missing:
+            continue
+        # Without a browser User-Agent, Google Fonts serves whole (not unicode-range split) TTFs.
+        query = f"family={family.replace(' ', '+')}:wght@{';'.join(map(str, missing))}"
+        response = session.get(f"{GOOGLE_CSS}?{query}", timeout=30)
+        response.raise_for_status()
+        for face in FACE_RE.findall(response.text):
+            weight = int(re.search(r"font-weight:\s*(\d+)", face).group(1))
+            url = re.search(r"url\(([^)]+)\)", face).group(1)
+            data = session.get(url, timeout=60)
+            data.raise_for_status()
+            with open(source_path(family, weight), "wb") as f:
+                f.write(data.content)
+            print(f"  ↓ {family} {weight}: {len(data.content):,} bytes")
+    write_if_changed(SOURCE_MANIFEST, json.dumps(families, indent=1, sort_keys=True) + "\n")
+
+
+class TextCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chars: set[str] = set()
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in TEXT_ATTRS and value:
+                self.chars.update(value)
+
+    def handle_data(self, data):
+        self.chars.update(data)
+
+
+def used_characters() -> str:
+    """Every character the pages can show, plus ASCII and common punctuation."""
+    collector = TextCollector()
+    for path in iter_html_files():
+        with open(path, "r", encoding="utf-8") as f:
+            collector.feed(f.read())
+    collector.close()
+    chars = {c for c in collector.chars if c.isprintable()}
+    chars.update(chr(c) for c in range(0x20, 0x7F))
+    chars.update(EXTRA_CHARS)
+    return "".join(sorted(chars))
+
+
+def subset(source: str, out: str, text: str) -> None:
+    from fontTools import subset as ft_subset
+
+    options = ft_subset.Options()
+    options.flavor = "woff2"
+    options.hinting = False
+    options.desubroutinize = True
+    options.layout_features = ["*"]
+    font = ft_subset.load_font(source, options)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(text=text)
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    ft_subset.save_font(font, out, options)
+
+
+def font_css(fonts: list[tuple[str, int]]) -> str:
+    faces = []
+    for family, weight in fonts:
+        url = os.path.relpath(os.path.join(DOCS_DIR, output_path(family, weight)),
+                              os.path.dirname(os.path.join(DOCS_DIR, FONT_CSS))).replace(os.sep, "/")
+        faces.append(f"@font-face {{\n    font-family: '{family}';\n    font-style: normal;\n"
+                     f"    font-weight: {weight};\n    font-display: swap;\n"
+                     f"    src: url({url}) format('woff2');\n}}")
+    return "/* Generated by self_host_fonts.py */\n" + "\n".join(faces) + "\n"
+
+
+def build() -> None:
+    fonts = vendored_fonts()
+    if not fonts:
+        raise SystemExit(f"No fonts in {SOURCE_DIR}/; run with --download first")
+    text = used_characters()
+    state = load_state()
+    subsets = state.setdefault("subsets", {})
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    print(f"{len(text)} characters in use")
+    for family, weight in fonts:
+        source = source_path(family, weight)
+        out = os.path.join(DOCS_DIR, output_path(family, weight))
+        with open(source, "rb") as f:
+            key = hashlib.sha256(f.read()).hexdigest() + ":" + text_hash
+        if subsets.get(output_path(family, weight)) == key and os.path.isfile(out):
+            status = "unchanged"
+        else:
+            subset(source, out, text)
+            subsets[output_path(family, weight)] = key
+            status = "subset"
+        print(f"  {family} {weight}: {os.path.getsize(source):>9,} -> {os.path.getsize(out):>7,} bytes ({status})")
+
+    write_if_changed(os.path.join(DOCS_DIR, FONT_CSS), font_css(fonts))
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    print(f"Wrote {FONT_CSS}")
+
+
+def self_hosted_font_links(text: str, prefix: str) -> str:
+    """Swap Google Fonts links for preloads and the local fonts.css."""
+    links = list(GOOGLE_LINK_RE.finditer(text))
+    if not links:
+        return text
+    indent = re.match(r"[ \t]*", links[0].group(0)).group(0)
+    head = [f'{indent}<link rel="preload" href="{prefix}{output_path(family, weight)}" as="font" '
+            f'type="font/woff2" crossorigin>\n'
+            for family, weight in PRELOAD if os.path.isfile(os.path.join(DOCS_DIR, output_path(family, weight)))]
+    head.append(f'{indent}<link rel="stylesheet" href="{prefix}{FONT_CSS}">\n')
+    if f'href="{prefix}{FONT_CSS}"' in text:
+        head = []
+    out, pos = [], 0
+    for k, m in enumerate(links):
+        out.append(text[pos:m.start()])
+        if k == 0:
+            out.extend(head)
+        pos = m.end()
+    out.append(text[pos:])
+    return "".join(out)
+
+
+@register_pass("self-hosted-fonts", kind="text", default=False)
+def self_hosted_fonts(page: Page) -> bool:
+    """Load the subset, self-hosted fonts instead of Google Fonts."""
+    if not os.path.isfile(os.path.join(DOCS_DIR, FONT_CSS)):
+        return False
+    new = self_hosted_font_links(page.text, page.prefix)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Vendor, subset and self-host the site's web fonts")
+    parser.add_argument("--download", action="store_true", help="Fetch the full fonts from Google Fonts first")
+    args = parser.parse_args()
+    if args.download:
+        download(requested_fonts())
+    build()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
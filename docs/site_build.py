@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Incremental page builds for the generator scripts.
+
+Each generated page is described by its inputs: the template string, the data
+record, the set of images it references and the CSS/JS files it includes. A
+hash of those inputs is stored per output page in .build/site-build-state.json;
+pages whose inputs hash is unchanged are skipped without rendering, and pages
+that do render are only written when their bytes differ, so timestamps of
+untouched files stay stable.
+
+Usage from a generator:
+
+  from site_build import IncrementalBuild
+
+  with IncrementalBuild(force="--force" in sys.argv) as build:
+      for slug, data in CITIES.items():
+          build.page(
+              f"cities/{slug}.html",
+              lambda: TEMPLATE.format(**data),
+              template=TEMPLATE,
+              record=data,
+              images=[f"assets/images/projects/{image}.jpg"],
+              assets=["assets/css/style.css", "assets/js/main.js"],
+          )
+
+Run directly to show what the state file tracks:
+  python3 site_build.py
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Iterable
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+BUILD_DIR = os.path.join(DOCS_DIR, ".build")
+STATE_FILE = os.path.join(BUILD_DIR, "site-build-state.json")
+STATE_VERSION = 1
+HASH_CACHE = os.path.join(BUILD_DIR, "file-hashes.json")
+
+
+def _rel(path: str) -> str:
+    return os.path.relpath(os.path.abspath(os.path.join(DOCS_DIR, path)), DOCS_DIR).replace(os.sep, "/")
+
+
+def write_if_changed(path: str, content: str) -> bool:
+    """Write content to path only if it differs from what is there. Returns True if written."""
+    data = content.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".__tmp__"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+class IncrementalBuild:
+    """Tracks input hashes per output page and skips pages whose inputs are unchanged."""
+
+    def __init__(self, state_file: str = STATE_FILE, force: bool = False, verbose: bool = True):
+        self.state_file = state_file
+        self.force = force
+        self.verbose = verbose
+        self.pages: dict[str, str] = {}
+        self.files: dict[str, list] = {}
+        self.built = 0
+        self.written = 0
+        self.skipped = 0
+        self._started = time.perf_counter()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if state.get("version") != STATE_VERSION:
+            return
+        self.pages = state.get("pages", {})
+        self.files = state.get("files", {})
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        payload = {"version": STATE_VERSION, "pages": self.pages, "files": self.files}
+        write_if_changed(self.state_file, json.dumps(payload, indent=1, sort_keys=True) + "\n")
+
+    def __enter__(self) -> "IncrementalBuild":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.save()
+            if self.verbose:
+                self.report()
+
+    def file_digest(self, rel_path: str) -> str:
+        """Content hash of an included file, cached by (size, mtime) so unchanged files aren't re-read."""
+        path = os.path.join(DOCS_DIR, rel_path)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return "missing"
+        cached = self.files.get(rel_path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self.files[rel_path] = [st.st_size, st.st_mtime_ns, digest]
+        return digest
+
+    def inputs_digest(self, template: str, record: object = None,
+                      images: Iterable[str] = (), assets: Iterable[str] = ()) -> str:
+        h = hashlib.sha256()
+        h.update(template.encode("utf-8"))
+        h.update(b"\0record\0")
+        h.update(json.dumps(record, sort_keys=True, default=str).encode("utf-8"))
+        # Images are large and many; their identity is the path plus size/mtime.
+        h.update(b"\0images\0")
+        for rel_path in sorted(set(_rel(p) for p in images)):
+            try:
+                st = os.stat(os.path.join(DOCS_DIR, rel_path))
+                stamp = f"{st.st_size}:{st.st_mtime_ns}"
+            except FileNotFoundError:
+                stamp = "missing"
+            h.update(f"{rel_path}={stamp}\n".encode("utf-8"))
+        h.update(b"\0assets\0")
+        for rel_path in sorted(set(_rel(p) for p in assets)):
+            h.update(f"{rel_path}={self.file_digest(rel_path)}\n".encode("utf-8"))
+        return h.hexdigest()
+
+    def page(self, out_path: str, render: Callable[[], str], template: str, record: object = None,
+             images: Iterable[str] = (), assets: Iterable[str] = ()) -> bool:
+        """Render and write out_path if its inputs changed. Returns True if the page was rendered."""
+        key = _rel(out_path)
+        abs_out = os.path.join(DOCS_DIR, key)
+        digest = self.inputs_digest(template, record, images, assets)
+
+        if not self.force and self.pages.get(key) == digest and os.path.exists(abs_out):
+            self.skipped += 1
+            return False
+
+        self.built += 1
+        if write_if_changed(abs_out, render()):
+            self.written += 1
+            if self.verbose:
+                print(f"✓ Built {key}")
+        self.pages[key] = digest
+        return True
+
+    def report(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        print(f"\n{self.built} rendered ({self.written} written), "
+              f"{self.skipped} up to date in {elapsed:.3f}s")
+
+
+class FileHashes:
+    """
+    SHA-256 of files under docs/, cached by (size, mtime) in .build/file-hashes.json.
+
+    Pass an ImageIndex (image_index.py) to take image hashes from it instead.
+    """
+
+    def __init__(self, index=None, cache_file: str = HASH_CACHE):
+        self.index = index
+        self.cache_file = cache_file
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                self.cache: dict[str, list] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.cache = {}
+
+    def digest(self, rel_path: str) -> tuple[str, int]:
+        """(sha256, size) of a file, by path relative to docs/."""
+        if self.index is not None and self.index.is_current(rel_path):
+            entry = self.index.images[rel_path]
+            return entry["sha256"], entry["size"]
+        path = os.path.join(DOCS_DIR, rel_path)
+        st = os.stat(path)
+        cached = self.cache.get(rel_path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2], st.st_size
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.cache[rel_path] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest(), st.st_size
+
+    def save(self) -> None:
+        self.cache = {p: v for p, v in self.cache.items() if os.path.exists(os.path.join(DOCS_DIR, p))}
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        write_if_changed(self.cache_file, json.dumps(self.cache, sort_keys=True, separators=(",", ":")) + "\n")
+
+
+def main() -> None:
+    build = IncrementalBuild(verbose=False)
+    if not build.pages:
+        print(f"No build state yet ({os.path.relpath(STATE_FILE, DOCS_DIR)})")
+        return
+    missing = [p for p in build.pages if not os.path.exists(os.path.join(DOCS_DIR, p))]
+    print(f"{len(build.pages)} pages tracked, {len(build.files)} included files cached")
+    for p in missing:
+        print(f"  ⚠ {p}: tracked but missing (will rebuild)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Run every HTML fix over the site in a single walk.
+
+Each fix is registered as a *pass*. Pages are read and parsed once, every
+pass runs over that same page (text passes first, then passes that work on
+the BeautifulSoup tree), and the file is only rewritten when the result
+actually differs from what is on disk.
+
+Soup passes never re-serialize the whole document. The parse records where
+every tag starts in the source, and only what the passes changed is spliced
+back into the original text: the start tag of an element whose attributes
+changed (other attributes keep their source text), removed elements (with
+their line, if they stood alone on it) and inserted elements. Indentation,
+attribute order, entities and everything else stay as they were.
+
+Usage:
+  python3 site_transforms.py                      # run all default passes
+  python3 site_transforms.py --only remove-inline-widths,space-titles
+  python3 site_transforms.py --dry-run
+  python3 site_transforms.py --list
+
+Other scripts register extra passes with @register_pass and are listed in
+PASS_MODULES so they are picked up here.
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import importlib
+import os
+import re
+import time
+from typing import Callable
+
+from bs4 import BeautifulSoup
+
+import remove_inline_widths as inline_widths
+import restore_page_structure
+from site_build import write_if_changed
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that register additional passes when imported.
+PASS_MODULES: list[str] = [
+    "gallery_markup",
+    "dedupe_images",
+    "standardize_nav",
+    "prune_css",
+    "critical_css",
+    "hoist_inline",
+    "bundle_js",
+    "self_host_fonts",
+    "image_priority",
+    "r2_urls",
+]
+
+SPACES = [
+    "bathrooms",
+    "bedrooms",
+    "kitchens",
+    "dining-rooms",
+    "living-spaces",
+    "office-spaces",
+    "kids-bedrooms",
+    "entryways",
+    "bar-area",
+    "laundry-rooms",
+    "outdoor-spaces",
+]
+
+HOME_PAGES = {"index.html", "index-variant-2.html"}
+
+# Directories that never contain site pages.
+SKIP_DIRS = {"assets"}
+
+
+def page_family(rel_path: str) -> str:
+    """Classify a page (path relative to docs/) into a template family."""
+    name = os.path.basename(rel_path)
+    if rel_path.startswith("projects/"):
+        return "project"
+    if rel_path.startswith("cities/") or name == "cities-we-serve.html":
+        return "city"
+    if name in HOME_PAGES:
+        return "home"
+    if name == "portfolio.html":
+        return "portfolio"
+    if name[:-len(".html")] in SPACES:
+        return "space"
+    return "other"
+
+
+# ---------------------------------------------------------------------------
+# Source-preserving output for soup passes
+# ---------------------------------------------------------------------------
+
+START_TAG_RE = re.compile(r"""<[^\s/>]+(?:[^>"']|"[^"]*"|'[^']*')*>""")
+TAG_NAME_RE = re.compile(r"<([^\s/>]+)")
+ATTR_RE = re.compile(r"""([^\s"'>/=]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'=<>`]+))?""")
+RAW_TEXT = {"script", "style", "textarea", "title"}
+
+
+class TrackedSoup:
+    """A parse of text that remembers where each tag came from, so changes can be spliced back."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.soup = BeautifulSoup(text, "html.parser")
+        line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        # id(tag) -> (tag, start offset, start-tag end, parent id, attrs as parsed, name, void)
+        self.origin: dict[int, tuple] = {}
+        for tag in self.soup.find_all(True):
+            if tag.sourceline is None:
+                continue
+            start = line_starts[tag.sourceline - 1] + tag.sourcepos
+            m = START_TAG_RE.match(text, start)
+            if m is None:
+                continue
+            self.origin[id(tag)] = (tag, start, m.end(), id(tag.parent), _attrs(tag), tag.name,
+                                    tag.can_be_empty_element)
+
+    def _element_end(self, key: int) -> int:
+        """Offset just past the end tag of an original element (decompose() forgets the name)."""
+        _, start, tag_end, _, _, tag_name, void = self.origin[key]
+        if void or self.text[tag_end - 2] == "/":
+            return tag_end
+        name = re.escape(tag_name)
+        if tag_name in RAW_TEXT:
+            m = re.compile(rf"</{name}\s*>", re.I).search(self.text, tag_end)
+            if m is None:
+                raise ValueError(f"<{tag_name}> at offset {start} is never closed")
+            return m.end()
+        scan = re.compile(rf"<!--.*?-->|<(/?){name}(?=[\s/>])[^>]*>", re.I | re.S)
+        depth, pos = 1, tag_end
+        while depth:
+            m = scan.search(self.text, pos)
+            if m is None:
+                raise ValueError(f"<{tag_name}> at offset {start} is never closed")
+            pos = m.end()
+            if not m.group(0).startswith("<!--"):
+                depth += -1 if m.group(1) else 1
+        return pos
+
+    def _line_span(self, start: int, end: int) -> tuple[int, int]:
+        """Widen start..end to whole lines when nothing else shares them."""
+        line_start = self.text.rfind("\n", 0, start) + 1
+        line_end = self.text.find("\n", end)
+        line_end = len(self.text) if line_end < 0 else line_end + 1
+        if self.text[line_start:start].strip() or self.text[end:line_end].strip():
+            return start, end
+        return line_start, line_end
+
+    def _indent(self, start: int) -> str | None:
+        """Whitespace before start on its line, or None if something else precedes it."""
+        before = self.text[self.text.rfind("\n", 0, start) + 1:start]
+        return None if before.strip() else before
+
+    def render(self) -> str:
+        """The original text with the tree's changes spliced in."""
+        present = {id(tag): tag for tag in self.soup.find_all(True)}
+        root = id(self.soup)
+
+        def in_place(key: int) -> bool:
+            return key == root or key in present and key in self.origin \
+                and id(present[key].parent) == self.origin[key][3]
+
+        edits: list[tuple[int, int, int, str]] = []  # (start, 0 = insert / 1 = replace, end, text)
+        for key, (tag, start, tag_end, parent, attrs, _, _) in self.origin.items():
+            if in_place(key):
+                if _attrs(tag) != attrs:
+                    edits.append((start, 1, tag_end, _start_tag(self.text[start:tag_end], attrs, _attrs(tag))))
+            elif in_place(parent):
+                # Removed (or moved away): cut the outermost element.
+                cut_start, cut_end = self._line_span(start, self._element_end(key))
+                edits.append((cut_start, 1, cut_end, ""))
+        for key, tag in present.items():
+            if not in_place(key) and in_place(id(tag.parent)):
+                edits.append(self._insertion(tag, in_place))
+
+        edits.sort(key=lambda e: (e[0], e[1]))
+        out, cursor = [], 0
+        for start, _, end, replacement in edits:
+            if start < cursor:
+                raise ValueError(f"overlapping changes at offset {start}")
+            out.append(self.text[cursor:start])
+            out.append(replacement)
+            cursor = end
+        out.append(self.text[cursor:])
+        return "".join(out)
+
+    def _insertion(self, tag, in_place) -> tuple[int, int, int, str]:
+        """Where a new element goes: before its next original sibling, after its previous one, or
+        at the start of its parent; on a line of its own when its neighbour has one."""
+        markup = self._markup(tag)
+        for sibling in tag.next_siblings:
+            if getattr(sibling, "name", None) and in_place(id(sibling)):
+                start = self.origin[id(sibling)][1]
+                indent = self._indent(start)
+                return start, 0, start, markup if indent is None else f"{markup}\n{indent}"
+        for sibling in tag.previous_siblings:
+            if getattr(sibling, "name", None) and in_place(id(sibling)):
+                start = self.origin[id(sibling)][1]
+                end = self._element_end(id(sibling))
+                indent = self._indent(start)
+                return end, 0, end, markup if indent is None else f"\n{indent}{markup}"
+        if tag.parent is self.soup:
+            return len(self.text), 0, len(self.text), markup
+        tag_end = self.origin[id(tag.parent)][2]
+        return tag_end, 0, tag_end, markup
+
+
+    def _markup(self, tag) -> str:
+        """A new element's HTML; void elements are closed the way the page closes its own."""
+        if not tag.can_be_empty_element or tag.contents:
+            return str(tag)
+        xhtml = "/>" in self.text[:self.text.find("</head")]
+        attrs = "".join(f" {_attr_text(k, v)}" for k, v in _attrs(tag).items())
+        return f"<{tag.name}{attrs}{'/>' if xhtml else '>'}"
+
+
+def _attrs(tag) -> dict[str, str]:
+    return {k: " ".join(v) if isinstance(v, list) else v for k, v in tag.attrs.items()}
+
+
+def _attr_text(name: str, value: str) -> str:
+    return name if value == "" else f'{name}="{html.escape(value)}"'
+
+
+def _start_tag(source: str, old: dict[str, str], new: dict[str, str]) -> str:
+    """source (an element's start tag) with only the attributes that differ rewritten."""
+    name = TAG_NAME_RE.match(source)
+    close = len(source) - (2 if source.endswith("/>") else 1)
+    out, cursor, seen = [], name.end(), set()
+    for m in ATTR_RE.finditer(source, name.end(), close):
+        key = m.group(1).lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        if key not in new:
+            # Drop the attribute with the whitespace before it.
+            out.append(source[cursor:m.start()].rstrip(" \t\n"))
+        elif new[key] != old.get(key):
+            out.append(source[cursor:m.start()] + _attr_text(key, new[key]))
+        else:
+            out.append(source[cursor:m.end()])
+        cursor = m.end()
+    added = "".join(f" {_attr_text(k, v)}" for k, v in new.items() if k not in seen)
+    return source[:name.end()] + "".join(out) + added + source[cursor:]
+
+
+class Page:
+    """One HTML file, read once and parsed at most once."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rel = os.path.relpath(path, DOCS_DIR).replace(os.sep, "/")
+        self.name = os.path.basename(path)
+        self.depth = self.rel.count("/")
+        self.prefix = "../" * self.depth
+        self.family = page_family(self.rel)
+        with open(path, "r", encoding="utf-8") as f:
+            self.original = f.read()
+        self.text = self.original
+        self._tracked: TrackedSoup | None = None
+        self.tree_changed = False
+        # Other files the passes want written along with the page (docs-relative path -> content).
+        self.files: dict[str, str] = {}
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._tracked is None:
+            self._tracked = TrackedSoup(self.text)
+        return self._tracked.soup
+
+    def render(self) -> str:
+        if self._tracked is not None and self.tree_changed:
+            return self._tracked.render()
+        return self.text
+
+    def write_file(self, rel_path: str, content: str) -> None:
+        """Have the engine write rel_path with the page; nothing is written on a dry run."""
+        self.files[rel_path] = content
+
+    def local_path(self, ref: str) -> str:
+        """Resolve a page-relative reference to a path relative to docs/."""
+        ref = ref.split("#", 1)[0].split("?", 1)[0]
+        joined = os.path.normpath(os.path.join(os.path.dirname(self.rel), ref))
+        return joined.replace(os.sep, "/")
+
+
+class Pass:
+    def __init__(self, name: str, func: Callable[[Page], bool], kind: str,
+                 families: tuple[str, ...] | None, default: bool):
+        self.name = name
+        self.func = func
+        self.kind = kind
+        self.families = families
+        self.default = default
+        self.doc = (func.__doc__ or "").strip().split("\n")[0]
+
+    def applies_to(self, page: Page) -> bool:
+        return self.families is None or page.family in self.families
+
+
+PASSES: dict[str, Pass] = {}
+
+
+def register_pass(name: str, kind: str = "soup", families: tuple[str, ...] | None = None,
+                  default: bool = True):
+    """
+    Register a fix as a pass.
+
+    kind="text" passes receive the page and edit page.text; they run before
+    the tree is parsed. kind="soup" passes edit page.soup: they may change
+    attributes, remove elements and insert new ones, which is what the
+    engine splices back (see TrackedSoup); edits to text nodes are not
+    written. Either kind returns True when it changed something.
+    """
+    if kind not in ("text", "soup"):
+        raise ValueError(f"Unknown pass kind: {kind}")
+
+    def decorator(func: Callable[[Page], bool]) -> Callable[[Page], bool]:
+        PASSES[name] = Pass(name, func, kind, families, default)
+        return func
+
+    return decorator
+
+
+def load_pass_modules() -> None:
+    for module in PASS_MODULES:
+        importlib.import_module(module)
+
+
+def iter_html_files(docs_dir: str = DOCS_DIR) -> list[str]:
+    files: list[str] = []
+    for root, dirs, names in os.walk(docs_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")) and d not in SKIP_DIRS)
+        for name in names:
+            if name.endswith(".html"):
+                files.append(os.path.join(root, name))
+    files.sort()
+    return files
+
+
+def select_passes(names: list[str] | None = None) -> list[Pass]:
+    load_pass_modules()
+    if names:
+        unknown = [n for n in names if n not in PASSES]
+        if unknown:
+            raise SystemExit(f"Unknown pass(es): {', '.join(unknown)}")
+        chosen = [PASSES[n] for n in names]
+    else:
+        chosen = [p for p in PASSES.values() if p.default]
+    # Text passes first so the tree is only parsed once.
+    return [p for p in chosen if p.kind == "text"] + [p for p in chosen if p.kind == "soup"]
+
+
+def run(names: list[str] | None = None, dry_run: bool = False,
+        files: list[str] | None = None, verbose: bool = True) -> dict[str, float]:
+    """Run passes over every page. Returns cumulative seconds per pass."""
+    passes = select_passes(names)
+    timings: dict[str, float] = {p.name: 0.0 for p in passes}
+    hits: dict[str, int] = {p.name: 0 for p in passes}
+    timings["(read)"] = timings["(parse)"] = timings["(write)"] = 0.0
+
+    files = files if files is not None else iter_html_files()
+    changed = failed = 0
+
+    for path in files:
+        t0 = time.perf_counter()
+        page = Page(path)
+        timings["(read)"] += time.perf_counter() - t0
+
+        for p in passes:
+            if not p.applies_to(page):
+                continue
+            if p.kind == "soup" and page._tracked is None:
+                t0 = time.perf_counter()
+                page.soup
+                timings["(parse)"] += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            did_change = p.func(page)
+            timings[p.name] += time.perf_counter() - t0
+            if did_change:
+                hits[p.name] += 1
+                if p.kind == "soup":
+                    page.tree_changed = True
+
+        t0 = time.perf_counter()
+        try:
+            output = page.render()
+        except ValueError as e:
+            # A change that can't be spliced into the source: leave the page as it is.
+            failed += 1
+            print(f"✗ {page.rel}: {e}")
+            continue
+        if not dry_run:
+            for rel_path, content in page.files.items():
+                write_if_changed(os.path.join(DOCS_DIR, rel_path), content)
+        if output != page.original:
+            changed += 1
+            if verbose:
+                print(f"✓ {'Would fix' if dry_run else 'Fixed'}: {page.rel}")
+            if not dry_run:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(output)
+        timings["(write)"] += time.perf_counter() - t0
+
+    if verbose:
+        print(f"\n{'=' * 60}")
+        print(f"{len(files)} pages, {changed} {'would change' if dry_run else 'changed'}"
+              + (f", {failed} left unchanged (see ✗ above)" if failed else ""))
+        print(f"{'=' * 60}")
+        print(f"{'pass':<32}{'pages hit':>10}{'seconds':>12}")
+        for name, seconds in sorted(timings.items(), key=lambda kv: -kv[1]):
+            count = hits.get(name, "")
+            print(f"{name:<32}{count!s:>10}{seconds:>12.3f}")
+        print(f"{'total':<32}{'':>10}{sum(timings.values()):>12.3f}")
+
+    return timings
+
+
+# ---------------------------------------------------------------------------
+# Built-in passes (ported from the one-off fix scripts)
+# ---------------------------------------------------------------------------
+
+@register_pass("strip-stray-chars", kind="text")
+def strip_stray_chars(page: Page) -> bool:
+    """Remove stray \\1 characters left by bad regex replacements."""
+    new = restore_page_structure.fix_stray_characters(page.text)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+@register_pass("navbar-script-defer", kind="text")
+def navbar_script_defer(page: Page) -> bool:
+    """Ensure load-navbar.js is included with defer."""
+    new = restore_page_structure.ensure_navbar_script(page.text, page.depth > 0)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+@register_pass("remove-year-field", kind="text", families=("project",))
+def remove_year_field(page: Page) -> bool:
+    """Remove the YEAR field from project header metadata."""
+    new = restore_page_structure.remove_year_field(page.text)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+@register_pass("project-masonry-js", kind="text", families=("project",))
+def project_masonry_js(page: Page) -> bool:
+    """Load the shared spaces-masonry.js on project pages, replacing the old inline masonry script."""
+    if "image-gallery-grid" not in page.text:
+        return False
+    new = restore_page_structure.ensure_masonry_js(page.text)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+@register_pass("space-titles", kind="text", families=("space",))
+def space_titles(page: Page) -> bool:
+    """Make space page <title>/<h1> match the SPACES dropdown exactly."""
+    new = restore_page_structure.fix_space_title(page.text, page.name)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+@register_pass("remove-inline-widths", kind="text", families=("space",))
+def remove_inline_widths(page: Page) -> bool:
+    """Drop inline width: 100% from masonry tiles (the masonry script sizes them)."""
+    new = inline_widths.strip_inline_widths(page.text)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+HEAD_RE = re.compile(r"<head\b[^>]*>.*?</head\s*>", re.I | re.S)
+HEAD_TAG_RE = re.compile(r"""[ \t]*(<link\b(?:[^>"']|"[^"]*"|'[^']*')*>|"""
+                         r"""<script\b(?:[^>"']|"[^"]*"|'[^']*')*\bsrc=(?:[^>"']|"[^"]*"|'[^']*')*>\s*</script\s*>)"""
+                         r"""[ \t]*\n?""", re.I)
+
+
+@register_pass("dedupe-head-links", kind="text", default=False)
+def dedupe_head_links(page: Page) -> bool:
+    """Remove repeated <link>/<script src> tags in <head>."""
+    head = HEAD_RE.search(page.text)
+    if head is None:
+        return False
+    seen: set[tuple] = set()
+    cuts: list[tuple[int, int]] = []
+    for m in HEAD_TAG_RE.finditer(page.text, head.start(), head.end()):
+        tag = TAG_NAME_RE.match(m.group(1))
+        attrs = {a.group(1).lower(): (a.group(2) or "").strip("\"'")
+                 for a in ATTR_RE.finditer(m.group(1), tag.end(), m.group(1).index(">"))}
+        key = (tag.group(1).lower(), tuple(sorted(attrs.items())))
+        if key in seen:
+            # The whole line when the tag stands alone on it, else just the tag.
+            line_start = page.text.rfind("\n", 0, m.start()) + 1
+            alone = not page.text[line_start:m.start()].strip() and m.group(0).endswith("\n")
+            cuts.append((m.start(), m.end()) if alone else (m.start(1), m.end(1)))
+        else:
+            seen.add(key)
+    if not cuts:
+        return False
+    for start, end in reversed(cuts):
+        page.text = page.text[:start] + page.text[end:]
+    return True
+
+
+@register_pass("purge-missing-space-images", families=("space",), default=False)
+def purge_missing_space_images(page: Page) -> bool:
+    """Remove gallery tiles whose local image file no longer exists."""
+    space = page.name[:-len(".html")]
+    prefix = f"assets/images/spaces/{space}/"
+    # Images are served from R2; without a local copy there is nothing to check against.
+    if not os.path.isdir(os.path.join(DOCS_DIR, prefix)):
+        return False
+
+    changed = False
+    for img in list(page.soup.find_all("img")):
+        src = img.get("data-r2-local-src") or img.get("src") or ""
+        if not src.startswith(prefix):
+            continue
+        if img.find_parent("div", class_="first-row-grid"):
+            continue
+        if not os.path.exists(os.path.join(DOCS_DIR, src)):
+            container = img.find_parent("div", class_="parallax-image")
+            (container or img).decompose()
+            changed = True
+    return changed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", help="Comma-separated pass names to run")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--list", action="store_true", help="List registered passes")
+    args = parser.parse_args()
+
+    if args.list:
+        load_pass_modules()
+        for p in PASSES.values():
+            scope = ",".join(p.families) if p.families else "all"
+            flag = "" if p.default else " (opt-in)"
+            print(f"{p.name:<32}{p.kind:<6}{scope:<20}{p.doc}{flag}")
+        return
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()] if args.only else None
+    run(names, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    # Go through the importable module so passes registered by PASS_MODULES
+    # (which import site_transforms) land in the same registry.
+    import site_transforms
+
+    site_transforms.main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Decide which space page each folder of an ingested archive belongs to.
+
+download_spaces_images.py used to try every SPACE_MAPPING name against every
+part of the path as a substring, both ways round, in dict order: "bedrooms"
+claimed "Kids Bedrooms", and "Spaces" (inside "living-spaces") claimed the
+whole archive. The classifier looks at the folder names from the innermost
+out and takes the first one that matches, trying in turn:
+
+  exact    the folder's normalized name is a space or an alias
+           ("Kids' Bedrooms", "kids_bedroom" and "KIDS BEDROOMS" are all
+           kids-bedroom: lower case, words split on anything that isn't a
+           letter or digit, trailing "s" dropped from each word)
+  prefix   the longest space/alias name that starts the folder name, at a
+           word boundary, by walking a trie ("Kitchens 2024" -> kitchens,
+           "Kids Bedrooms - Smith" -> kids-bedrooms, never bedrooms); or,
+           if the folder name is itself the start of exactly one name
+           ("Kitch"), that one
+  fuzzy    the only name within one edit per four letters, at most
+           MAX_DISTANCE ("Bathroms", "Kitchn")
+
+A folder whose candidates tie is ambiguous and counts as unmatched. Images in
+folders that match nothing are quarantined (see QUARANTINE_DIR) instead of
+being skipped. Every decision comes with the reason, so the ingest report
+can show why each folder went where it did.
+
+Usage:
+  python3 space_classifier.py "JAC Photos/Kids Bedrooms" "Misc/Kitchen 2"
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+
+from site_build import BUILD_DIR
+
+QUARANTINE_DIR = os.path.join(BUILD_DIR, "spaces-quarantine")
+
+SPACES = (
+    "bathrooms", "bedrooms", "kitchens", "dining-rooms", "living-spaces", "office-spaces",
+    "kids-bedrooms", "entryways", "bar-area", "laundry-rooms", "outdoor-spaces",
+)
+# Other names the photographer's folders use for a space.
+ALIASES = {
+    "bath": "bathrooms",
+    "powder-room": "bathrooms",
+    "primary-bedroom": "bedrooms",
+    "master-bedroom": "bedrooms",
+    "kids-room": "kids-bedrooms",
+    "nursery": "kids-bedrooms",
+    "dining": "dining-rooms",
+    "living-room": "living-spaces",
+    "family-room": "living-spaces",
+    "office": "office-spaces",
+    "study": "office-spaces",
+    "entry": "entryways",
+    "foyer": "entryways",
+    "mudroom": "entryways",
+    "bar": "bar-area",
+    "wet-bar": "bar-area",
+    "laundry": "laundry-rooms",
+    "outdoor": "outdoor-spaces",
+    "patio": "outdoor-spaces",
+}
+MAX_DISTANCE = 2
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    """Folder or space name -> its key: "Kids' Bedrooms" -> "kids-bedroom"."""
+    words = WORD_RE.findall(name.lower().replace("'", ""))
+    return "-".join(w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+                    for w in words)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 once it's certain to exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SpaceClassifier:
+    """Normalized-name index over the spaces and their aliases."""
+
+    def __init__(self, spaces=SPACES, aliases: dict[str, str] | None = None):
+        aliases = ALIASES if aliases is None else aliases
+        # key -> (space, the name it came from)
+        self.keys: dict[str, tuple[str, str]] = {}
+        for name, space in [(s, s) for s in spaces] + sorted(aliases.items()):
+            key = normalize(name)
+            if key in self.keys and self.keys[key][0] != space:
+                raise ValueError(f"{name!r} normalizes to {key!r}, already used for {self.keys[key][0]}")
+            self.keys.setdefault(key, (space, name))
+        # Trie of the keys, one character per level; "$" marks the end of a key.
+        self.trie: dict = {}
+        for key in self.keys:
+            node = self.trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node["$"] = key
+        self._folders: dict[str, tuple[str | None, str, str]] = {}
+
+    def _completions(self, node: dict) -> set[str]:
+        found = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for ch, child in node.items():
+                if ch == "$":
+                    found.add(self.keys[child][0])
+                else:
+                    stack.append(child)
+        return found
+
+    def classify_folder(self, folder: str) -> tuple[str | None, str, str]:
+        """(space or None, how, reason) for one folder name; how is exact/prefix/fuzzy/ambiguous/none."""
+        if folder in self._folders:
+            return self._folders[folder]
+        key = normalize(folder)
+        result = self._classify_key(folder, key) if key else (None, "none", "no letters or digits")
+        self._folders[folder] = result
+        return result
+
+    def _classify_key(self, folder: str, key: str) -> tuple[str | None, str, str]:
+        if key in self.keys:
+            space, name = self.keys[key]
+            return space, "exact", f"{folder!r} matches {name!r}"
+
+        # Longest key that starts the folder's key and ends at a word boundary.
+        node = self.trie
+        longest = None
+        for i, ch in enumerate(key):
+            node = node.get(ch)
+            if node is None:
+                break
+            if "$" in node and (i + 1 == len(key) or key[i + 1] == "-"):
+                longest = node["$"]
+        else:
+            # The whole folder key is the start of one or more keys.
+            spaces = self._completions(node)
+            if len(spaces) == 1 and longest is None:
+                space = spaces.pop()
+                return space, "prefix", f"{folder!r} is the start of {space!r}"
+            if len(spaces) > 1 and longest is None:
+                return None, "ambiguous", f"{folder!r} starts {', '.join(sorted(spaces))}"
+        if longest is not None:
+            space, name = self.keys[longest]
+            return space, "prefix", f"{folder!r} starts with {name!r}"
+
+        limit = min(MAX_DISTANCE, len(key) // 4)
+        scored = sorted((edit_distance(key, k, limit), k) for k in self.keys)
+        best = [k for d, k in scored if d == scored[0][0] and d <= limit]
+        spaces = sorted({self.keys[k][0] for k in best})
+        if len(spaces) == 1:
+            space, name = self.keys[best[0]]
+            return space, "fuzzy", f"{folder!r} is {scored[0][0]} edit(s) from {name!r}"
+        if spaces:
+            return None, "ambiguous", f"{folder!r} is {scored[0][0]} edit(s) from {', '.join(spaces)}"
+        return None, "none", f"{folder!r} matches no space"
+
+    def classify(self, folder_path: str) -> tuple[str | None, str, str]:
+        """(space or None, how, reason) for a folder path in the archive; how is "quarantine" if nothing matches."""
+        parts = [p for p in folder_path.split("/") if p and p != "."]
+        misses = []
+        for part in reversed(parts):
+            space, how, reason = self.classify_folder(part)
+            if space:
+                return space, how, reason
+            misses.append(reason)
+        return None, "quarantine", "; ".join(misses) or "top level of the archive"
+
+
+def quarantine_path(folder_path: str, filename: str) -> str:
+    """Where an unmatched image goes: .build/spaces-quarantine/<archive folder>/<file>."""
+    parts = [p for p in folder_path.split("/") if p and p not in (".", "..")]
+    return os.path.join(QUARANTINE_DIR, *parts, filename)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Show which space each archive folder is filed under")
+    parser.add_argument("folders", nargs="+", help="Folder paths as they appear in the archive")
+    args = parser.parse_args()
+    classifier = SpaceClassifier()
+    for folder in args.folders:
+        space, how, reason = classifier.classify(folder)
+        print(f"{folder:<40} {space or '(quarantine)':<16} {how:<10} {reason}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
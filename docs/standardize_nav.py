@@ -1,224 +1,213 @@
 #!/usr/bin/env python3
 """
-Standardize navigation across all pages to use the same structure:
-- Image logo
-- nav-menu class with id="navMenu"
-- Mobile menu toggle button
-- Proper dropdown structure
+Render the site navigation into every page at build time.
+
+There is one canonical nav: the NAV structure below (logo, HOME, PORTFOLIO
+with the project dropdown, SPACES, SERVICES, ABOUT, CONTACT, mobile toggle).
+The `inline-navbar` pass of site_transforms.py writes it directly after
+<body> on every page, replacing any nav from a previous run, with:
+- links made relative to the page's depth ("../" from cities/ and projects/),
+- the active section's nav-link already carrying the "active" class.
+
+Pages therefore ship with their navbar in the HTML; load-navbar.js only adds
+the dropdown/mobile-toggle behaviour.
+
+Usage:
+  python3 standardize_nav.py            # same as: site_transforms.py --only inline-navbar
+  python3 standardize_nav.py --dry-run
 """
 
-import os
+from __future__ import annotations
+
+import html
 import re
-from pathlib import Path
-
-# Define the standard navigation HTML for root-level pages
-ROOT_NAV = '''    <!-- Navigation -->
-    <nav class="navbar">
-        <div class="container">
-            <div class="nav-wrapper">
-                <a href="index-variant-2.html" class="logo">
-                    <img src="assets/images/jac-logo.png" alt="JAC Interiors" class="logo-img">
-                </a>
-                <div class="nav-menu" id="navMenu">
-                    <a href="index-variant-2.html" class="nav-link{home_active}">HOME</a>
-                    <a href="portfolio.html" class="nav-link{portfolio_active}">PORTFOLIO</a>
-                    <div class="nav-dropdown">
-                        <a href="#" class="nav-link{spaces_active}">SPACES</a>
-                        <div class="nav-dropdown-content">
-                            <a href="bathrooms.html">Bathrooms</a>
-                            <a href="bedrooms.html">Bedrooms</a>
-                            <a href="kitchens.html">Kitchens</a>
-                            <a href="dining-rooms.html">Dining Rooms</a>
-                            <a href="living-spaces.html">Living Spaces</a>
-                            <a href="office-spaces.html">Office Spaces</a>
-                            <a href="kids-bedrooms.html">Kid's Bedrooms</a>
-                            <a href="entryways.html">Entryways</a>
-                            <a href="bar-area.html">Bar Area</a>
-                            <a href="laundry-rooms.html">Laundry Rooms</a>
-                            <a href="outdoor-spaces.html">Outdoor Spaces</a>
-                        </div>
-                    </div>
-                    <div class="nav-dropdown">
-                        <a href="services.html" class="nav-link{services_active}">SERVICES</a>
-                        <div class="nav-dropdown-content">
-                            <a href="residential-design.html">Residential Design</a>
-                            <a href="commercial-design.html">Commercial Design</a>
-                            <a href="interior-styling.html">Interior Styling</a>
-                            <a href="space-planning.html">Space Planning</a>
-                            <a href="cities-we-serve.html">Cities We Serve</a>
-                        </div>
-                    </div>
-                    <a href="about.html" class="nav-link{about_active}">ABOUT</a>
-                    <a href="contact.html" class="nav-link{contact_active}">CONTACT</a>
-                </div>
-                <button class="mobile-menu-toggle" id="mobileMenuToggle">
-                    <span></span><span></span><span></span>
-                </button>
-            </div>
-        </div>
-    </nav>'''
-
-# Define the standard navigation HTML for subdirectory pages (cities/, projects/, spaces/)
-SUB_NAV = '''    <!-- Navigation -->
-    <nav class="navbar">
-        <div class="container">
-            <div class="nav-wrapper">
-                <a href="../index-variant-2.html" class="logo">
-                    <img src="../assets/images/jac-logo.png" alt="JAC Interiors" class="logo-img">
-                </a>
-                <div class="nav-menu" id="navMenu">
-                    <a href="../index-variant-2.html" class="nav-link{home_active}">HOME</a>
-                    <a href="../portfolio.html" class="nav-link{portfolio_active}">PORTFOLIO</a>
-                    <div class="nav-dropdown">
-                        <a href="#" class="nav-link{spaces_active}">SPACES</a>
-                        <div class="nav-dropdown-content">
-                            <a href="../bathrooms.html">Bathrooms</a>
-                            <a href="../bedrooms.html">Bedrooms</a>
-                            <a href="../kitchens.html">Kitchens</a>
-                            <a href="../dining-rooms.html">Dining Rooms</a>
-                            <a href="../living-spaces.html">Living Spaces</a>
-                            <a href="../office-spaces.html">Office Spaces</a>
-                            <a href="../kids-bedrooms.html">Kid's Bedrooms</a>
-                            <a href="../entryways.html">Entryways</a>
-                            <a href="../bar-area.html">Bar Area</a>
-                            <a href="../laundry-rooms.html">Laundry Rooms</a>
-                            <a href="../outdoor-spaces.html">Outdoor Spaces</a>
-                        </div>
-                    </div>
-                    <div class="nav-dropdown">
-                        <a href="../services.html" class="nav-link{services_active}">SERVICES</a>
-                        <div class="nav-dropdown-content">
-                            <a href="../residential-design.html">Residential Design</a>
-                            <a href="../commercial-design.html">Commercial Design</a>
-                            <a href="../interior-styling.html">Interior Styling</a>
-                            <a href="../space-planning.html">Space Planning</a>
-                            <a href="../cities-we-serve.html">Cities We Serve</a>
-                        </div>
-                    </div>
-                    <a href="../about.html" class="nav-link{about_active}">ABOUT</a>
-                    <a href="../contact.html" class="nav-link{contact_active}">CONTACT</a>
-                </div>
-                <button class="mobile-menu-toggle" id="mobileMenuToggle">
-                    <span></span><span></span><span></span>
-                </button>
-            </div>
-        </div>
-    </nav>'''
-
-def determine_active_state(filename, filepath):
-    """Determine which nav item should be active based on the file."""
-    home_active = ""
-    portfolio_active = ""
-    spaces_active = ""
-    services_active = ""
-    about_active = ""
-    contact_active = ""
-    
-    # Check file path/name to determine active state
-    if 'index' in filename:
-        home_active = " active"
-    elif 'portfolio' in filename:
-        portfolio_active = " active"
-    elif 'about' in filename:
-        about_active = " active"
-    elif 'contact' in filename:
-        contact_active = " active"
-    elif 'services' in filename or 'cities' in filepath or 'residential' in filename or 'commercial' in filename or 'interior-styling' in filename or 'space-planning' in filename:
-        services_active = " active"
-    elif any(space in filename for space in ['bathroom', 'bedroom', 'kitchen', 'dining', 'living', 'office', 'kid', 'entryway', 'bar-area', 'laundry', 'outdoor']):
-        spaces_active = " active"
-    elif 'spaces' in filepath:
-        spaces_active = " active"
-    elif 'projects' in filepath:
-        portfolio_active = " active"
-    
-    return {
-        'home_active': home_active,
-        'portfolio_active': portfolio_active,
-        'spaces_active': spaces_active,
-        'services_active': services_active,
-        'about_active': about_active,
-        'contact_active': contact_active
-    }
-
-def process_file(filepath):
-    """Process a single HTML file to standardize the navigation."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Check if this file has a nav element
-    if '<nav class="navbar' not in content:
-        return False, "No navbar found"
-    
-    # Determine if this is a root or subdirectory file
-    rel_path = str(filepath)
-    is_subdir = '/cities/' in rel_path or '/projects/' in rel_path or '/spaces/' in rel_path
-    
-    filename = os.path.basename(filepath).lower()
-    active_states = determine_active_state(filename, rel_path)
-    
-    # Choose the appropriate template
-    if is_subdir:
-        new_nav = SUB_NAV.format(**active_states)
-    else:
-        new_nav = ROOT_NAV.format(**active_states)
-    
-    # Find and replace the entire nav element
-    # Pattern to match the entire nav block
-    nav_pattern = r'(\s*)<!-- Navigation -->.*?</nav>'
-    
-    match = re.search(nav_pattern, content, re.DOTALL)
-    if match:
-        # Replace the navigation
-        new_content = content[:match.start()] + '\n' + new_nav + content[match.end():]
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        return True, "Updated"
-    
-    # Try alternative pattern without comment
-    nav_pattern2 = r'(\s*)<nav class="navbar[^>]*>.*?</nav>'
-    match = re.search(nav_pattern2, content, re.DOTALL)
-    if match:
-        new_content = content[:match.start()] + '\n' + new_nav + content[match.end():]
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        return True, "Updated (alt pattern)"
-    
-    return False, "Could not match nav pattern"
-
-def main():
-    docs_dir = Path('/Users/mark/Desktop/JAC web design/jac-website-custom/docs')
-    
-    # Find all HTML files
-    html_files = list(docs_dir.glob('*.html')) + \
-                 list(docs_dir.glob('cities/*.html')) + \
-                 list(docs_dir.glob('projects/*.html')) + \
-                 list(docs_dir.glob('spaces/*.html'))
-    
-    updated = 0
-    skipped = 0
-    errors = []
-    
-    for filepath in html_files:
-        # Skip Python files and non-HTML
-        if not filepath.suffix == '.html':
+import sys
+
+from site_transforms import SPACES, Page, register_pass
+
+FONT = "font-family: 'Plus Jakarta Sans', sans-serif;"
+NAV_STYLE = ("padding: 1.5rem 0; background: white; position: sticky; top: 0; z-index: 1000; "
+             f"border-bottom: 1px solid #e4e4e4; {FONT}")
+LOGO_STYLE = ("font-size: 1.5rem; font-weight: 500; letter-spacing: -1px; text-transform: uppercase; "
+              f"text-decoration: none; color: #222a26; {FONT}")
+LINK_STYLE = ("font-size: 0.95rem; font-weight: 500; color: #222a26; letter-spacing: -0.2px; "
+              f"text-decoration: none; {FONT}")
+DROPDOWN_STYLE = ("display: none; position: absolute; top: 100%; left: 0; background: white; "
+                  "min-width: {width}px; box-shadow: 0 4px 12px rgba(0, 0, 0, 0.15); padding: 0.5rem 0; "
+                  "margin-top: 0; z-index: 1000; border-radius: 4px; flex-direction: column;{extra}")
+ITEM_STYLE = ("display: block; padding: 0.5rem 1.5rem; color: #333; font-size: 0.85rem; text-transform: none; "
+              "letter-spacing: 0; text-decoration: none;{border} " + FONT)
+
+PROJECTS = [
+    ("22nd-street", "22nd Street"),
+    ("via-pisa", "Via Pisa"),
+    ("galewood", "Galewood"),
+    ("ronda", "Ronda"),
+    ("alpine", "Alpine"),
+    ("peary-way", "Peary Way"),
+    ("monaco", "Monaco"),
+    ("valley-vista", "Valley Vista"),
+    ("colby", "Colby"),
+    ("sherbourne", "Sherbourne"),
+    ("highland", "Highland"),
+    ("sunnyside", "Sunnyside"),
+    ("vale-crest", "Vale Crest"),
+    ("presson-place", "Presson Place"),
+    ("medio", "Medio"),
+    ("brown-deer-park", "Brown Deer Park"),
+    ("frances", "Frances"),
+    ("columbus-way", "Columbus Way"),
+    ("colette-way", "Colette Way"),
+    ("river-homestead", "River Homestead"),
+    ("oakwood", "Oakwood"),
+    ("wilshire", "Wilshire"),
+    ("mulholland-drive", "Mulholland Drive"),
+    ("mulholland-estate", "Mulholland Estate"),
+    ("beverly-hills-alpine", "Beverly Hills Alpine"),
+    ("beverly-hills-ii", "Beverly Hills II"),
+    ("calabasas-residence", "Calabasas Residence"),
+    ("eclectic-sunnyside", "Eclectic Sunnyside"),
+    ("madison-club", "Madison Club"),
+    ("madison-club-ii", "Madison Club II"),
+    ("palm-desert-oasis", "Palm Desert Oasis"),
+    ("panorama-views", "Panorama Views"),
+    ("santa-monica-modern-spanish", "Santa Monica Modern Spanish"),
+    ("toscana-country-club", "Toscana Country Club"),
+    ("venice-beach-house", "Venice Beach House"),
+    ("venice-boho-house", "Venice Boho House"),
+    ("yellowstone-club", "Yellowstone Club"),
+]
+
+SPACE_LABELS = {
+    "bathrooms": "Bathrooms",
+    "bedrooms": "Bedrooms",
+    "kitchens": "Kitchens",
+    "dining-rooms": "Dining Rooms",
+    "living-spaces": "Living Spaces",
+    "office-spaces": "Office Spaces",
+    "kids-bedrooms": "Kid's Bedrooms",
+    "entryways": "Entryways",
+    "bar-area": "Bar Area",
+    "laundry-rooms": "Laundry Rooms",
+    "outdoor-spaces": "Outdoor Spaces",
+}
+
+SERVICES = [
+    ("residential-design.html", "Residential Design"),
+    ("commercial-design.html", "Commercial Design"),
+    ("interior-styling.html", "Interior Styling"),
+    ("space-planning.html", "Space Planning"),
+    ("cities-we-serve.html", "Cities We Serve"),
+]
+
+# Top-level entries: (section, label, href, dropdown items, dropdown min-width, dropdown style extra)
+NAV = [
+    ("home", "HOME", "index.html", None, 0, ""),
+    ("portfolio", "PORTFOLIO", "portfolio.html",
+     [(f"projects/{slug}.html", label) for slug, label in PROJECTS], 220, " max-height: 500px; overflow-y: auto;"),
+    ("spaces", "SPACES", "#", [(f"{space}.html", SPACE_LABELS[space]) for space in SPACES], 200, ""),
+    ("services", "SERVICES", "services.html", SERVICES, 200, ""),
+    ("about", "ABOUT", "about.html", None, 0, ""),
+    ("contact", "CONTACT", "contact.html", None, 0, ""),
+]
+
+SERVICE_PAGES = {"services.html"} | {href for href, _ in SERVICES}
+
+NAV_RE = re.compile(r'<nav class="navbar".*?</nav>\s*(?:<div class="navbar-spacer"[^>]*></div>)?', re.S)
+BODY_RE = re.compile(r"<body\b[^>]*>")
+
+
+def active_section(rel_path: str) -> str | None:
+    """Which top-level nav entry a page (path relative to docs/) belongs to."""
+    name = rel_path.rsplit("/", 1)[-1]
+    if name in ("index.html", "index-variant-2.html"):
+        return "home"
+    if name == "portfolio.html" or rel_path.startswith("projects/"):
+        return "portfolio"
+    if name[:-len(".html")] in SPACES:
+        return "spaces"
+    if name in SERVICE_PAGES or rel_path.startswith("cities/"):
+        return "services"
+    if name in ("about.html", "contact.html"):
+        return name[:-len(".html")]
+    return None
+
+
+def render_nav(depth: int, active: str | None) -> str:
+    """The navbar markup for a page at the given depth below docs/."""
+    prefix = "../" * depth
+
+    def href(target: str) -> str:
+        return target if target.startswith(("#", "http")) else prefix + target
+
+    lines = [
+        f'<nav class="navbar" style="{NAV_STYLE}">',
+        '    <div class="container" style="max-width: 1320px; margin: 0 auto; padding: 0 2rem;">',
+        '        <div class="nav-wrapper" style="display: flex; justify-content: space-between; align-items: center;">',
+        f'            <a href="{href("index.html")}" class="logo" style="{LOGO_STYLE}">',
+        "                JAC INTERIORS",
+        "            </a>",
+        '            <div class="nav-menu" id="navMenu" style="display: flex; gap: 2.5rem; align-items: center;">',
+    ]
+    for section, label, target, items, width, extra in NAV:
+        cls = "nav-link active" if section == active else "nav-link"
+        link = f'<a href="{href(target)}" class="{cls}" style="{LINK_STYLE}">{label}</a>'
+        if not items:
+            lines.append(f"                {link}")
             continue
-            
-        try:
-            success, msg = process_file(filepath)
-            if success:
-                print(f"✓ {filepath.name}: {msg}")
-                updated += 1
-            else:
-                print(f"- {filepath.name}: {msg}")
-                skipped += 1
-        except Exception as e:
-            print(f"✗ {filepath.name}: Error - {e}")
-            errors.append((filepath.name, str(e)))
-    
-    print(f"\nSummary: {updated} updated, {skipped} skipped, {len(errors)} errors")
-
-if __name__ == '__main__':
+        lines.append('                <div class="nav-dropdown" style="position: relative; display: inline-block;">')
+        lines.append(f"                    {link}")
+        lines.append(f'                    <div class="nav-dropdown-content" '
+                     f'style="{DROPDOWN_STYLE.format(width=width, extra=extra)}">')
+        for i, (item_href, item_label) in enumerate(items):
+            border = "" if i == len(items) - 1 else " border-bottom: 1px solid #f0f0f0;"
+            lines.append(f'                        <a href="{href(item_href)}" '
+                         f'style="{ITEM_STYLE.format(border=border)}">{html.escape(item_label, quote=False)}</a>')
+        lines.append("                    </div>")
+        lines.append("                </div>")
+    lines += [
+        "            </div>",
+        '            <button class="mobile-menu-toggle" id="mobileMenuToggle" style="display: none;">',
+        "                <span></span><span></span><span></span>",
+        "            </button>",
+        "        </div>",
+        "    </div>",
+        "</nav>",
+        '<div class="navbar-spacer" style="height: 80px; width: 100%;"></div>',
+    ]
+    return "\n".join(lines)
+
+
+def inline_navbar_html(text: str, rel_path: str) -> str:
+    """Put the rendered nav right after <body>, replacing any existing one."""
+    nav = render_nav(rel_path.count("/"), active_section(rel_path))
+    if NAV_RE.search(text):
+        return NAV_RE.sub(lambda m: nav, text, count=1)
+    body = BODY_RE.search(text)
+    if not body:
+        return text
+    return text[:body.end()] + "\n" + nav + text[body.end():]
+
+
+@register_pass("inline-navbar", kind="text")
+def inline_navbar(page: Page) -> bool:
+    """Render the canonical navbar into the page with depth-correct links and active state."""
+    # Pages without load-navbar.js have never shown the site nav. Once the
+    # js-bundles pass has folded that script into a bundle, the navbar an
+    # earlier run rendered is what marks the page.
+    if "load-navbar.js" not in page.text and not NAV_RE.search(page.text):
+        return False
+    new = inline_navbar_html(page.text, page.rel)
+    changed = new != page.text
+    page.text = new
+    return changed
+
+
+def main() -> None:
+    import site_transforms
+
+    site_transforms.run(["inline-navbar"], dry_run="--dry-run" in sys.argv[1:])
+
+
+if __name__ == "__main__":
     main()
@@ -0,0 +1,204 @@
+"""
+Tests against the local stand-ins: zip_stream.py's server (dropping
+connections partway) and r2_sync.py's directory remote.
+
+  python3 -m pytest docs/test_standins.py
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import zipfile
+import zlib
+
+import pytest
+
+import zip_stream
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Unseekable(io.RawIOBase):
+    """A write-only stream zipfile can't seek in, so every entry gets a data descriptor."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        return len(data)
+
+
+def fixture_files() -> dict[str, bytes]:
+    rng = random.Random(1)
+    noise = bytes(rng.getrandbits(8) for _ in range(300_000))
+    text = b"".join(b"line %d of the gallery\n" % i for i in range(20_000))
+    return {"spaces/bedrooms/a.jpg": noise, "notes/readme.txt": text, "spaces/bedrooms/b.jpg": noise[::-1]}
+
+
+def write_zip(path: str, files: dict[str, bytes], descriptors: bool = False, zip64: bool = False) -> None:
+    target = Unseekable() if descriptors else open(path, "wb")
+    with zipfile.ZipFile(target, "w") as archive:
+        for name, data in files.items():
+            info = zipfile.ZipInfo(name)
+            # Photos are stored, text is deflated, as in the Dropbox folder ZIPs.
+            info.compress_type = zipfile.ZIP_STORED if name.endswith(".jpg") else zipfile.ZIP_DEFLATED
+            with archive.open(info, "w", force_zip64=zip64) as f:
+                f.write(data)
+    if descriptors:
+        with open(path, "wb") as f:
+            f.write(target.buffer)
+    else:
+        target.close()
+
+
+@pytest.fixture
+def server(tmp_path):
+    started = []
+
+    def start(files: dict[str, bytes], ranges: bool = True, drop_after: int = 0,
+              descriptors: bool = False, zip64: bool = False) -> str:
+        path = str(tmp_path / "fixture.zip")
+        write_zip(path, files, descriptors, zip64)
+        httpd = zip_stream.serve(path, 0, ranges=ranges, drop_after=drop_after)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        started.append(httpd)
+        return f"http://127.0.0.1:{httpd.server_address[1]}/fixture.zip"
+
+    yield start
+    for httpd in started:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_ranged_extract_resumes_dropped_connections(server, tmp_path):
+    files = fixture_files()
+    remote = zip_stream.RemoteZip(server(files, drop_after=50_000), retries=3).probe()
+    assert remote.ranges
+
+    entries = {e.name: e for e in remote.central_directory()}
+    for name, data in files.items():
+        assert entries[name].crc == zlib.crc32(data)
+        assert entries[name].size == len(data)
+
+    out = tmp_path / "out"
+    out.mkdir()
+    destinations = {name: str(out / name.replace("/", "_")) for name in files}
+    written = zip_stream.extract_ranged(remote, list(entries.values()), destinations)
+
+    assert written == sum(len(data) for data in files.values())
+    for name, data in files.items():
+        with open(destinations[name], "rb") as f:
+            assert zlib.crc32(f.read()) == zlib.crc32(data)
+    assert not [n for n in os.listdir(out) if n.endswith(".__tmp__")]
+
+
+@pytest.mark.parametrize("zip64", [False, True], ids=["zip32", "zip64"])
+def test_sequential_extract_reads_data_descriptors(server, tmp_path, zip64):
+    files = fixture_files()
+    remote = zip_stream.RemoteZip(server(files, ranges=False, descriptors=True, zip64=zip64)).probe()
+    assert not remote.ranges
+    with zipfile.ZipFile(tmp_path / "fixture.zip") as archive:
+        assert all(info.flag_bits & zip_stream.FLAG_DESCRIPTOR for info in archive.infolist())
+
+    out = tmp_path / "out"
+    out.mkdir()
+    done = []
+    written = zip_stream.extract_sequential(
+        remote, lambda name: str(out / name.replace("/", "_")) if name in files else None,
+        on_done=lambda entry, dest: done.append((entry.name, entry.crc)))
+
+    assert written == sum(len(data) for data in files.values())
+    assert sorted(done) == sorted((name, zlib.crc32(data)) for name, data in files.items())
+    for name, data in files.items():
+        assert (out / name.replace("/", "_")).read_bytes() == data
+
+
+def test_dropped_connection_without_ranges_fails_cleanly(server, tmp_path):
+    remote = zip_stream.RemoteZip(server(fixture_files(), ranges=False, drop_after=50_000)).probe()
+    with pytest.raises(RuntimeError, match="interrupted"):
+        zip_stream.extract_sequential(remote, lambda name: str(tmp_path / name.replace("/", "_")))
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".jpg") or n.endswith(".txt")]
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A copy of the scripts next to a small assets/images tree (they find docs/ from their own path)."""
+    root = tmp_path / "docs"
+    root.mkdir()
+    for name in os.listdir(DOCS_DIR):
+        if name.endswith(".py"):
+            shutil.copy2(os.path.join(DOCS_DIR, name), root / name)
+    from PIL import Image
+
+    for folder, colours in {"spaces/bedrooms": ["red", "green"], "projects/ronda": ["blue"]}.items():
+        path = root / "assets" / "images" / folder
+        path.mkdir(parents=True)
+        slug = os.path.basename(folder)
+        for n, colour in enumerate(colours, 1):
+            Image.new("RGB", (64, 48), colour).save(path / f"{slug}-{n}.jpg")
+    (root / "assets/images/projects/ronda/_variants").mkdir()
+    (root / "assets/images/projects/ronda/_variants/ronda-1-480w.webp").write_bytes(b"RIFF....WEBP")
+    return root
+
+
+def sync(site, remote, *args) -> str:
+    run = subprocess.run([sys.executable, "r2_sync.py", "--remote", str(remote), "--jobs", "2", *args],
+                         cwd=site, capture_output=True, text=True)
+    assert run.returncode == 0, run.stdout + run.stderr
+    return run.stdout
+
+
+def test_r2_sync_uploads_only_changes(site, tmp_path):
+    remote = tmp_path / "remote"
+    first = sync(site, remote)
+    assert "4 to upload" in first
+    assert (remote / "spaces/bedrooms/bedrooms-2.jpg").read_bytes() == \
+        (site / "assets/images/spaces/bedrooms/bedrooms-2.jpg").read_bytes()
+    assert (remote / "projects/ronda/_variants/ronda-1-480w.webp").exists()
+    listing = json.loads((remote / "spaces/bedrooms/manifest.json").read_text())
+    assert listing == {"files": ["bedrooms-1.jpg", "bedrooms-2.jpg"]}
+
+    second = sync(site, remote)
+    assert "0 to upload" in second
+    assert "Uploaded 0," in second
+
+    from PIL import Image
+
+    Image.new("RGB", (64, 48), "yellow").save(site / "assets/images/spaces/bedrooms/bedrooms-1.jpg")
+    os.remove(site / "assets/images/projects/ronda/ronda-1.jpg")
+    third = sync(site, remote, "--delete")
+    assert "1 to upload" in third and "1 to delete" in third
+    assert not (remote / "projects/ronda/ronda-1.jpg").exists()
+    manifest = json.loads((remote / "manifest.json").read_text())
+    assert "projects/ronda/ronda-1.jpg" not in manifest["objects"]
+
+
+def test_fingerprinted_resync_points_at_current_hash(site, tmp_path):
+    remote = tmp_path / "remote"
+    sync(site, remote, "--fingerprinted")
+    from PIL import Image
+
+    Image.new("RGB", (64, 48), "yellow").save(site / "assets/images/spaces/bedrooms/bedrooms-1.jpg")
+    sync(site, remote, "--fingerprinted")
+
+    manifest = json.loads((remote / "manifest.json").read_text())
+    old_and_new = [k for k in manifest["objects"] if k.startswith("spaces/bedrooms/bedrooms-1.")]
+    assert len(old_and_new) == 2
+    current = manifest["current"]["spaces/bedrooms/bedrooms-1.jpg"]
+    assert current in old_and_new
+    assert (remote / current).read_bytes() == (site / "assets/images/spaces/bedrooms/bedrooms-1.jpg").read_bytes()
+
+    lookup = "import r2_urls; print(r2_urls.manifest_keys()['spaces/bedrooms/bedrooms-1.jpg'])"
+    run = subprocess.run([sys.executable, "-c", lookup], cwd=site, capture_output=True, text=True)
+    assert run.stdout.strip() == current, run.stderr
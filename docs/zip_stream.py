@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""
+Extract files from a ZIP served over HTTP without saving the archive.
+
+download_spaces_images.py used to save the whole Dropbox folder ZIP, unpack
+it into a temp folder and copy the images out of that: every byte written
+three times, and twice the archive size on disk at the peak. This reads the
+archive straight off the response instead:
+
+- If the server honours Range requests, the central directory is read
+  first (the tail of the file, then the directory itself), so the caller
+  knows every name, size and CRC before any data is fetched. Only the
+  wanted entries are then streamed, in archive order, and each one is
+  inflated directly into its final path (via a .__tmp__ file that is
+  renamed once complete). Runs of unwanted entries are skipped with a new
+  Range request instead of being downloaded.
+- An interrupted response is resumed where it stopped (Range plus If-Range
+  on the ETag, so a file that changed on the server isn't spliced), up to
+  RETRIES times; the inflate state lives in memory, so even an entry cut
+  off halfway carries on.
+- Servers without Range support (Dropbox builds folder ZIPs on the fly)
+  are read front to back from the local headers, including entries whose
+  sizes only follow in a data descriptor. Such an archive can't be resumed
+  partway; a re-run starts from the beginning.
+
+Every entry is checked against its CRC-32 and size before it is renamed
+into place; a mismatch raises ValueError and leaves nothing behind.
+
+For tests, --serve runs a local stand-in that serves one ZIP with or
+without Range support and can drop connections partway through:
+
+  python3 zip_stream.py --serve fixture.zip --port 8765 --drop-after 100000
+  python3 zip_stream.py --list http://127.0.0.1:8765/fixture.zip
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import struct
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+import requests
+
+EOCD_SIG = b"PK\x05\x06"
+ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+ZIP64_EOCD_SIG = b"PK\x06\x06"
+CENTRAL_SIG = b"PK\x01\x02"
+LOCAL_SIG = b"PK\x03\x04"
+DESCRIPTOR_SIG = b"PK\x07\x08"
+
+STORED, DEFLATED = 0, 8
+FLAG_DESCRIPTOR = 0x08
+FLAG_UTF8 = 0x800
+
+CHUNK = 1 << 16
+# Largest EOCD record: 22 bytes plus a 64 KB comment, plus the ZIP64 locator before it.
+TAIL_SIZE = 22 + 0xFFFF + 20
+# Gaps smaller than this are read and discarded rather than re-requested.
+SKIP_LIMIT = 1 << 20
+RETRIES = 5
+TIMEOUT = 60
+
+
+class ZipEntry:
+    """One file in the archive, as described by the central directory (or a local header)."""
+
+    def __init__(self, name: str, method: int, flags: int, crc: int, compressed_size: int,
+                 size: int, offset: int, zip64: bool = False):
+        self.name = name
+        self.method = method
+        self.flags = flags
+        self.crc = crc
+        self.compressed_size = compressed_size
+        self.size = size
+        self.offset = offset
+        # Set from a local header with ZIP64 size markers: its data descriptor has 8-byte sizes.
+        self.zip64 = zip64
+
+    @property
+    def is_dir(self) -> bool:
+        return self.name.endswith("/")
+
+    def __repr__(self) -> str:
+        return f"ZipEntry({self.name!r}, {self.size} bytes @ {self.offset})"
+
+
+# ---------------------------------------------------------------------------
+# HTTP access
+# ---------------------------------------------------------------------------
+
+class RemoteZip:
+    """A ZIP at a URL. probe() finds out whether it can be read at random offsets."""
+
+    def __init__(self, url: str, session: requests.Session | None = None, retries: int = RETRIES):
+        self.url = url
+        self.session = session or requests.Session()
+        self.retries = retries
+        self.size: int | None = None
+        self.etag: str | None = None
+        self.ranges = False
+
+    def probe(self) -> "RemoteZip":
+        response = self.session.get(self.url, headers={"Range": "bytes=0-0"}, stream=True, timeout=TIMEOUT)
+        try:
+            response.raise_for_status()
+            if "text/html" in response.headers.get("content-type", ""):
+                raise RuntimeError(f"{self.url} returned an HTML page, not a ZIP (login or error page?)")
+            self.etag = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            m = re.match(r"bytes 0-0/(\d+)", response.headers.get("Content-Range", ""))
+            self.ranges = response.status_code == 206 and m is not None
+            if self.ranges:
+                self.size = int(m.group(1))
+            elif response.headers.get("Content-Length"):
+                self.size = int(response.headers["Content-Length"])
+        finally:
+            response.close()
+        return self
+
+    def fetch(self, start: int, end: int) -> bytes:
+        """Bytes start..end-1 (Range support required)."""
+        stream = self.open(start, end)
+        try:
+            return stream.read_exact(end - start)
+        finally:
+            stream.close()
+
+    def open(self, start: int = 0, end: int | None = None) -> "ResumableStream":
+        return ResumableStream(self, start, end)
+
+    def central_directory(self) -> list[ZipEntry]:
+        if not self.ranges or self.size is None:
+            raise RuntimeError(f"{self.url} doesn't support Range requests")
+        tail_start = max(0, self.size - TAIL_SIZE)
+        tail = self.fetch(tail_start, self.size)
+        cd_offset, cd_size, count = locate_central_directory(tail, tail_start, self.fetch)
+        entries = parse_central_directory(self.fetch(cd_offset, cd_offset + cd_size))
+        if len(entries) != count:
+            raise ValueError(f"central directory lists {len(entries)} entries, EOCD says {count}")
+        return entries
+
+
+class ResumableStream:
+    """Sequential reader over an HTTP body that reconnects with Range where it left off."""
+
+    def __init__(self, remote: RemoteZip, start: int = 0, end: int | None = None):
+        self.remote = remote
+        self.pos = start
+        self.end = end
+        self.resumes = 0
+        self._pushback = b""
+        self._response = None
+        self._connect()
+
+    def _connect(self) -> None:
+        headers = {}
+        if self.pos or self.end is not None:
+            if not self.remote.ranges:
+                raise RuntimeError(f"{self.remote.url} doesn't support Range requests; can't resume")
+            last = "" if self.end is None else str(self.end - 1)
+            headers["Range"] = f"bytes={self.pos}-{last}"
+            if self.remote.etag:
+                headers["If-Range"] = self.remote.etag
+        response = self.remote.session.get(self.remote.url, headers=headers, stream=True, timeout=TIMEOUT)
+        response.raise_for_status()
+        if "Range" in headers:
+            m = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+            if response.status_code != 206 or not m or int(m.group(1)) != self.pos:
+                response.close()
+                raise RuntimeError(f"{self.remote.url} changed on the server or ignored the Range request")
+        self._response = response
+
+    def close(self) -> None:
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+    def unread(self, data: bytes) -> None:
+        """Put bytes back to be returned by the next read()."""
+        self._pushback = data + self._pushback
+        self.pos -= len(data)
+
+    def read(self, n: int = CHUNK) -> bytes:
+        """Up to n bytes; b"" only at the end of the body."""
+        if self._pushback:
+            data, self._pushback = self._pushback[:n], self._pushback[n:]
+            self.pos += len(data)
+            return data
+        if self.end is not None:
+            n = min(n, self.end - self.pos)
+            if n <= 0:
+                return b""
+        failures = 0
+        while True:
+            raw = self._response.raw
+            try:
+                # read1 (urllib3 2) returns what has arrived, so bytes before a cut-off aren't lost with it.
+                data = raw.read1(n, decode_content=True) if hasattr(raw, "read1") else raw.read(n, decode_content=True)
+            except Exception as e:
+                if not is_transport_error(e):
+                    raise
+                data, error = None, e
+            else:
+                error = None
+            expected_more = self.end is not None or (self.remote.size is not None and self.pos < self.remote.size)
+            if data:
+                self.pos += len(data)
+                return data
+            if error is None and not expected_more:
+                return b""
+            # Connection dropped, or the body ended early: pick up from self.pos.
+            failures += 1
+            if failures > self.remote.retries or not self.remote.ranges:
+                raise RuntimeError(f"Download of {self.remote.url} interrupted at byte {self.pos}"
+                                   + (f": {error}" if error else ""))
+            self.close()
+            self.resumes += 1
+            self._connect()
+
+    def read_exact(self, n: int) -> bytes:
+        parts = []
+        while n > 0:
+            data = self.read(min(n, CHUNK))
+            if not data:
+                raise ValueError(f"unexpected end of archive at byte {self.pos}")
+            parts.append(data)
+            n -= len(data)
+        return b"".join(parts)
+
+    def skip_to(self, pos: int) -> None:
+        """Move forward to pos: read through small gaps, re-request across large ones."""
+        if pos < self.pos:
+            raise ValueError(f"can't seek back from {self.pos} to {pos}")
+        if pos - self.pos > SKIP_LIMIT and self.remote.ranges:
+            self.close()
+            self._pushback = b""
+            self.pos = pos
+            self._connect()
+            return
+        while self.pos < pos:
+            if not self.read(min(CHUNK, pos - self.pos)):
+                raise ValueError(f"unexpected end of archive at byte {self.pos}")
+
+
+def is_transport_error(error: BaseException) -> bool:
+    import urllib3.exceptions
+
+    return isinstance(error, (requests.RequestException, urllib3.exceptions.HTTPError, OSError))
+
+
+# ---------------------------------------------------------------------------
+# ZIP structures
+# ---------------------------------------------------------------------------
+
+def locate_central_directory(tail: bytes, tail_start: int,
+                             fetch: Callable[[int, int], bytes]) -> tuple[int, int, int]:
+    """(offset, size, entry count) of the central directory, from the end of the archive."""
+    at = tail.rfind(EOCD_SIG)
+    if at < 0 or len(tail) - at < 22:
+        raise ValueError("no end-of-central-directory record; not a ZIP file?")
+    (_, _, _, _, count, cd_size, cd_offset, _) = struct.unpack("<4sHHHHIIH", tail[at:at + 22])
+    if at >= 20 and tail[at - 20:at - 16] == ZIP64_LOCATOR_SIG:
+        (_, _, eocd64_offset, _) = struct.unpack("<4sIQI", tail[at - 20:at])
+        if eocd64_offset >= tail_start:
+            record = tail[eocd64_offset - tail_start:eocd64_offset - tail_start + 56]
+        else:
+            record = fetch(eocd64_offset, eocd64_offset + 56)
+        if record[:4] != ZIP64_EOCD_SIG:
+            raise ValueError("bad ZIP64 end-of-central-directory record")
+        (_, _, _, _, _, _, _, count, cd_size, cd_offset) = struct.unpack("<4sQHHIIQQQQ", record)
+    return cd_offset, cd_size, count
+
+
+def zip64_extra(extra: bytes, size: int, compressed_size: int, offset: int) -> tuple[int, int, int]:
+    """Replace 0xFFFFFFFF fields with their values from the ZIP64 extra field."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, length = struct.unpack("<HH", extra[pos:pos + 4])
+        if tag == 0x0001:
+            values = extra[pos + 4:pos + 4 + length]
+            fields = []
+            for i in range(0, len(values) - 7, 8):
+                fields.append(struct.unpack("<Q", values[i:i + 8])[0])
+            if size == 0xFFFFFFFF and fields:
+                size = fields.pop(0)
+            if compressed_size == 0xFFFFFFFF and fields:
+                compressed_size = fields.pop(0)
+            if offset == 0xFFFFFFFF and fields:
+                offset = fields.pop(0)
+            break
+        pos += 4 + length
+    return size, compressed_size, offset
+
+
+def decode_name(raw: bytes, flags: int) -> str:
+    return raw.decode("utf-8" if flags & FLAG_UTF8 else "cp437")
+
+
+def parse_central_directory(data: bytes) -> list[ZipEntry]:
+    entries = []
+    pos = 0
+    while pos + 46 <= len(data) and data[pos:pos + 4] == CENTRAL_SIG:
+        (_, _, _, flags, method, _, _, crc, compressed_size, size, name_len, extra_len, comment_len,
+         _, _, _, offset) = struct.unpack("<4sHHHHHHIIIHHHHHII", data[pos:pos + 46])
+        name = decode_name(data[pos + 46:pos + 46 + name_len], flags)
+        extra = data[pos + 46 + name_len:pos + 46 + name_len + extra_len]
+        size, compressed_size, offset = zip64_extra(extra, size, compressed_size, offset)
+        entries.append(ZipEntry(name, method, flags, crc, compressed_size, size, offset))
+        pos += 46 + name_len + extra_len + comment_len
+    return entries
+
+
+def read_local_header(stream: ResumableStream) -> ZipEntry | None:
+    """The entry whose local header starts at the stream position; None at the central directory."""
+    signature = stream.read_exact(4)
+    if signature != LOCAL_SIG:
+        if signature in (CENTRAL_SIG, EOCD_SIG, ZIP64_EOCD_SIG):
+            return None
+        raise ValueError(f"expected a local file header at byte {stream.pos - 4}")
+    offset = stream.pos - 4
+    (_, flags, method, _, _, crc, compressed_size, size, name_len,
+     extra_len) = struct.unpack("<HHHHHIIIHH", stream.read_exact(26))
+    name = decode_name(stream.read_exact(name_len), flags)
+    # Decided before zip64_extra() replaces the markers with the real values.
+    zip64 = 0xFFFFFFFF in (size, compressed_size)
+    size, compressed_size, _ = zip64_extra(stream.read_exact(extra_len), size, compressed_size, 0)
+    return ZipEntry(name, method, flags, crc, compressed_size, size, offset, zip64)
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+def copy_entry_data(stream: ResumableStream, entry: ZipEntry, out, known_size: bool) -> tuple[int, int]:
+    """Inflate/copy one entry's data from the stream into out. Returns (crc32, size)."""
+    crc = size = 0
+    if entry.method == DEFLATED:
+        inflater = zlib.decompressobj(-15)
+        remaining = entry.compressed_size if known_size else None
+        while not inflater.eof:
+            if remaining == 0:
+                raise ValueError(f"{entry.name}: deflate stream ends past its compressed size")
+            data = stream.read(CHUNK if remaining is None else min(CHUNK, remaining))
+            if not data:
+                raise ValueError(f"{entry.name}: archive ends inside this entry")
+            if remaining is not None:
+                remaining -= len(data)
+            out_data = inflater.decompress(data)
+            if out_data:
+                out.write(out_data)
+                crc = zlib.crc32(out_data, crc)
+                size += len(out_data)
+        if inflater.unused_data:
+            stream.unread(inflater.unused_data)
+    elif entry.method == STORED and not known_size:
+        return copy_until_descriptor(stream, entry, out)
+    elif entry.method == STORED:
+        remaining = entry.compressed_size
+        while remaining:
+            data = stream.read(min(CHUNK, remaining))
+            if not data:
+                raise ValueError(f"{entry.name}: archive ends inside this entry")
+            remaining -= len(data)
+            out.write(data)
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+    else:
+        raise ValueError(f"{entry.name}: unsupported compression method {entry.method}")
+    return crc, size
+
+
+def copy_until_descriptor(stream: ResumableStream, entry: ZipEntry, out) -> tuple[int, int]:
+    """Copy a stored entry whose size only follows in its data descriptor.
+
+    Nothing marks the end of the data except the descriptor itself, so the
+    data ends at the first "PK\\x07\\x08" whose CRC and sizes match the bytes
+    before it. ZIP64 entries have 8-byte sizes in the descriptor.
+    """
+    layout = "<IQQ" if entry.zip64 else "<III"
+    length = 4 + struct.calcsize(layout)
+    crc = size = 0
+    pending = b""
+    while True:
+        data = stream.read(CHUNK)
+        if not data:
+            raise ValueError(f"{entry.name}: archive ends inside this entry")
+        pending += data
+        at = pending.find(DESCRIPTOR_SIG)
+        while 0 <= at <= len(pending) - length:
+            d_crc, d_compressed, d_size = struct.unpack(layout, pending[at + 4:at + length])
+            if d_compressed == d_size == size + at and d_crc == zlib.crc32(pending[:at], crc):
+                out.write(pending[:at])
+                stream.unread(pending[at:])
+                return d_crc, d_size
+            at = pending.find(DESCRIPTOR_SIG, at + 1)
+        # Keep the last length - 1 bytes: a descriptor may start there.
+        flush, pending = pending[:-(length - 1)], pending[-(length - 1):]
+        out.write(flush)
+        crc = zlib.crc32(flush, crc)
+        size += len(flush)
+
+
+def write_entry(stream: ResumableStream, entry: ZipEntry, dest: str, known_size: bool = True) -> tuple[int, int]:
+    """Stream one entry's data into dest (atomically). Returns (crc32, size) after checking them."""
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = dest + ".__tmp__"
+    try:
+        with open(tmp, "wb") as out:
+            crc, size = copy_entry_data(stream, entry, out, known_size)
+        if known_size and (crc != entry.crc or size != entry.size):
+            raise ValueError(f"{entry.name}: CRC/size mismatch ({crc:08x}/{size} bytes, "
+                             f"expected {entry.crc:08x}/{entry.size} bytes)")
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, dest)
+    return crc, size
+
+
+def read_descriptor(stream: ResumableStream, zip64: bool) -> tuple[int, int, int]:
+    """(crc, compressed size, size) from the data descriptor after an entry."""
+    head = stream.read_exact(4)
+    if head == DESCRIPTOR_SIG:
+        head = stream.read_exact(4)
+    crc = struct.unpack("<I", head)[0]
+    if zip64:
+        compressed_size, size = struct.unpack("<QQ", stream.read_exact(16))
+    else:
+        compressed_size, size = struct.unpack("<II", stream.read_exact(8))
+    return crc, compressed_size, size
+
+
+def extract_ranged(remote: RemoteZip, entries: list[ZipEntry], destinations: dict[str, str],
+                   on_done: Callable[[ZipEntry, str], None] | None = None) -> int:
+    """Extract the entries named in destinations (name -> path) using Range requests. Returns bytes written."""
+    wanted = sorted((e for e in entries if e.name in destinations), key=lambda e: e.offset)
+    written = 0
+    stream = None
+    try:
+        for entry in wanted:
+            if stream is None:
+                stream = remote.open(entry.offset)
+            else:
+                stream.skip_to(entry.offset)
+            local = read_local_header(stream)
+            if local is None or local.name != entry.name:
+                raise ValueError(f"{entry.name}: local header at byte {entry.offset} doesn't match")
+            _, size = write_entry(stream, entry, destinations[entry.name])
+            written += size
+            if entry.flags & FLAG_DESCRIPTOR:
+                read_descriptor(stream, local.zip64)
+            if on_done:
+                on_done(entry, destinations[entry.name])
+    finally:
+        if stream is not None:
+            stream.close()
+    return written
+
+
+def extract_sequential(remote: RemoteZip, choose: Callable[[str], str | None],
+                       on_done: Callable[[ZipEntry, str], None] | None = None) -> int:
+    """Read the archive front to back; choose(name) gives each entry's path (None = skip). Returns bytes written."""
+    written = 0
+    stream = remote.open()
+    try:
+        while True:
+            entry = read_local_header(stream)
+            if entry is None:
+                break
+            descriptor = bool(entry.flags & FLAG_DESCRIPTOR)
+            dest = None if entry.is_dir else choose(entry.name)
+            if dest is None:
+                with open(os.devnull, "wb") as sink:
+                    crc, size = copy_entry_data(stream, entry, sink, not descriptor)
+            else:
+                crc, size = write_entry(stream, entry, dest, known_size=not descriptor)
+            if descriptor:
+                entry.crc, _, entry.size = read_descriptor(stream, entry.zip64)
+                if (crc, size) != (entry.crc, entry.size):
+                    if dest is not None:
+                        os.remove(dest)
+                    raise ValueError(f"{entry.name}: CRC/size mismatch against its data descriptor")
+            if dest is not None:
+                written += size
+                if on_done:
+                    on_done(entry, dest)
+    finally:
+        stream.close()
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Local stand-in server
+# ---------------------------------------------------------------------------
+
+def make_handler(path: str, ranges: bool = True, drop_after: int = 0):
+    """Request handler serving one file, optionally without Range support or dropping connections."""
+    with open(path, "rb") as f:
+        data = f.read()
+    etag = f'"{zlib.crc32(data):08x}-{len(data)}"'
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            start, end, status = 0, len(data), 200
+            m = re.match(r"bytes=(\d*)-(\d*)$", self.headers.get("Range", ""))
+            if ranges and m and self.headers.get("If-Range", etag) == etag:
+                if m.group(1):
+                    start = int(m.group(1))
+                    end = int(m.group(2)) + 1 if m.group(2) else len(data)
+                else:
+                    start = max(0, len(data) - int(m.group(2)))
+                end = min(end, len(data))
+                status = 206
+            self.send_response(status)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(end - start))
+            self.send_header("ETag", etag)
+            if ranges:
+                self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(data)}")
+            self.end_headers()
+            body = data[start:end]
+            if drop_after and len(body) > drop_after:
+                # Simulate a dropped connection partway through the body.
+                self.wfile.write(body[:drop_after])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+    return Handler
+
+
+def serve(path: str, port: int, ranges: bool = True, drop_after: int = 0) -> ThreadingHTTPServer:
+    """Start the stand-in on 127.0.0.1:port (call serve_forever() on the result)."""
+    return ThreadingHTTPServer(("127.0.0.1", port), make_handler(path, ranges, drop_after))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stream files out of a remote ZIP")
+    parser.add_argument("--list", metavar="URL", help="Print the archive's entries")
+    parser.add_argument("--serve", metavar="ZIP", help="Serve a ZIP locally for testing")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-ranges", action="store_true", help="With --serve: ignore Range requests")
+    parser.add_argument("--drop-after", type=int, default=0,
+                        help="With --serve: cut every response off after this many bytes")
+    args = parser.parse_args()
+
+    if args.serve:
+        server = serve(args.serve, args.port, ranges=not args.no_ranges, drop_after=args.drop_after)
+        print(f"Serving {args.serve} at http://127.0.0.1:{args.port}/{os.path.basename(args.serve)}")
+        server.serve_forever()
+        return 0
+    if args.list:
+        remote = RemoteZip(args.list).probe()
+        for entry in remote.central_directory():
+            print(f"{entry.size:>12,} {entry.compressed_size:>12,} {entry.crc:08x}  {entry.name}")
+        return 0
+    parser.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())